@@ -0,0 +1,135 @@
+from codigo_intermediario import Instrucao, temporario, TEMPORARIO
+from grafo_fluxo import GrafoFluxo, dividir_funcoes
+from vivacidade import Vivacidade
+
+
+def intervalos_vivos(trecho):
+    # Intervalo [primeira, última] posição em que cada temporário da função está vivo, na ordem do texto:
+    # as posições onde ele aparece, estendidas até o início dos blocos em que chega vivo e até o fim dos
+    # blocos de onde sai vivo (laços esticam o intervalo até a aresta de retorno)
+    intervalos = {}
+    for pos, instrucao in enumerate(trecho):
+        for operando in (instrucao.dest, instrucao.a, instrucao.b):
+            if operando is not None and operando.classe == TEMPORARIO:
+                intervalo = intervalos.get(operando.valor)
+                if intervalo is None:
+                    intervalos[operando.valor] = [pos, pos]
+                else:
+                    intervalo[1] = pos
+    grafo = GrafoFluxo(trecho)
+    vivacidade = Vivacidade(grafo)
+    nome_do_numero = {numero: nome for nome, numero in vivacidade.numeros.items() if nome in intervalos}
+    for b in range(len(grafo)):
+        for bits, pos in ((vivacidade.entrada[b], grafo.inicios[b]), (vivacidade.saida[b], grafo.fins[b] - 1)):
+            while bits:
+                menor = bits & -bits
+                bits ^= menor
+                nome = nome_do_numero.get(menor.bit_length() - 1)
+                if nome is not None:
+                    intervalo = intervalos[nome]
+                    intervalo[0] = min(intervalo[0], pos)
+                    intervalo[1] = max(intervalo[1], pos)
+    return intervalos
+
+
+class AlocacaoRegistradores:
+    # Alocação por varredura linear (linear scan) dos temporários de cada função em k registradores
+    # virtuais reaproveitados. Os intervalos são percorridos pelo início; quando os k registradores estão
+    # ocupados, vai para a memória (derramado) o intervalo que termina mais tarde, o atual ou um ativo.
+    # Os derramados ocupam posições do quadro, também reaproveitadas quando os intervalos não se cruzam.
+    # Um intervalo que termina na instrução em que outro começa não cede o registrador para ele: um gerador
+    # nativo pode escrever o destino antes de ler todos os operandos.
+    # Nomes no código gerado: registradores são t0..t(k-1) e as posições do quadro t(k), t(k+1)...; assim o
+    # 3AC continua válido (e legível pelo ler_3ac) e 'funcoes' diz a um gerador nativo o que é o quê.
+    def __init__(self, codigo, registradores=8):
+        if registradores < 1:
+            raise Exception(f"Erro do otimizador: número de registradores inválido ({registradores}).")
+        self.codigo = codigo
+        self.registradores = registradores
+        self.funcoes = {}
+        self.temporarios = 0
+        self.derramados = 0
+
+    def _varredura(self, intervalos):
+        k = self.registradores
+        livres = list(range(k - 1, -1, -1))
+        ativos = []
+        alocacao = {}
+        derramados = []
+        for nome, (inicio, fim) in sorted(intervalos.items(), key=lambda item: (item[1][0], item[1][1])):
+            ainda_ativos = []
+            for ativo in ativos:
+                if intervalos[ativo][1] < inicio:
+                    livres.append(alocacao[ativo])
+                else:
+                    ainda_ativos.append(ativo)
+            ativos = ainda_ativos
+            if livres:
+                alocacao[nome] = livres.pop()
+                ativos.append(nome)
+                continue
+            mais_longo = max(ativos, key=lambda ativo: intervalos[ativo][1])
+            if intervalos[mais_longo][1] > fim:
+                alocacao[nome] = alocacao.pop(mais_longo)
+                ativos.remove(mais_longo)
+                ativos.append(nome)
+                derramados.append(mais_longo)
+            else:
+                derramados.append(nome)
+        return alocacao, derramados
+
+    def _posicoes_quadro(self, intervalos, derramados):
+        # Mesma varredura, sem limite: uma posição do quadro volta a ficar livre quando seu intervalo acaba
+        livres = []
+        ativos = []
+        posicao = {}
+        total = 0
+        for nome in sorted(derramados, key=lambda nome: intervalos[nome][0]):
+            inicio = intervalos[nome][0]
+            ainda_ativos = []
+            for ativo in ativos:
+                if intervalos[ativo][1] < inicio:
+                    livres.append(posicao[ativo])
+                else:
+                    ainda_ativos.append(ativo)
+            ativos = ainda_ativos
+            if livres:
+                posicao[nome] = livres.pop()
+            else:
+                posicao[nome] = total
+                total += 1
+            ativos.append(nome)
+        return posicao, total
+
+    def _alocar_funcao(self, nome_funcao, trecho):
+        intervalos = intervalos_vivos(trecho)
+        if not intervalos:
+            return trecho
+        alocacao, derramados = self._varredura(intervalos)
+        posicao, total = self._posicoes_quadro(intervalos, derramados)
+        k = self.registradores
+        novos = {nome: temporario(f"t{r}") for nome, r in alocacao.items()}
+        novos.update((nome, temporario(f"t{k + p}")) for nome, p in posicao.items())
+        self.funcoes[nome_funcao] = {
+            'temporarios': len(intervalos),
+            'registradores': len(set(alocacao.values())),
+            'posicoes_quadro': total,
+        }
+        self.temporarios += len(intervalos)
+        self.derramados += len(derramados)
+
+        def trocar(operando):
+            if operando is not None and operando.classe == TEMPORARIO:
+                return novos[operando.valor]
+            return operando
+
+        return [Instrucao(i.op, dest=trocar(i.dest), a=trocar(i.a), b=trocar(i.b), oper=i.oper) for i in trecho]
+
+    def aplicar(self):
+        codigo_novo = []
+        for nome, inicio, fim in dividir_funcoes(self.codigo):
+            trecho = self.codigo[inicio:fim]
+            if nome is not None:
+                trecho = self._alocar_funcao(nome, trecho)
+            codigo_novo.extend(trecho)
+        return codigo_novo
@@ -1,4 +1,11 @@
+import io
+import os
 import re
+import mmap
+import codecs
+from array import array
+from bisect import bisect_right
+from collections import deque
 
 class Token:
     def __init__(self, tipo, valor, linha, coluna):
@@ -11,6 +18,89 @@ class Token:
         return f"Token({self.tipo}, '{self.valor}', linha={self.linha}, coluna={self.coluna})"
 
 
+class VisaoToken:
+    # Token "virtual" sobre o FluxoTokens: tipo e valor já resolvidos, linha e coluna calculadas sob demanda
+    __slots__ = ('tipo', 'valor', '_fluxo', '_indice')
+
+    def __init__(self, fluxo, indice):
+        self._fluxo = fluxo
+        self._indice = indice
+        self.tipo = fluxo.nomes_tipos[fluxo.tipos[indice]]
+        self.valor = fluxo.tabela_valores[fluxo.valores[indice]]
+
+    @property
+    def linha(self):
+        return self._fluxo.posicao(self._indice)[0]
+
+    @property
+    def coluna(self):
+        return self._fluxo.posicao(self._indice)[1]
+
+    def __repr__(self):
+        linha, coluna = self._fluxo.posicao(self._indice)
+        return f"Token({self.tipo}, '{self.valor}', linha={linha}, coluna={coluna})"
+
+
+class FluxoTokens:
+    # Armazena os tokens em colunas: código do tipo, índice do valor internado e deslocamento no código-fonte
+    def __init__(self):
+        self.nomes_tipos = []
+        self.codigos_tipos = {}
+        self.tipos = array('B')
+        self.valores = array('I')
+        self.inicios = array('I')
+        self.tabela_valores = []
+        self.indice_valores = {}
+        self.inicios_linhas = array('I', [0])
+        self._ultima_visao = None
+
+    def codigo_tipo(self, tipo):
+        codigo = self.codigos_tipos.get(tipo)
+        if codigo is None:
+            codigo = len(self.nomes_tipos)
+            self.codigos_tipos[tipo] = codigo
+            self.nomes_tipos.append(tipo)
+        return codigo
+
+    def adicionar(self, tipo, valor, inicio):
+        indice = self.indice_valores.get(valor)
+        if indice is None:
+            indice = len(self.tabela_valores)
+            self.indice_valores[valor] = indice
+            self.tabela_valores.append(valor)
+        codigo = self.codigos_tipos.get(tipo)
+        self.tipos.append(codigo if codigo is not None else self.codigo_tipo(tipo))
+        self.valores.append(indice)
+        self.inicios.append(inicio)
+
+    def nova_linha(self, inicio):
+        self.inicios_linhas.append(inicio)
+
+    def posicao(self, indice):
+        inicio = self.inicios[indice]
+        linha = bisect_right(self.inicios_linhas, inicio)
+        return linha, inicio - self.inicios_linhas[linha - 1] + 1
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def __getitem__(self, indice):
+        # O parser consulta o token seguinte (lookahead) e depois avança para ele: reaproveita a visão
+        visao = self._ultima_visao
+        if visao is not None and visao._indice == indice:
+            return visao
+        if indice < 0:
+            indice += len(self.tipos)
+        if not 0 <= indice < len(self.tipos):
+            raise IndexError(indice)
+        visao = self._ultima_visao = VisaoToken(self, indice)
+        return visao
+
+    def __iter__(self):
+        for indice in range(len(self.tipos)):
+            yield VisaoToken(self, indice)
+
+
 class Simbolo:
     def __init__(self, nome, tipo=None, escopo="global", endereco=None):
         self.nome = nome
@@ -38,9 +128,50 @@ class TabelaSimbolos:
         return str(self.tabela)
 
 
+class JanelaTokens:
+    # Lookahead limitado sobre um gerador de tokens: o parser só olha para self.pos e self.pos + 1,
+    # então basta manter os 'tamanho' tokens mais recentes
+    def __init__(self, tokens, tamanho=2):
+        self.iterador = iter(tokens)
+        self.tamanho = tamanho
+        self.buffer = deque()
+        self.base = 0
+
+    def __getitem__(self, indice):
+        if indice < self.base:
+            raise IndexError(f"Token {indice} já foi descartado da janela de lookahead.")
+        while indice >= self.base + len(self.buffer):
+            try:
+                self.buffer.append(next(self.iterador))
+            except StopIteration:
+                raise IndexError(indice)
+        while self.base < indice - self.tamanho + 1:
+            self.buffer.popleft()
+            self.base += 1
+        return self.buffer[indice - self.base]
+
+
+def ler_blocos(caminho, tamanho_bloco=1 << 16, usar_mmap=True):
+    # Lê o arquivo em blocos de texto; o decodificador incremental trata caracteres UTF-8 divididos entre blocos
+    # e, como open() em modo texto, converte '\r\n' e '\r' em '\n' (mesmo com o '\r\n' dividido entre blocos)
+    decodificador = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+    with open(caminho, 'rb') as arquivo:
+        if usar_mmap and os.fstat(arquivo.fileno()).st_size > 0:
+            with mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                for inicio in range(0, len(mapa), tamanho_bloco):
+                    yield decodificador.decode(mapa[inicio:inicio + tamanho_bloco])
+        else:
+            bloco = arquivo.read(tamanho_bloco)
+            while bloco:
+                yield decodificador.decode(bloco)
+                bloco = arquivo.read(tamanho_bloco)
+    yield decodificador.decode(b'', final=True)
+
+
 class Lexer:
-    def __init__(self, codigo):
+    def __init__(self, codigo, blocos=None):
         self.codigo = codigo
+        self.blocos = blocos
         self.linha = 1
         self.coluna = 1
         self.pos = 0
@@ -72,9 +203,81 @@ class Lexer:
         self.regex_geral = '|'.join(f'(?P<{nome}>{padrao})' for nome, padrao in self.regex_tokens)
         self.pattern = re.compile(self.regex_geral)
 
+    @classmethod
+    def de_arquivo(cls, caminho, tamanho_bloco=1 << 16, usar_mmap=True):
+        return cls(None, blocos=ler_blocos(caminho, tamanho_bloco, usar_mmap))
+
     def analisar(self):
-        while self.pos < len(self.codigo):
-            match = self.pattern.match(self.codigo, self.pos)
+        self.tokens.extend(self.gerar_tokens())
+        return self.tokens
+
+    def _corte(self, texto):
+        # Última posição de 'texto' onde nenhum token pode estar aberto, olhando só a última linha (nenhum
+        # token atravessa uma quebra de linha): depois de espaço ou delimitador, que nunca fazem parte de
+        # outro token. Devolve (corte, comentario): comentario=True quando a linha termina em um
+        # comentário ainda aberto, que começa no corte e continua no próximo bloco
+        corte = pos = texto.rfind('\n') + 1
+        tamanho = len(texto)
+        match_token = self.pattern.match
+        while pos < tamanho:
+            match = match_token(texto, pos)
+            if match is None:
+                caractere = texto[pos]
+                # Aspas sem fechamento até aqui ou um caractere no fim ('&', '|', o '.' de '5.'): o próximo
+                # bloco ainda pode completar o token
+                if caractere in '"\'' or pos == tamanho - 1:
+                    return corte, False
+                pos += 1
+                corte = pos
+                continue
+            tipo = match.lastgroup
+            if tipo == 'COMENT':
+                return pos, True
+            pos = match.end()
+            if tipo == 'ESPACO' or tipo == 'DELIM':
+                corte = pos
+        return corte, False
+
+    def _trechos(self):
+        # Pares (trecho, comentario). Cada bloco é analisado até o último ponto seguro (ver _corte) e só o
+        # resto, um token ainda incompleto, é juntado ao bloco seguinte; o texto de um comentário aberto no
+        # fim do bloco sai como trecho com comentario=True, sem ser guardado, até a próxima '\n'. Assim a
+        # memória fica limitada pelo tamanho do bloco mais o maior token, mesmo em uma linha muito longa.
+        if self.blocos is None:
+            yield self.codigo, False
+            return
+        pendente = ''
+        comentario = False
+        for bloco in self.blocos:
+            if comentario:
+                fim = bloco.find('\n')
+                if fim < 0:
+                    yield bloco, True
+                    continue
+                yield bloco[:fim], True
+                bloco = bloco[fim:]
+                comentario = False
+            texto = pendente + bloco
+            corte, comentario = self._corte(texto)
+            yield texto[:corte], False
+            pendente = texto[corte:]
+            if comentario:
+                yield pendente, True
+                pendente = ''
+        yield pendente, False
+
+    def gerar_tokens(self):
+        for trecho, comentario in self._trechos():
+            if comentario:
+                self.coluna += len(trecho)
+                continue
+            yield from self._analisar_trecho(trecho)
+        yield Token('EOF', '', self.linha, self.coluna)
+
+    def _analisar_trecho(self, trecho):
+        pos = 0
+        while pos < len(trecho):
+            match = self.pattern.match(trecho, pos)
             if match:
                 tipo = match.lastgroup
                 valor = match.group(tipo)
@@ -90,16 +293,51 @@ class Lexer:
                         else:
                             self.tabela_simbolos.adicionar(valor)
 
-                    token = Token(tipo, valor, self.linha, self.coluna)
-                    self.tokens.append(token)
+                    yield Token(tipo, valor, self.linha, self.coluna)
                     self.coluna += len(valor)
 
-                self.pos += len(valor)
+                pos += len(valor)
             else:
-                erro_char = self.codigo[self.pos]
+                erro_char = trecho[pos]
                 self.erros.append(f"Caractere inválido '{erro_char}' na linha {self.linha}, coluna {self.coluna}")
-                self.pos += 1
+                pos += 1
                 self.coluna += 1
 
-        self.tokens.append(Token('EOF', '', self.linha, self.coluna))
-        return self.tokens
+    def analisar_compacto(self):
+        # Mesma análise de analisar(), mas guardando os tokens em um FluxoTokens
+        fluxo = FluxoTokens()
+        match_token = self.pattern.match
+        palavras_reservadas = self.palavras_reservadas
+        tabela_simbolos = self.tabela_simbolos
+        adicionar = fluxo.adicionar
+        base = 0
+        for trecho, comentario in self._trechos():
+            tamanho = len(trecho)
+            if comentario:
+                base += tamanho
+                continue
+            pos = 0
+            while pos < tamanho:
+                match = match_token(trecho, pos)
+                if match:
+                    tipo = match.lastgroup
+                    fim = match.end()
+                    if tipo == 'NOVA_LINHA':
+                        fluxo.nova_linha(base + fim)
+                    elif tipo != 'ESPACO' and tipo != 'COMENT':
+                        valor = trecho[pos:fim]
+                        if tipo == 'ID':
+                            if valor in palavras_reservadas:
+                                tipo = valor.upper()
+                            else:
+                                tabela_simbolos.adicionar(valor)
+                        adicionar(tipo, valor, base + pos)
+                    pos = fim
+                else:
+                    linha = len(fluxo.inicios_linhas)
+                    coluna = base + pos - fluxo.inicios_linhas[-1] + 1
+                    self.erros.append(f"Caractere inválido '{trecho[pos]}' na linha {linha}, coluna {coluna}")
+                    pos += 1
+            base += tamanho
+        adicionar('EOF', '', base)
+        return fluxo
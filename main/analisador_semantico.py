@@ -1,9 +1,15 @@
+from functools import wraps
 from collections import defaultdict
 from analisador_lexico import Token
+from codigo_intermediario import (
+    Instrucao, constante, temporario, variavel, rotulo, funcao,
+    OP_DECLARE, OP_FUNCAO, OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_IF_FALSE, OP_PARAM,
+    OP_FORMAL, OP_CALL, OP_RETURN, OP_RET, OP_PRINT, OP_HALT, OP_COPIA, OP_BINARIA, OP_UNARIA
+)
 
 
 class AnalisadorSemantico:
-    def __init__(self, tokens):
+    def __init__(self, tokens, rastreamento=True):
         self.tokens = tokens
         self.pos = 0
         self.token = self.tokens[self.pos]
@@ -12,6 +18,7 @@ class AnalisadorSemantico:
         self.edges = []
         self.parent_stack = []
         self.tabela_simbolos = []
+        self.indice_simbolos = {}
         self.escopo_atual = 'global'
         self.endereco = 0
         self.nos_com_erro = set()
@@ -28,13 +35,21 @@ class AnalisadorSemantico:
         self.temp_count = 0
         self.label_count = 0
 
+        # Sem rastreamento, as regras da gramática usam as funções originais, sem o decorador 'rastrear'
+        self.rastreamento = rastreamento
+        if not rastreamento:
+            for nome, atributo in vars(AnalisadorSemantico).items():
+                original = getattr(atributo, '__wrapped__', None)
+                if original is not None:
+                    setattr(self, nome, original.__get__(self))
+
     def novo_temp(self):
         self.temp_count += 1
-        return f"t{self.temp_count}"
+        return temporario(f"t{self.temp_count}")
 
     def novo_label(self):
         self.label_count += 1
-        return f"L{self.label_count}"
+        return rotulo(f"L{self.label_count}")
 
     def novo_no(self, label):
         self.node_id += 1
@@ -47,6 +62,7 @@ class AnalisadorSemantico:
 
     def rastrear(label_func):
         def decorator(func):
+            @wraps(func)
             def wrapper(self, *args, **kwargs):
                 label = label_func(self) if callable(label_func) else label_func
                 no_atual = self.novo_no(label)
@@ -64,11 +80,18 @@ class AnalisadorSemantico:
 
     def avanca(self):
         self.pos += 1
-        if self.pos < len(self.tokens):
+        try:
             self.token = self.tokens[self.pos]
-        else:
+        except IndexError:
             self.token = Token('EOF', '', -1, -1)
 
+    def espiar(self):
+        # Token seguinte ao atual; funciona com listas, FluxoTokens e JanelaTokens (sem usar len)
+        try:
+            return self.tokens[self.pos + 1]
+        except IndexError:
+            return None
+
     def erro_sintatico(self, msg):
         raise Exception(f"Erro de sintaxe na linha {self.token.linha}, coluna {self.token.coluna}: {msg} (token: {self.token})")
 
@@ -77,7 +100,8 @@ class AnalisadorSemantico:
 
     def match(self, tipo_esperado, valor_esperado=None):
         if self.token.tipo == tipo_esperado:
-            self.novo_no(f"<{self.token.tipo}, {self.token.valor}>")
+            if self.rastreamento:
+                self.novo_no(f"<{self.token.tipo}, {self.token.valor}>")
             if valor_esperado is None or self.token.valor == valor_esperado:
                 self.avanca()
             else:
@@ -98,19 +122,20 @@ class AnalisadorSemantico:
             'params': params if params is not None else [],
             'inicializada': inicializada
         }
-        self.tabela_simbolos.append(simbolo)
+        self.registrar_simbolo(simbolo)
         if params is None:
-            self.codigo_3ac.append(f'declare {nome}, {tipo}')
+            self.codigo_3ac.append(Instrucao(OP_DECLARE, dest=variavel(nome), oper=tipo))
+
+    def registrar_simbolo(self, simbolo):
+        # A lista mantém a ordem de declaração (exibição); o índice por (escopo, nome) dá busca O(1)
+        self.tabela_simbolos.append(simbolo)
+        self.indice_simbolos[(simbolo['escopo'], simbolo['identificador'])] = simbolo
 
     def buscar_simbolo(self, nome, escopo_local=False):
-        for simbolo in reversed(self.tabela_simbolos):
-            if simbolo['identificador'] == nome and simbolo['escopo'] == self.escopo_atual:
-                return simbolo
-        if not escopo_local:
-            for simbolo in reversed(self.tabela_simbolos):
-                if simbolo['identificador'] == nome and simbolo['escopo'] == 'global':
-                    return simbolo
-        return None
+        simbolo = self.indice_simbolos.get((self.escopo_atual, nome))
+        if simbolo is None and not escopo_local:
+            simbolo = self.indice_simbolos.get(('global', nome))
+        return simbolo
 
     def analisar(self):
         self.programa()
@@ -124,8 +149,8 @@ class AnalisadorSemantico:
                 self.erro_semantico("Função 'main' deve ter tipo 'int'.")
             if main_simbolo.get('params'):
                 self.erro_semantico("Função 'main' não deve ter parâmetros.")
-        self.codigo_3ac.insert(0, 'goto main')
-        self.codigo_3ac.append('halt')
+        self.codigo_3ac.insert(0, Instrucao(OP_GOTO, a=rotulo('main')))
+        self.codigo_3ac.append(Instrucao(OP_HALT))
 
     @rastrear("programa")
     def programa(self):
@@ -159,8 +184,8 @@ class AnalisadorSemantico:
                 self.erro_semantico(f"Função '{id_token.valor}' já declarada.")
             self.escopo_atual = id_token.valor
             self.tipo_funcao_atual = tipo
-            self.codigo_3ac.append(f'\n{self.escopo_atual}:')
-            self.codigo_3ac.append('push_stack')
+            self.codigo_3ac.append(Instrucao(OP_FUNCAO, a=funcao(self.escopo_atual)))
+            self.codigo_3ac.append(Instrucao(OP_PUSH_STACK))
             params = []
             if not (self.token.tipo == 'DELIM' and self.token.valor == ')'):
                 params = self.parametros_formais()
@@ -170,8 +195,8 @@ class AnalisadorSemantico:
             garante_retorno = self.bloco()
             if self.tipo_funcao_atual != 'void' and not garante_retorno:
                 self.erro_semantico(f"Erro de fluxo de controle. A função '{self.escopo_atual}' do tipo {self.tipo_funcao_atual} pode não retornar um valor em todos os caminhos de execução.")
-            self.codigo_3ac.append('pop_stack')
-            self.codigo_3ac.append('ret')
+            self.codigo_3ac.append(Instrucao(OP_POP_STACK))
+            self.codigo_3ac.append(Instrucao(OP_RET))
             self.escopo_atual = escopo_anterior
             self.tipo_funcao_atual = None
         else:
@@ -207,8 +232,8 @@ class AnalisadorSemantico:
             'params': [],
             'inicializada': True
         }
-        self.tabela_simbolos.append(simbolo)
-        self.codigo_3ac.append(f'param {id_token.valor}')
+        self.registrar_simbolo(simbolo)
+        self.codigo_3ac.append(Instrucao(OP_FORMAL, dest=variavel(id_token.valor), oper=tipo))
         return {'tipo': tipo, 'nome': id_token.valor}
 
     @rastrear("bloco de função")
@@ -227,7 +252,7 @@ class AnalisadorSemantico:
             self.decl_var()
             return False
         elif self.token.tipo == 'ID':
-            prox = self.tokens[self.pos + 1] if self.pos + 1 < len(self.tokens) else None
+            prox = self.espiar()
             if prox and prox.tipo == 'ATRIB':
                 self.atribuicao()
                 return False
@@ -257,7 +282,7 @@ class AnalisadorSemantico:
             self.match('PRINT')
             self.match('DELIM', '(')
             end_expr, _ = self.expressao()
-            self.codigo_3ac.append(f'print {end_expr}')
+            self.codigo_3ac.append(Instrucao(OP_PRINT, a=end_expr))
             self.match('DELIM', ')')
             self.match('DELIM', ';')
             return False
@@ -291,7 +316,7 @@ class AnalisadorSemantico:
         if tipo_variavel != tipo_expressao:
             if not (tipo_variavel == 'float' and tipo_expressao == 'int'):
                 self.erro_semantico(f"Não é possível atribuir um valor do tipo '{tipo_expressao}' a uma variável do tipo '{tipo_variavel}'.")
-        self.codigo_3ac.append(f'{id_token.valor} = {end_expr}')
+        self.codigo_3ac.append(Instrucao(OP_COPIA, dest=variavel(id_token.valor), a=end_expr))
         simbolo['inicializada'] = True
         self.match('DELIM', ';')
         if self.escopo_atual != 'global':
@@ -309,7 +334,7 @@ class AnalisadorSemantico:
         if not (self.token.tipo == 'DELIM' and self.token.valor == ')'):
             enderecos_tipos = self.lista_argumentos()
         for end_arg, tipo_arg in enderecos_tipos:
-            self.codigo_3ac.append(f'param {end_arg}')
+            self.codigo_3ac.append(Instrucao(OP_PARAM, a=end_arg))
         params_esperados = funcao_simbolo.get('params', [])
         if len(enderecos_tipos) != len(params_esperados):
             self.erro_semantico(f"Função '{id_token.valor}' espera {len(params_esperados)} argumentos, mas recebeu {len(enderecos_tipos)}.")
@@ -322,9 +347,9 @@ class AnalisadorSemantico:
         end_retorno = None
         if funcao_simbolo['tipo'] != 'void':
             end_retorno = self.novo_temp()
-            self.codigo_3ac.append(f'{end_retorno} = call {id_token.valor}, {len(enderecos_tipos)}')
+            self.codigo_3ac.append(Instrucao(OP_CALL, dest=end_retorno, a=funcao(id_token.valor), b=constante(len(enderecos_tipos))))
         else:
-            self.codigo_3ac.append(f'call {id_token.valor}, {len(enderecos_tipos)}')
+            self.codigo_3ac.append(Instrucao(OP_CALL, a=funcao(id_token.valor), b=constante(len(enderecos_tipos))))
         if self.escopo_atual != 'global':
             self.dependencias_funcao[self.escopo_atual].add(id_token.valor)
         return end_retorno, funcao_simbolo['tipo']
@@ -346,14 +371,14 @@ class AnalisadorSemantico:
         if self.tipo_funcao_atual == 'void':
             if not (self.token.tipo == 'DELIM' and self.token.valor == ';'):
                 self.erro_semantico(f"Função 'void' '{self.escopo_atual}' não pode retornar um valor.")
-            self.codigo_3ac.append('ret')
+            self.codigo_3ac.append(Instrucao(OP_RET))
         else:
             if self.token.tipo == 'DELIM' and self.token.valor == ';':
                 self.erro_semantico(f"Função '{self.escopo_atual}' deve retornar um valor do tipo '{self.tipo_funcao_atual}'.")
             end_retorno, tipo_retorno = self.expressao()
             if tipo_retorno != self.tipo_funcao_atual:
                 self.erro_semantico(f"Tipo de retorno incompatível. A função '{self.escopo_atual}' espera '{self.tipo_funcao_atual}' mas recebeu '{tipo_retorno}'.")
-            self.codigo_3ac.append(f'return {end_retorno}')
+            self.codigo_3ac.append(Instrucao(OP_RETURN, a=end_retorno))
         self.match('DELIM', ';')
 
     @rastrear("expressao")
@@ -370,7 +395,7 @@ class AnalisadorSemantico:
             if tipo_esq != 'bool' or tipo_dir != 'bool':
                 self.erro_semantico(f"Operação lógica '{op}' exige operandos booleanos.")
             end_temp = self.novo_temp()
-            self.codigo_3ac.append(f'{end_temp} = {end_esq} {op} {end_dir}')
+            self.codigo_3ac.append(Instrucao(OP_BINARIA, dest=end_temp, a=end_esq, b=end_dir, oper=op))
             end_esq = end_temp
             tipo_esq = 'bool'
         return end_esq, tipo_esq
@@ -385,7 +410,7 @@ class AnalisadorSemantico:
             if tipo_esq != tipo_dir:
                 self.erro_semantico(f"Operação relacional '{op}' entre tipos incompatíveis: '{tipo_esq}' e '{tipo_dir}'.")
             end_temp = self.novo_temp()
-            self.codigo_3ac.append(f'{end_temp} = {end_esq} {op} {end_dir}')
+            self.codigo_3ac.append(Instrucao(OP_BINARIA, dest=end_temp, a=end_esq, b=end_dir, oper=op))
             end_esq = end_temp
             tipo_esq = 'bool'
         return end_esq, tipo_esq
@@ -400,7 +425,7 @@ class AnalisadorSemantico:
             if tipo_esq not in ('int', 'float') or tipo_dir not in ('int', 'float'):
                 self.erro_semantico(f"Operação aritmética '{op}' entre tipos incompatíveis: '{tipo_esq}' e '{tipo_dir}'.")
             end_temp = self.novo_temp()
-            self.codigo_3ac.append(f'{end_temp} = {end_esq} {op} {end_dir}')
+            self.codigo_3ac.append(Instrucao(OP_BINARIA, dest=end_temp, a=end_esq, b=end_dir, oper=op))
             end_esq = end_temp
             if tipo_esq == 'float' or tipo_dir == 'float':
                 tipo_esq = 'float'
@@ -416,7 +441,7 @@ class AnalisadorSemantico:
             if tipo_esq not in ('int', 'float') or tipo_dir not in ('int', 'float'):
                 self.erro_semantico(f"Operação aritmética '{op}' entre tipos incompatíveis: '{tipo_esq}' e '{tipo_dir}'.")
             end_temp = self.novo_temp()
-            self.codigo_3ac.append(f'{end_temp} = {end_esq} {op} {end_dir}')
+            self.codigo_3ac.append(Instrucao(OP_BINARIA, dest=end_temp, a=end_esq, b=end_dir, oper=op))
             end_esq = end_temp
             if tipo_esq == 'float' or tipo_dir == 'float':
                 tipo_esq = 'float'
@@ -425,31 +450,31 @@ class AnalisadorSemantico:
     @rastrear("fator")
     def fator(self):
         if self.token.tipo == 'NUM_INT':
-            valor = self.token.valor
+            valor = int(self.token.valor)
             self.match('NUM_INT')
             end_temp = self.novo_temp()
-            self.codigo_3ac.append(f'{end_temp} = {valor}')
+            self.codigo_3ac.append(Instrucao(OP_COPIA, dest=end_temp, a=constante(valor)))
             return end_temp, 'int'
         elif self.token.tipo == 'NUM_FLOAT':
-            valor = self.token.valor
+            valor = float(self.token.valor)
             self.match('NUM_FLOAT')
             end_temp = self.novo_temp()
-            self.codigo_3ac.append(f'{end_temp} = {valor}')
+            self.codigo_3ac.append(Instrucao(OP_COPIA, dest=end_temp, a=constante(valor)))
             return end_temp, 'float'
         elif self.token.tipo == 'STRING':
-            valor = self.token.valor
+            valor = self.token.valor[1:-1]
             self.match('STRING')
             end_temp = self.novo_temp()
-            self.codigo_3ac.append(f'{end_temp} = {valor}')
+            self.codigo_3ac.append(Instrucao(OP_COPIA, dest=end_temp, a=constante(valor)))
             return end_temp, 'char'
         elif self.token.tipo in {'TRUE', 'FALSE'}:
-            valor = self.token.valor
+            valor = self.token.tipo == 'TRUE'
             self.match(self.token.tipo)
             end_temp = self.novo_temp()
-            self.codigo_3ac.append(f'{end_temp} = {valor}')
+            self.codigo_3ac.append(Instrucao(OP_COPIA, dest=end_temp, a=constante(valor)))
             return end_temp, 'bool'
         elif self.token.tipo == 'ID':
-            prox = self.tokens[self.pos + 1] if self.pos + 1 < len(self.tokens) else None
+            prox = self.espiar()
             if prox and prox.tipo == 'DELIM' and prox.valor == '(':
                 return self.chamada_funcao()
             else:
@@ -462,7 +487,7 @@ class AnalisadorSemantico:
                     self.erro_semantico(f"Variável '{id_token.valor}' usada antes de ser inicializada.")
                 if self.escopo_atual != 'global':
                     self.leitura_variaveis[id_token.valor].add(self.escopo_atual)
-                return id_token.valor, simbolo['tipo']
+                return variavel(id_token.valor), simbolo['tipo']
         elif self.token.tipo == 'DELIM' and self.token.valor == '(':
             self.match('DELIM', '(')
             end_expr, tipo_expr = self.expressao()
@@ -474,7 +499,7 @@ class AnalisadorSemantico:
             if tipo_fat != 'bool':
                 self.erro_semantico(f"Operador '!' exige operando booleano, encontrou '{tipo_fat}'.")
             end_temp = self.novo_temp()
-            self.codigo_3ac.append(f'{end_temp} = !{end_fat}')
+            self.codigo_3ac.append(Instrucao(OP_UNARIA, dest=end_temp, a=end_fat, oper='!'))
             return end_temp, 'bool'
         else:
             self.erro_sintatico(f"Fator inválido na expressão: esperado número, ID, bool, ou '('. Encontrado {self.token.valor}")
@@ -488,18 +513,18 @@ class AnalisadorSemantico:
         if tipo_cond != 'bool':
             self.erro_semantico(f"A condição da instrução 'if' deve ser do tipo booleano, encontrado '{tipo_cond}'.")
         label_else = self.novo_label()
-        self.codigo_3ac.append(f'if_false {end_cond} goto {label_else}')
+        self.codigo_3ac.append(Instrucao(OP_IF_FALSE, a=end_cond, b=label_else))
         return_if = self.comando()
         if self.token.tipo == 'ELSE':
             label_fim = self.novo_label()
-            self.codigo_3ac.append(f'goto {label_fim}')
-            self.codigo_3ac.append(f'{label_else}:')
+            self.codigo_3ac.append(Instrucao(OP_GOTO, a=label_fim))
+            self.codigo_3ac.append(Instrucao(OP_ROTULO, a=label_else))
             self.match('ELSE')
             return_else = self.comando()
-            self.codigo_3ac.append(f'{label_fim}:')
+            self.codigo_3ac.append(Instrucao(OP_ROTULO, a=label_fim))
             return return_if and return_else
         else:
-            self.codigo_3ac.append(f'{label_else}:')
+            self.codigo_3ac.append(Instrucao(OP_ROTULO, a=label_else))
             return False
 
     @rastrear("comando 'while'")
@@ -507,17 +532,17 @@ class AnalisadorSemantico:
         label_inicio = self.novo_label()
         label_fim = self.novo_label()
         self.loop_labels_stack.append({'inicio': label_inicio, 'fim': label_fim})
-        self.codigo_3ac.append(f'{label_inicio}:')
+        self.codigo_3ac.append(Instrucao(OP_ROTULO, a=label_inicio))
         self.match('WHILE')
         self.match('DELIM', '(')
         end_cond, tipo_cond = self.expressao()
         self.match('DELIM', ')')
         if tipo_cond != 'bool':
             self.erro_semantico(f"A condição da instrução 'while' deve ser do tipo booleano, encontrado '{tipo_cond}'.")
-        self.codigo_3ac.append(f'if_false {end_cond} goto {label_fim}')
+        self.codigo_3ac.append(Instrucao(OP_IF_FALSE, a=end_cond, b=label_fim))
         self.comando()
-        self.codigo_3ac.append(f'goto {label_inicio}')
-        self.codigo_3ac.append(f'{label_fim}:')
+        self.codigo_3ac.append(Instrucao(OP_GOTO, a=label_inicio))
+        self.codigo_3ac.append(Instrucao(OP_ROTULO, a=label_fim))
         self.loop_labels_stack.pop()
 
     @rastrear("break")
@@ -527,7 +552,7 @@ class AnalisadorSemantico:
         self.match('BREAK')
         self.match('DELIM', ';')
         fim_label = self.loop_labels_stack[-1]['fim']
-        self.codigo_3ac.append(f'goto {fim_label}')
+        self.codigo_3ac.append(Instrucao(OP_GOTO, a=fim_label))
 
     @rastrear("continue")
     def comando_continue(self):
@@ -536,7 +561,7 @@ class AnalisadorSemantico:
         self.match('CONTINUE')
         self.match('DELIM', ';')
         inicio_label = self.loop_labels_stack[-1]['inicio']
-        self.codigo_3ac.append(f'goto {inicio_label}')
+        self.codigo_3ac.append(Instrucao(OP_GOTO, a=inicio_label))
 
     def gerar_arvore_sintatica(self):
         linhas = [
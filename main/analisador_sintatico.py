@@ -10,6 +10,7 @@ class Parser:
         self.edges = []
         self.parent_stack = []
         self.tabela_simbolos = []
+        self.indice_simbolos = {}
         self.escopo_atual = 'global'
         self.endereco = 0
         self.nos_com_erro = set()
@@ -315,10 +316,8 @@ class Parser:
             self.return_encontrado = True
 
     def obter_tipo_funcao(self, nome_funcao):
-        for entrada in self.tabela_simbolos:
-            if entrada['identificador'] == nome_funcao:
-                return entrada['tipo']
-        return None
+        entrada = self.indice_simbolos.get(('global', nome_funcao))
+        return entrada['tipo'] if entrada else None
 
     @rastrear("expressao")
     def expressao(self):
@@ -416,9 +415,11 @@ class Parser:
 
     def inserir_tabela(self, nome, tipo, escopo):
         self.endereco += 4
-        self.tabela_simbolos.append({
+        entrada = {
             'identificador': nome,
             'tipo': tipo,
             'escopo': escopo,
             'endereco': self.endereco
-        })
+        }
+        self.tabela_simbolos.append(entrada)
+        self.indice_simbolos.setdefault((escopo, nome), entrada)
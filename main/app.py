@@ -1,11 +1,20 @@
+import os
 import streamlit as st
 import pandas as pd
-from analisador_lexico import Lexer
-from analisador_semantico import AnalisadorSemantico
-from otimizador_de_codigo import Otimizador
+from maquina_virtual import MaquinaVirtual
+from instrumentacao import Instrumentacao
+from cache_compilacao import CacheCompilacao
 from entradas_de_exemplo import entradas_de_exemplo
 
 st.set_page_config(page_title="Compilador C (Simplificado)")
+
+
+@st.cache_resource
+def obter_cache():
+    # Um único cache por servidor, mantido entre as execuções do script; COMPILADOR_CACHE ativa a camada em disco
+    return CacheCompilacao(capacidade=64, diretorio=os.environ.get('COMPILADOR_CACHE'))
+
+
 st.title("Compilador para linguagem C simplificada")
 
 codigo_selecionado = st.selectbox("Escolha um exemplo de código", list(entradas_de_exemplo.keys()))
@@ -15,20 +24,25 @@ codigo = st.text_area(
     height=300
 )
 
+# O tracemalloc deixa cada fase várias vezes mais lenta: com a memória medida, os tempos do painel
+# passam a medir sobretudo o rastreamento; por isso só é ligado a pedido
+medir_memoria = st.checkbox("Medir pico de memória por fase (deixa a compilação bem mais lenta)", value=False)
+
 if st.button("Analisar"):
-    try:
-        # Análise Léxica
+    instrumentacao = Instrumentacao(medir_memoria=medir_memoria)
+    compilacao = obter_cache().compilar(codigo, instrumentacao, rastreamento=True, gerar_grafos=True)
+
+    # Análise Léxica
+    if compilacao.tokens is not None:
         st.subheader("Tokens Obtidos:")
-        lexer = Lexer(codigo)
-        tokens = lexer.analisar()
-        for t in tokens:
+        for t in compilacao.tokens:
             st.write(t)
 
         # Tabela de Símbolos
         st.subheader("Tabela de Símbolos (Pós Análise Léxica)")
         simbolos = [
             {"Nome": s.nome, "Tipo": s.tipo, "Escopo": s.escopo, "Endereço": s.endereco}
-            for s in lexer.tabela_simbolos.tabela.values()
+            for s in compilacao.tabela_lexica.tabela.values()
         ]
         if simbolos:
             df = pd.DataFrame(simbolos)
@@ -37,36 +51,59 @@ if st.button("Analisar"):
             st.write("Nenhum identificador encontrado.")
 
         # Análise Sintática e Semântica
-        parser = AnalisadorSemantico(tokens)
         st.subheader("Análise Sintática e Semântica")
-        parser.analisar()
+
+    if compilacao.codigo_3ac is not None:
         st.success("Análise Sintática e Semântica concluída com sucesso!")
 
+    if compilacao.arvore_sintatica is not None:
         # Árvore de Derivação Sintática
         st.subheader("Árvore de Derivação Sintática")
-        st.graphviz_chart(parser.gerar_arvore_sintatica())
+        st.graphviz_chart(compilacao.arvore_sintatica)
 
         # Tabela de Símbolos (pós semântico)
         st.subheader("Tabela de Símbolos (Pós Análise Semântica)")
-        if parser.tabela_simbolos:
-            df = pd.DataFrame(parser.tabela_simbolos)
+        if compilacao.tabela_simbolos:
+            df = pd.DataFrame(compilacao.tabela_simbolos)
             st.table(df)
         else:
             st.write("Nenhum símbolo registrado.")
 
         # Grafo de dependências
         st.subheader("Grafo de Dependências")
-        st.graphviz_chart(parser.gerar_grafo_dependencias())
+        st.graphviz_chart(compilacao.grafo_dependencias)
 
         # Código Intermediário (3AC)
         st.subheader("Código Intermediário (3AC):")
-        st.code("\n".join(parser.codigo_3ac), language='text')
+        st.code(compilacao.texto_3ac, language='text')
 
+    if compilacao.codigo_otimizado is not None:
         # Código Intermediário Otimizado
         st.subheader("Código Intermediário Otimizado:")
-        otimizador = Otimizador(parser.codigo_3ac)
-        codigo_otimizado = otimizador.otimizar()
-        st.code("\n".join(codigo_otimizado), language='text')
+        st.code(compilacao.texto_otimizado, language='text')
+
+        # Execução do Código Intermediário (não fica em cache: é sempre refeita)
+        st.subheader("Execução na Máquina Virtual 3AC")
+        for fase, titulo, codigo_executado in (("execucao", "Código Intermediário", compilacao.codigo_3ac),
+                                               ("execucao_otimizada", "Código Otimizado", compilacao.codigo_otimizado)):
+            vm = MaquinaVirtual(codigo_executado)
+            try:
+                with instrumentacao.fase(fase) as registro:
+                    saida = vm.executar(limite_instrucoes=10_000_000)
+                    registro['instrucoes_executadas'] = vm.instrucoes_executadas
+                st.write(f"**{titulo}:** {vm.instrucoes_executadas} instruções executadas "
+                         f"({vm.instrucoes_por_segundo:,.0f} instruções/s)")
+                st.code("\n".join(saida), language='text')
+            except Exception as e:
+                st.error(f"{titulo}: {e}")
+
+    if compilacao.erro:
+        st.error(compilacao.erro)
 
-    except Exception as e:
-        st.error(str(e))
+    # Instrumentação: tempo, contadores e pico de memória de cada fase (inclusive das que falharam)
+    with st.expander("Instrumentação das fases"):
+        st.write(f"Tempo total: {instrumentacao.para_dict()['tempo_total_s'] * 1000:.2f} ms")
+        st.table(pd.DataFrame(instrumentacao.fases))
+        st.write(f"Cache de compilação: {obter_cache().estatisticas()}")
+        st.download_button("Baixar JSON", instrumentacao.para_json(), file_name="instrumentacao.json",
+                           mime="application/json")
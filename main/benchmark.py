@@ -0,0 +1,475 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from analisador_lexico import Lexer, JanelaTokens
+from analisador_semantico import AnalisadorSemantico
+from otimizador_de_codigo import Otimizador
+from gerador_de_programas import gerar_programa
+from compilador import compilar, executar as executar_3ac
+from instrumentacao import Instrumentacao
+from entradas_de_exemplo import entradas_de_exemplo
+from maquina_virtual import MaquinaVirtual
+from transpilador_python import ProgramaPython
+from bytecode import MaquinaBytecode, SUPERINSTRUCOES
+
+PERFIS = {
+    'pequeno': dict(funcoes=5, profundidade=2, tamanho_expressao=4, comandos_por_bloco=4, globais=4, locais=3),
+    'medio': dict(funcoes=40, profundidade=3, tamanho_expressao=6, comandos_por_bloco=5, globais=8, locais=5),
+    'grande': dict(funcoes=300, profundidade=3, tamanho_expressao=8, comandos_por_bloco=6, globais=16, locais=6),
+}
+
+
+def gerar_programa_declaracoes(n):
+    # n variáveis globais, todas atribuídas e lidas dentro de main
+    linhas = [f"int g{i};" for i in range(n)]
+    linhas.append("int main() {")
+    linhas.extend(f"    g{i} = {i};" for i in range(n))
+    linhas.append("    print(g0);")
+    linhas.append("    return 0;")
+    linhas.append("}")
+    return "\n".join(linhas)
+
+
+def gerar_programa_repetitivo(n, uma_linha=False):
+    # Poucos identificadores distintos, para que o tamanho do arquivo cresça só com o número de linhas;
+    # com uma_linha=True, o mesmo programa sem comentários e sem nenhuma quebra de linha
+    linhas = ["int x, y;", "int main() {", "    x = 0;", "    y = 1;"]
+    comentario = '' if uma_linha else ' // comentário com "aspas" e ; no meio'
+    linhas.extend(f'    x = x + y * 2 - (x / 3);{comentario}' for _ in range(n))
+    linhas.append('    print("fim");')
+    linhas.append("    return 0;")
+    linhas.append("}")
+    return (" " if uma_linha else "\n").join(linhas)
+
+
+def gerar_programa_laco(n):
+    # O loopTest do primeiro exemplo com um laço longo e aninhado: quase todo o tempo é o interpretador
+    return f"""int loopTest(int x) {{
+    int sum;
+    int i;
+    sum = 0;
+    while (x > 0) {{
+        i = 0;
+        while (i < 10) {{
+            sum = (sum + x * i) % 10007;
+            i = i + 1;
+        }}
+        x = x - 1;
+    }}
+    return sum;
+}}
+
+int main() {{
+    print(loopTest({n}));
+    return 0;
+}}
+"""
+
+
+def benchmark_tabela_simbolos(tamanhos=(100, 1_000, 10_000, 100_000)):
+    resultados = []
+    for n in tamanhos:
+        tokens = Lexer(gerar_programa_declaracoes(n)).analisar()
+        parser = AnalisadorSemantico(tokens, rastreamento=False)
+        inicio = time.perf_counter()
+        parser.analisar()
+        tempo = time.perf_counter() - inicio
+        resultados.append({
+            'declaracoes': n,
+            'tempo_s': tempo,
+            'us_por_declaracao': tempo / n * 1e6,
+        })
+    return resultados
+
+
+def _medir_memoria(funcao):
+    tracemalloc.start()
+    resultado = funcao()
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, memoria
+
+
+def benchmark_lexer(n=100_000):
+    codigo = gerar_programa_declaracoes(n)
+    resultados = []
+    for modo, analisar in (('lista de Token', lambda: Lexer(codigo).analisar()),
+                           ('FluxoTokens', lambda: Lexer(codigo).analisar_compacto())):
+        inicio = time.perf_counter()
+        tokens = analisar()
+        tempo = time.perf_counter() - inicio
+        del tokens
+        tokens, memoria = _medir_memoria(analisar)
+        resultados.append({
+            'modo': modo,
+            'tokens': len(tokens),
+            'tempo_s': tempo,
+            'tokens_por_s': len(tokens) / tempo,
+            'memoria_bytes': memoria,
+            'bytes_por_token': memoria / len(tokens),
+        })
+        del tokens
+    return resultados
+
+
+def benchmark_rastreamento(n=50_000):
+    tokens = Lexer(gerar_programa_repetitivo(n)).analisar_compacto()
+    resultados = []
+    for rastreamento in (True, False):
+        parser = AnalisadorSemantico(tokens, rastreamento=rastreamento)
+        inicio = time.perf_counter()
+        parser.analisar()
+        tempo = time.perf_counter() - inicio
+        resultados.append({
+            'rastreamento': rastreamento,
+            'tokens': len(tokens),
+            'tempo_s': tempo,
+            'nos_arvore': len(parser.nodes),
+            'instrucoes_3ac': len(parser.codigo_3ac),
+        })
+    return resultados
+
+
+def benchmark_lexer_streaming(tamanhos_mb=(2, 8)):
+    # Com 'uma linha' o arquivo não tem nenhuma quebra de linha: o streaming ainda tem de ficar limitado
+    # pelo bloco e pela janela de lookahead, não pelo tamanho da linha
+    resultados = []
+    for mb, uma_linha in ((mb, uma_linha) for mb in tamanhos_mb for uma_linha in (False, True)):
+        codigo = (gerar_programa_repetitivo(mb * 2**20 // 30, uma_linha=True) if uma_linha
+                  else gerar_programa_repetitivo(mb * 2**20 // 68))
+        with tempfile.NamedTemporaryFile('w', suffix='.c', delete=False, encoding='utf-8') as arquivo:
+            arquivo.write(codigo)
+        del codigo
+        try:
+            def completo():
+                with open(arquivo.name, encoding='utf-8') as f:
+                    return len(Lexer(f.read()).analisar())
+
+            def streaming():
+                janela = JanelaTokens(Lexer.de_arquivo(arquivo.name).gerar_tokens())
+                n = 0
+                try:
+                    while True:
+                        janela[n]
+                        n += 1
+                except IndexError:
+                    return n
+
+            for modo, funcao in (('completo', completo), ('streaming', streaming)):
+                tracemalloc.start()
+                tokens = funcao()
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                resultados.append({
+                    'modo': modo,
+                    'linhas': 'uma' if uma_linha else 'várias',
+                    'arquivo_mb': os.path.getsize(arquivo.name) / 2**20,
+                    'tokens': tokens,
+                    'pico_memoria_bytes': pico,
+                })
+        finally:
+            os.unlink(arquivo.name)
+    return resultados
+
+
+def conferir_lexer_streaming(tamanhos_bloco=(1, 2, 3, 7, 64, 1 << 16)):
+    # Os tokens (tipo, valor, linha, coluna) e os erros léxicos lidos do arquivo em blocos pequenos têm de
+    # ser os da análise do texto inteiro, inclusive sem nenhuma quebra de linha, com comentários e tokens
+    # ('&&', '<=', '1.25', strings) divididos entre blocos; devolve o número de divergências
+    fontes = list(entradas_de_exemplo.values())
+    fontes.append(gerar_programa_repetitivo(200, uma_linha=True))
+    fontes.append(gerar_programa_repetitivo(50).replace('\n', ' '))
+    fontes.append('x = a && b || !c; y = 1.25 <= 3 != 2; s = "ola mundo"; c = \'a\'; @ "aberta & |')
+    divergencias = 0
+    for codigo in fontes:
+        with tempfile.NamedTemporaryFile('w', suffix='.c', delete=False, encoding='utf-8') as arquivo:
+            arquivo.write(codigo)
+        try:
+            for compacto in (False, True):
+                referencia = Lexer(codigo)
+                esperado = referencia.analisar_compacto() if compacto else referencia.analisar()
+                esperado = [(t.tipo, t.valor, t.linha, t.coluna) for t in esperado]
+                for tamanho_bloco in tamanhos_bloco:
+                    lexer = Lexer.de_arquivo(arquivo.name, tamanho_bloco)
+                    obtido = lexer.analisar_compacto() if compacto else lexer.gerar_tokens()
+                    obtido = [(t.tipo, t.valor, t.linha, t.coluna) for t in obtido]
+                    divergencias += obtido != esperado or lexer.erros != referencia.erros
+        finally:
+            os.unlink(arquivo.name)
+    return divergencias
+
+
+def medir_programa(codigo, repeticoes=3, executar=True, medir_memoria=False, nivel_otimizacao=2):
+    tempos = {}
+    resultado = {'bytes': len(codigo.encode('utf-8')), 'linhas': codigo.count('\n') + 1}
+    # As repetições só medem tempo; com medir_memoria, uma execução extra (com tracemalloc, mais lenta)
+    # gera o relatório de instrumentação com o pico de memória de cada fase
+    for repeticao in range(repeticoes + (1 if medir_memoria else 0)):
+        com_memoria = repeticao == repeticoes
+        instrumentacao = Instrumentacao(medir_memoria=com_memoria)
+        compilacao = compilar(codigo, instrumentacao, nivel_otimizacao=nivel_otimizacao)
+        if compilacao.erro:
+            raise Exception(compilacao.erro)
+        resultado.update(tokens=len(compilacao.tokens), instrucoes_3ac=len(compilacao.codigo_3ac),
+                         instrucoes_otimizadas=len(compilacao.codigo_otimizado))
+        otimizador = next(registro for registro in instrumentacao.fases if registro['fase'] == 'otimizador')
+        # Instruções removidas por passagem do otimizador (diferença de tamanho do código, somada nas voltas)
+        resultado['instrucoes_removidas'] = {nome: -e['delta_instrucoes'] for nome, e in otimizador['passagens'].items()
+                                             if e['execucoes']}
+        resultado.update(nivel_otimizacao=nivel_otimizacao, iteracoes_otimizador=otimizador['iteracoes'],
+                         limite_iteracoes_atingido=otimizador['limite_atingido'],
+                         execucoes_passagens={nome: e['execucoes'] for nome, e in otimizador['passagens'].items()},
+                         chamadas_expandidas=otimizador['chamadas_expandidas'],
+                         expressoes_reaproveitadas=otimizador['expressoes_reaproveitadas'],
+                         invariantes_movidas=otimizador['invariantes_movidas'],
+                         multiplicacoes_reduzidas=otimizador['multiplicacoes_reduzidas'],
+                         lacos_desenrolados=otimizador['lacos_desenrolados'],
+                         regras_peephole=otimizador['regras_peephole'],
+                         temporarios_alocados=otimizador['temporarios_alocados'],
+                         temporarios_derramados=otimizador['temporarios_derramados'])
+
+        if executar:
+            vm = executar_3ac(compilacao.codigo_3ac, instrumentacao, 'execucao')
+            executadas = {'3ac': vm.instrucoes_executadas}
+            try:
+                # O código otimizado não pode executar muito mais que o original; se executar, está errado
+                vm_otimizada = executar_3ac(compilacao.codigo_otimizado, instrumentacao, 'execucao_otimizada',
+                                            limite_instrucoes=10 * vm.instrucoes_executadas + 10_000)
+                executadas['otimizado'] = vm_otimizada.instrucoes_executadas
+                resultado['saida_otimizada_confere'] = vm_otimizada.saida == vm.saida
+                resultado['erro_otimizado'] = None
+            except Exception as e:
+                resultado['saida_otimizada_confere'] = False
+                resultado['erro_otimizado'] = str(e)
+            resultado['instrucoes_executadas'] = executadas
+
+        if not com_memoria:
+            # Uma passagem pode rodar várias vezes na mesma compilação (ponto fixo): soma dentro da repetição
+            tempos_repeticao = {}
+            for registro in instrumentacao.fases:
+                if 'erro' not in registro:
+                    fase = registro['fase']
+                    tempos_repeticao[fase] = tempos_repeticao.get(fase, 0.0) + registro['tempo_s']
+            for fase, tempo in tempos_repeticao.items():
+                tempos[fase] = min(tempos.get(fase, tempo), tempo)
+        resultado['instrumentacao'] = instrumentacao.para_dict()
+    resultado['tempos_s'] = tempos
+    return resultado
+
+
+def _metadados():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+    }
+
+
+def executar_suite(perfis=('pequeno', 'medio', 'grande'), sementes=(0,), repeticoes=3, executar=True,
+                   medir_memoria=False, nivel_otimizacao=2):
+    resultados = []
+    for perfil in perfis:
+        for semente in sementes:
+            codigo = gerar_programa(semente, **PERFIS[perfil])
+            medicao = medir_programa(codigo, repeticoes, executar, medir_memoria, nivel_otimizacao)
+            resultados.append({'perfil': perfil, 'semente': semente, 'parametros': PERFIS[perfil], **medicao})
+    return {'metadados': _metadados(), 'resultados': resultados}
+
+
+def _programas_execucao(perfis, sementes, n_laco):
+    # Exemplos sem erro + laço longo + programas gerados: o conjunto usado para comparar executores
+    programas = [(nome.split(':')[0], codigo) for nome, codigo in entradas_de_exemplo.items()
+                 if not nome.startswith('Erro')]
+    programas.append((f'loopTest({n_laco})', gerar_programa_laco(n_laco)))
+    programas.extend((f'{perfil} #{semente}', gerar_programa(semente, **PERFIS[perfil]))
+                     for perfil in perfis for semente in sementes)
+    return programas
+
+
+def benchmark_transpilador(perfis=('pequeno', 'medio'), sementes=(0, 1, 2), repeticoes=3, n_laco=20_000):
+    # Máquina virtual x código 3AC otimizado transpilado para Python (tempo de execução, melhor de
+    # 'repeticoes'); transpilar e compile() são medidos à parte, na primeira vez (depois o cache responde)
+    resultados = []
+    for nome, codigo in _programas_execucao(perfis, sementes, n_laco):
+        compilacao = compilar(codigo)
+        if compilacao.erro:
+            raise Exception(compilacao.erro)
+        vm = MaquinaVirtual(compilacao.codigo_otimizado)
+        programa = ProgramaPython(compilacao.codigo_otimizado)
+        tempo_vm = tempo_python = float('inf')
+        for _ in range(repeticoes):
+            vm.executar()
+            programa.executar()
+            tempo_vm = min(tempo_vm, vm.tempo_execucao)
+            tempo_python = min(tempo_python, programa.tempo_execucao)
+        resultados.append({
+            'programa': nome,
+            'instrucoes_executadas': vm.instrucoes_executadas,
+            'tempo_vm_s': tempo_vm,
+            'tempo_python_s': tempo_python,
+            'transpilacao_s': programa.tempo_transpilacao,
+            'compilacao_s': programa.tempo_compilacao,
+            'aceleracao': tempo_vm / tempo_python if tempo_python > 0 else 0.0,
+            'funcoes_despacho': len(programa.funcoes_despacho),
+            'saida_confere': programa.saida == vm.saida,
+        })
+    return resultados
+
+
+def benchmark_bytecode(perfis=('pequeno', 'medio'), sementes=(0, 1, 2), repeticoes=3, n_laco=20_000):
+    # Máquina virtual x bytecode compacto, sem e com as superinstruções escolhidas pelo perfil
+    # (tempo de execução, melhor de 'repeticoes'); 'despachos' conta as instruções de bytecode executadas
+    resultados = []
+    for nome, codigo in _programas_execucao(perfis, sementes, n_laco):
+        compilacao = compilar(codigo)
+        if compilacao.erro:
+            raise Exception(compilacao.erro)
+        vm = MaquinaVirtual(compilacao.codigo_otimizado)
+        simples = MaquinaBytecode(compilacao.codigo_otimizado, superinstrucoes=())
+        fundida = MaquinaBytecode(compilacao.codigo_otimizado, superinstrucoes=SUPERINSTRUCOES)
+        tempo_vm = tempo_simples = tempo_fundida = float('inf')
+        for _ in range(repeticoes):
+            vm.executar()
+            simples.executar()
+            fundida.executar()
+            tempo_vm = min(tempo_vm, vm.tempo_execucao)
+            tempo_simples = min(tempo_simples, simples.tempo_execucao)
+            tempo_fundida = min(tempo_fundida, fundida.tempo_execucao)
+        resultados.append({
+            'programa': nome,
+            'instrucoes_executadas': vm.instrucoes_executadas,
+            'tempo_vm_s': tempo_vm,
+            'tempo_bytecode_s': tempo_simples,
+            'tempo_superinstrucoes_s': tempo_fundida,
+            'despachos': simples.despachos,
+            'despachos_superinstrucoes': fundida.despachos,
+            'instrucoes_por_s': vm.instrucoes_executadas / tempo_fundida if tempo_fundida > 0 else 0.0,
+            'aceleracao': tempo_vm / tempo_fundida if tempo_fundida > 0 else 0.0,
+            'saida_confere': simples.saida == vm.saida and fundida.saida == vm.saida,
+        })
+    return resultados
+
+
+def micro_benchmarks():
+    print("Análise semântica x número de declarações")
+    print(f"{'declarações':>12} {'tempo (s)':>10} {'µs/declaração':>14}")
+    for r in benchmark_tabela_simbolos():
+        print(f"{r['declaracoes']:>12} {r['tempo_s']:>10.4f} {r['us_por_declaracao']:>14.2f}")
+
+    print()
+    print("Analisador léxico: lista de Token x FluxoTokens")
+    print(f"{'modo':>15} {'tokens':>9} {'tempo (s)':>10} {'tokens/s':>12} {'memória (MB)':>13} {'bytes/token':>12}")
+    for r in benchmark_lexer():
+        print(f"{r['modo']:>15} {r['tokens']:>9} {r['tempo_s']:>10.4f} {r['tokens_por_s']:>12,.0f} "
+              f"{r['memoria_bytes'] / 2**20:>13.2f} {r['bytes_por_token']:>12.1f}")
+
+    print()
+    print("Análise sintática/semântica com e sem rastreamento da árvore de derivação")
+    print(f"{'rastreamento':>12} {'tokens':>9} {'tempo (s)':>10} {'nós da árvore':>14} {'instruções 3AC':>15}")
+    for r in benchmark_rastreamento():
+        print(f"{str(r['rastreamento']):>12} {r['tokens']:>9} {r['tempo_s']:>10.4f} {r['nos_arvore']:>14} {r['instrucoes_3ac']:>15}")
+
+    print()
+    print("Analisador léxico: arquivo inteiro em memória x streaming (mmap + janela de lookahead)")
+    print(f"{'modo':>10} {'linhas':>7} {'arquivo (MB)':>13} {'tokens':>10} {'pico de memória (MB)':>21}")
+    for r in benchmark_lexer_streaming():
+        print(f"{r['modo']:>10} {r['linhas']:>7} {r['arquivo_mb']:>13.1f} {r['tokens']:>10} "
+              f"{r['pico_memoria_bytes'] / 2**20:>21.2f}")
+    print(f"Streaming x texto inteiro, blocos de 1 byte a 64 KB: {conferir_lexer_streaming()} divergência(s)")
+
+
+
+def relatorio_otimizador():
+    # Para cada exemplo válido: instruções (estáticas) removidas por cada passagem do otimizador, somadas nas
+    # voltas até o ponto fixo, contadores das transformações, regras do peephole e alocação de registradores
+    for nome, codigo in entradas_de_exemplo.items():
+        if nome.startswith('Erro'):
+            continue
+        parser = AnalisadorSemantico(Lexer(codigo).analisar())
+        parser.analisar()
+        otimizador = Otimizador(parser.codigo_3ac, Instrumentacao(), parser.dependencias_funcao)
+        otimizado = otimizador.otimizar()
+        print(f"{nome} ({len(parser.codigo_3ac)} -> {len(otimizado)} instruções)")
+        removidas = ', '.join(f"{nome} {-e['delta_instrucoes']}" for nome, e in otimizador.gerenciador.estatisticas.items()
+                              if e['execucoes'])
+        print(f"  {'Removidas':<10} {removidas} ({otimizador.gerenciador.iteracoes} voltas"
+              f"{', limite atingido' if otimizador.gerenciador.limite_atingido else ''}) | "
+              f"{otimizador.chamadas_expandidas} chamadas expandidas, "
+              f"{otimizador.expressoes_reaproveitadas} subexpressões reaproveitadas, "
+              f"{otimizador.invariantes_movidas} invariantes movidas para fora de laços, "
+              f"{otimizador.multiplicacoes_reduzidas} multiplicações reduzidas, "
+              f"{otimizador.lacos_desenrolados} laços desenrolados")
+        regras = ', '.join(f"{regra} {n}" for regra, n in sorted(otimizador.estatisticas_peephole.items()))
+        print(f"  {'Peephole':<10} {regras or 'nenhuma regra aplicada'}")
+        nomes = sum(f['registradores'] + f['posicoes_quadro'] for f in otimizador.alocacao.values())
+        print(f"  {'Alocação':<10} {otimizador.temporarios_alocados} temporários em {nomes} nomes "
+              f"({otimizador.temporarios_derramados} derramados para o quadro)")
+
+
+if __name__ == '__main__':
+    argumentos = argparse.ArgumentParser(description="Benchmarks das fases do compilador sobre programas gerados.")
+    argumentos.add_argument('--perfis', nargs='+', default=list(PERFIS), choices=list(PERFIS))
+    argumentos.add_argument('--sementes', nargs='+', type=int, default=[0])
+    argumentos.add_argument('--repeticoes', type=int, default=3)
+    argumentos.add_argument('--sem-execucao', action='store_true', help="não executa o código na máquina virtual")
+    argumentos.add_argument('--memoria', action='store_true',
+                            help="inclui o pico de memória de cada fase (execução extra com tracemalloc)")
+    argumentos.add_argument('--nivel', type=int, default=2, choices=(0, 1, 2), help="nível de otimização")
+    argumentos.add_argument('--saida', help="arquivo JSON de resultados (padrão: saída padrão)")
+    argumentos.add_argument('--micro', action='store_true',
+                            help="executa os micro-benchmarks (tabela de símbolos, léxico, rastreamento)")
+    argumentos.add_argument('--transpilador', action='store_true',
+                            help="compara a máquina virtual com o 3AC transpilado para Python")
+    argumentos.add_argument('--otimizador', action='store_true',
+                            help="relatório por exemplo das passagens do otimizador (removidas, peephole, alocação)")
+    argumentos.add_argument('--bytecode', action='store_true',
+                            help="compara a máquina virtual com o bytecode compacto (com e sem superinstruções)")
+    opcoes = argumentos.parse_args()
+
+    if opcoes.micro:
+        micro_benchmarks()
+        sys.exit(0)
+
+    if opcoes.otimizador:
+        relatorio_otimizador()
+        sys.exit(0)
+
+    if opcoes.transpilador:
+        print(f"{'programa':>15} {'executadas':>11} {'VM (s)':>9} {'Python (s)':>11} {'aceleração':>11} "
+              f"{'transpilar (s)':>15} {'compile (s)':>12} {'despacho':>9} {'confere':>8}")
+        for r in benchmark_transpilador(repeticoes=opcoes.repeticoes):
+            print(f"{r['programa']:>15} {r['instrucoes_executadas']:>11} {r['tempo_vm_s']:>9.4f} "
+                  f"{r['tempo_python_s']:>11.4f} {r['aceleracao']:>10.1f}x {r['transpilacao_s']:>15.4f} "
+                  f"{r['compilacao_s']:>12.4f} {r['funcoes_despacho']:>9} {str(r['saida_confere']):>8}")
+        sys.exit(0)
+
+    if opcoes.bytecode:
+        print(f"{'programa':>15} {'executadas':>11} {'VM (s)':>9} {'bytecode (s)':>13} {'super (s)':>10} "
+              f"{'despachos':>10} {'c/ super':>10} {'instr/s':>12} {'aceleração':>11} {'confere':>8}")
+        for r in benchmark_bytecode(repeticoes=opcoes.repeticoes):
+            print(f"{r['programa']:>15} {r['instrucoes_executadas']:>11} {r['tempo_vm_s']:>9.4f} "
+                  f"{r['tempo_bytecode_s']:>13.4f} {r['tempo_superinstrucoes_s']:>10.4f} {r['despachos']:>10} "
+                  f"{r['despachos_superinstrucoes']:>10} {r['instrucoes_por_s']:>12,.0f} "
+                  f"{r['aceleracao']:>10.1f}x {str(r['saida_confere']):>8}")
+        sys.exit(0)
+
+    relatorio = executar_suite(opcoes.perfis, opcoes.sementes, opcoes.repeticoes, not opcoes.sem_execucao,
+                              opcoes.memoria, opcoes.nivel)
+    if opcoes.saida:
+        with open(opcoes.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(relatorio, indent=2, ensure_ascii=False))
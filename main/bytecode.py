@@ -0,0 +1,585 @@
+import time
+from array import array
+from collections import Counter
+from codigo_intermediario import (
+    ler_3ac, OPERACOES, CONSTANTE, TEMPORARIO, VARIAVEL,
+    OP_DECLARE, OP_FUNCAO, OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_IF_FALSE, OP_PARAM,
+    OP_FORMAL, OP_CALL, OP_RETURN, OP_RET, OP_PRINT, OP_HALT, OP_COPIA, OP_BINARIA, OP_UNARIA
+)
+from grafo_fluxo import GrafoFluxo, dividir_funcoes
+from maquina_virtual import formatar_valor
+
+# Opcodes. Os operandos seguem o opcode no mesmo array('i'): posições do quadro da função (locais,
+# temporários e constantes), índices de globais, endereços de desvio e imediatos
+(BC_COPIA, BC_SOMA, BC_SUBTRAI, BC_MULTIPLICA, BC_DIVIDE, BC_RESTO, BC_IGUAL, BC_DIFERENTE, BC_MENOR,
+ BC_MENOR_IGUAL, BC_MAIOR, BC_MAIOR_IGUAL, BC_E, BC_OU, BC_NAO, BC_SE_FALSO, BC_DESVIO, BC_PARAM, BC_CHAMADA,
+ BC_RETORNO, BC_RET, BC_IMPRIME, BC_ZERA, BC_LE_GLOBAL, BC_ESCREVE_GLOBAL, BC_ENTRA, BC_PARA, BC_CONTA,
+ # Superinstruções
+ BC_SE_NAO_IGUAL, BC_SE_NAO_DIFERENTE, BC_SE_NAO_MENOR, BC_SE_NAO_MENOR_IGUAL, BC_SE_NAO_MAIOR,
+ BC_SE_NAO_MAIOR_IGUAL, BC_SOMA_IMEDIATA, BC_CHAMADA_1, BC_CHAMADA_2, BC_CHAMADA_3, BC_CHAMADA_N) = range(39)
+
+BINARIAS = {'+': BC_SOMA, '-': BC_SUBTRAI, '*': BC_MULTIPLICA, '/': BC_DIVIDE, '%': BC_RESTO,
+            '==': BC_IGUAL, '!=': BC_DIFERENTE, '<': BC_MENOR, '<=': BC_MENOR_IGUAL, '>': BC_MAIOR,
+            '>=': BC_MAIOR_IGUAL, '&&': BC_E, '||': BC_OU}
+COMPARA_DESVIA = {'==': BC_SE_NAO_IGUAL, '!=': BC_SE_NAO_DIFERENTE, '<': BC_SE_NAO_MENOR,
+                  '<=': BC_SE_NAO_MENOR_IGUAL, '>': BC_SE_NAO_MAIOR, '>=': BC_SE_NAO_MAIOR_IGUAL}
+CHAMADAS = {1: BC_CHAMADA_1, 2: BC_CHAMADA_2, 3: BC_CHAMADA_3}
+
+# Superinstruções que o despachante conhece: 'desvio <op>' é 't = a <op> b' seguido de 'if_false t';
+# 'soma imediata' é 'x = y + c' ou 'x = y - c' com c inteiro de 32 bits; 'chamada N' são os N 'param'
+# seguidos do 'call' ('chamada n' para 4 ou mais argumentos)
+CANDIDATAS = tuple(f'desvio {oper}' for oper in COMPARA_DESVIA) + (
+    'soma imediata', 'chamada 1', 'chamada 2', 'chamada 3', 'chamada n')
+
+# Escolhidas por escolher_superinstrucoes(medir_perfil(...)) sobre os exemplos e programas gerados
+# (python bytecode.py refaz a medição): as que cobrem ao menos 1% das instruções 3AC executadas
+SUPERINSTRUCOES = ('soma imediata', 'desvio >', 'chamada 1', 'chamada 3', 'chamada 2')
+
+
+def imediato(operando):
+    return (operando.classe == CONSTANTE and type(operando.valor) is int
+            and -2 ** 31 < operando.valor < 2 ** 31)
+
+
+def superinstrucao(trecho, i, formais):
+    # Superinstrução candidata que começa em trecho[i]: (nome, número de instruções 3AC) ou None.
+    # 'formais' dá o número de formais de cada função (a chamada fundida preenche o quadro direto)
+    instrucao = trecho[i]
+    op = instrucao.op
+    if op == OP_BINARIA:
+        if instrucao.oper in COMPARA_DESVIA and i + 1 < len(trecho):
+            # Só com temporário: uma global teria de ser escrita de volta antes do desvio
+            seguinte = trecho[i + 1]
+            if seguinte.op == OP_IF_FALSE and instrucao.dest.classe == TEMPORARIO and seguinte.a == instrucao.dest:
+                return f'desvio {instrucao.oper}', 2
+        if instrucao.oper in ('+', '-'):
+            if imediato(instrucao.b) and instrucao.a.classe != CONSTANTE:
+                return 'soma imediata', 1
+            if instrucao.oper == '+' and imediato(instrucao.a) and instrucao.b.classe != CONSTANTE:
+                return 'soma imediata', 1
+    elif op == OP_PARAM:
+        j = i
+        while j < len(trecho) and trecho[j].op == OP_PARAM:
+            j += 1
+        if j < len(trecho) and trecho[j].op == OP_CALL:
+            n = trecho[j].b.valor
+            if n == j - i and formais.get(trecho[j].a.valor) == n:
+                return f"chamada {n if n in CHAMADAS else 'n'}", n + 1
+    return None
+
+
+def tipo_instrucao(instrucao):
+    # Nome do tipo de instrução usado no perfil de pares
+    op = instrucao.op
+    if op == OP_BINARIA:
+        return f'binaria {instrucao.oper}'
+    if op == OP_COPIA and instrucao.a.classe == CONSTANTE:
+        return 'copia constante'
+    return op
+
+
+class Bytecode:
+    # Carrega o 3AC em um bytecode compacto: um único array('i') com opcodes e operandos, um pool de
+    # constantes e, para cada trecho (o código antes da primeira função, se houver, e cada função), a
+    # lista modelo do quadro, copiada a cada chamada: formais nas primeiras posições, depois
+    # locais e temporários e as constantes do trecho, já com seus valores. Uma global lida ou escrita
+    # ganha uma posição no quadro, carregada por BC_LE_GLOBAL antes da instrução e devolvida por
+    # BC_ESCREVE_GLOBAL depois, assim todas as outras instruções só endereçam o quadro.
+    # As superinstruções pedidas em 'superinstrucoes' (nomes de CANDIDATAS) substituem suas sequências.
+    # Com contar_blocos=True cada bloco básico começa com BC_CONTA (ver perfil_execucao).
+    def __init__(self, codigo_3ac, superinstrucoes=SUPERINSTRUCOES, contar_blocos=False):
+        if codigo_3ac and isinstance(codigo_3ac[0], str):
+            codigo_3ac = ler_3ac(codigo_3ac)
+        self.superinstrucoes = frozenset(superinstrucoes)
+        for nome in self.superinstrucoes:
+            if nome not in CANDIDATAS:
+                raise Exception(f"Erro de carga: superinstrução desconhecida '{nome}'.")
+        self.codigo = array('i')
+        self.constantes = []
+        self.globais = []
+        self.nomes = []
+        self.modelos = []
+        self.entradas = array('i')
+        self.formais = array('i')
+        self.rotulos = {}
+        self.blocos = []
+        self.usos = Counter()
+        self._indice_constantes = {}
+        self._indice_globais = {}
+        self._indice_funcoes = {}
+        self._desvios = []
+        self._chamadas = []
+        self._carregar(codigo_3ac, contar_blocos)
+
+    def _constante(self, valor):
+        chave = (type(valor), valor)
+        if chave not in self._indice_constantes:
+            self._indice_constantes[chave] = len(self.constantes)
+            self.constantes.append(valor)
+        return self._indice_constantes[chave]
+
+    def _global(self, nome):
+        if nome not in self._indice_globais:
+            self._indice_globais[nome] = len(self.globais)
+            self.globais.append(nome)
+        return self._indice_globais[nome]
+
+    def _carregar(self, codigo_3ac, contar_blocos):
+        # A execução começa no pc 0 com o quadro do primeiro trecho
+        trechos = dividir_funcoes(codigo_3ac) or [(None, 0, 0)]
+        formais = {}
+        for indice, (nome, inicio, fim) in enumerate(trechos):
+            self.nomes.append(nome)
+            if nome is not None:
+                self._indice_funcoes[nome] = indice
+                formais[nome] = sum(1 for i in codigo_3ac[inicio:fim] if i.op == OP_FORMAL)
+            self.formais.append(formais.get(nome, 0))
+            self.entradas.append(0)
+        for indice, (nome, inicio, fim) in enumerate(trechos):
+            _Trecho(self, indice, codigo_3ac[inicio:fim], formais, contar_blocos).emitir()
+        self.codigo.append(BC_PARA)
+
+        for posicao, nome, trecho in self._desvios:
+            if nome not in self.rotulos:
+                raise Exception(f"Erro de carga: rótulo '{nome}' não encontrado.")
+            destino, trecho_destino = self.rotulos[nome]
+            if trecho_destino != trecho:
+                raise Exception(f"Erro de carga: desvio para o rótulo '{nome}', fora da função.")
+            self.codigo[posicao] = destino
+        for posicao, nome in self._chamadas:
+            if nome not in self._indice_funcoes:
+                raise Exception(f"Erro de carga: função '{nome}' não encontrada no código 3AC.")
+            indice = self._indice_funcoes[nome]
+            self.codigo[posicao] = indice
+            self.codigo[posicao + 1] = self.entradas[indice]
+
+
+class _Trecho:
+    # Tradução de um trecho (função) do 3AC para o bytecode
+    def __init__(self, bytecode, indice, trecho, formais, contar_blocos):
+        self.bytecode = bytecode
+        self.indice = indice
+        self.trecho = trecho
+        self.formais = formais
+        self.contar_blocos = contar_blocos
+        self.posicoes = {}
+        self.modelo = []
+        self.locais = set()
+        self.antes = []
+        self.depois = []
+        # Formais primeiro, na ordem: a chamada copia os argumentos para as posições 0..n-1
+        for instrucao in trecho:
+            if instrucao.op == OP_FORMAL:
+                self._posicao(('l', instrucao.dest.valor))
+
+    def _posicao(self, chave, valor=None):
+        posicao = self.posicoes.get(chave)
+        if posicao is None:
+            posicao = self.posicoes[chave] = len(self.modelo)
+            self.modelo.append(valor)
+        return posicao
+
+    def _le(self, operando):
+        if operando.classe == CONSTANTE:
+            indice = self.bytecode._constante(operando.valor)
+            return self._posicao(('c', indice), self.bytecode.constantes[indice])
+        if operando.classe == VARIAVEL and operando.valor not in self.locais:
+            # Mesma regra da máquina virtual: sem 'formal'/'declare' antes, na função, é global
+            posicao = self._posicao(('g', operando.valor))
+            instrucao = (BC_LE_GLOBAL, posicao, self.bytecode._global(operando.valor))
+            if instrucao not in self.antes:
+                self.antes.append(instrucao)
+            return posicao
+        return self._posicao(('l', operando.valor))
+
+    def _escreve(self, operando):
+        if operando.classe == VARIAVEL and operando.valor not in self.locais:
+            posicao = self._posicao(('g', operando.valor))
+            self.depois.append((BC_ESCREVE_GLOBAL, self.bytecode._global(operando.valor), posicao))
+            return posicao
+        return self._posicao(('l', operando.valor))
+
+    def _emitir(self, *instrucao):
+        codigo = self.bytecode.codigo
+        for carga in self.antes:
+            codigo.extend(carga)
+        self.antes = []
+        inicio = len(codigo)
+        codigo.extend(instrucao)
+        for escrita in self.depois:
+            codigo.extend(escrita)
+        self.depois = []
+        return inicio
+
+    def _desvio(self, inicio, deslocamento, nome):
+        self.bytecode._desvios.append((inicio + deslocamento, nome, self.indice))
+
+    def emitir(self):
+        bytecode = self.bytecode
+        trecho = self.trecho
+        lideres = set()
+        if self.contar_blocos and trecho:
+            grafo = GrafoFluxo(trecho)
+            lideres = set(grafo.inicios)
+            for b in range(len(grafo)):
+                bytecode.blocos.append((self.indice, grafo.inicios[b], grafo.fins[b], trecho))
+            contador = len(bytecode.blocos) - len(grafo)
+        i = 0
+        while i < len(trecho):
+            instrucao = trecho[i]
+            op = instrucao.op
+            if op == OP_FUNCAO or op == OP_ROTULO:
+                bytecode.rotulos[instrucao.a.valor] = (len(bytecode.codigo), self.indice)
+                if op == OP_FUNCAO:
+                    bytecode.entradas[self.indice] = len(bytecode.codigo)
+            if i in lideres:
+                bytecode.codigo.extend((BC_CONTA, contador))
+                contador += 1
+            if op == OP_FUNCAO or op == OP_ROTULO:
+                i += 1
+                continue
+            candidata = superinstrucao(trecho, i, self.formais)
+            if candidata is not None and candidata[0] in bytecode.superinstrucoes:
+                self._superinstrucao(i, *candidata)
+                bytecode.usos[candidata[0]] += 1
+                i += candidata[1]
+                continue
+            self._instrucao(instrucao)
+            i += 1
+        bytecode.modelos.append(self.modelo)
+
+    def _superinstrucao(self, i, nome, tamanho):
+        instrucao = self.trecho[i]
+        if nome.startswith('desvio'):
+            a, b = self._le(instrucao.a), self._le(instrucao.b)
+            inicio = self._emitir(COMPARA_DESVIA[instrucao.oper], self._escreve(instrucao.dest), a, b, 0)
+            self._desvio(inicio, 4, self.trecho[i + 1].b.valor)
+        elif nome == 'soma imediata':
+            if imediato(instrucao.b):
+                outro, valor = instrucao.a, instrucao.b.valor if instrucao.oper == '+' else -instrucao.b.valor
+            else:
+                outro, valor = instrucao.b, instrucao.a.valor
+            origem = self._le(outro)
+            self._emitir(BC_SOMA_IMEDIATA, self._escreve(instrucao.dest), origem, valor)
+        else:
+            chamada = self.trecho[i + tamanho - 1]
+            argumentos = [self._le(p.a) for p in self.trecho[i:i + tamanho - 1]]
+            destino = self._escreve(chamada.dest) if chamada.dest is not None else -1
+            n = tamanho - 1
+            if n in CHAMADAS:
+                inicio = self._emitir(CHAMADAS[n], destino, 0, 0, *argumentos)
+            else:
+                inicio = self._emitir(BC_CHAMADA_N, destino, 0, 0, n, *argumentos)
+            self.bytecode._chamadas.append((inicio + 2, chamada.a.valor))
+
+    def _instrucao(self, instrucao):
+        op = instrucao.op
+        if op == OP_COPIA:
+            origem = self._le(instrucao.a)
+            self._emitir(BC_COPIA, self._escreve(instrucao.dest), origem)
+        elif op == OP_BINARIA:
+            a, b = self._le(instrucao.a), self._le(instrucao.b)
+            self._emitir(BINARIAS[instrucao.oper], self._escreve(instrucao.dest), a, b)
+        elif op == OP_UNARIA:
+            origem = self._le(instrucao.a)
+            self._emitir(BC_NAO, self._escreve(instrucao.dest), origem)
+        elif op == OP_IF_FALSE:
+            inicio = self._emitir(BC_SE_FALSO, self._le(instrucao.a), 0)
+            self._desvio(inicio, 2, instrucao.b.valor)
+        elif op == OP_GOTO:
+            nome = instrucao.a.valor
+            if self.bytecode.nomes[self.indice] is None and nome in self.bytecode._indice_funcoes:
+                # 'goto main' do início: entra na função com um quadro novo
+                inicio = self._emitir(BC_ENTRA, 0, 0)
+                self.bytecode._chamadas.append((inicio + 1, nome))
+            else:
+                inicio = self._emitir(BC_DESVIO, 0)
+                self._desvio(inicio, 1, nome)
+        elif op == OP_PARAM:
+            self._emitir(BC_PARAM, self._le(instrucao.a))
+        elif op == OP_CALL:
+            destino = self._escreve(instrucao.dest) if instrucao.dest is not None else -1
+            inicio = self._emitir(BC_CHAMADA, destino, 0, 0, instrucao.b.valor)
+            self.bytecode._chamadas.append((inicio + 2, instrucao.a.valor))
+        elif op == OP_RETURN:
+            self._emitir(BC_RETORNO, self._le(instrucao.a))
+        elif op == OP_RET:
+            self._emitir(BC_RET)
+        elif op == OP_PRINT:
+            self._emitir(BC_IMPRIME, self._le(instrucao.a))
+        elif op == OP_FORMAL:
+            self.locais.add(instrucao.dest.valor)
+        elif op == OP_DECLARE:
+            if self.bytecode.nomes[self.indice] is not None:
+                self.locais.add(instrucao.dest.valor)
+            self._emitir(BC_ZERA, self._escreve(instrucao.dest))
+        elif op == OP_PUSH_STACK or op == OP_POP_STACK:
+            pass
+        elif op == OP_HALT:
+            self._emitir(BC_PARA)
+        else:
+            raise Exception(f"Erro de carga: instrução 3AC inválida '{instrucao}'.")
+
+
+class MaquinaBytecode:
+    # Despachante do Bytecode: uma cadeia de if/elif sobre o opcode, com as instruções mais executadas
+    # primeiro. O quadro de cada chamada é uma cópia da lista modelo da função. Uma posição nunca escrita
+    # vale None: ler uma delas em uma operação vira o erro de variável sem valor da máquina virtual.
+    def __init__(self, codigo_3ac, superinstrucoes=SUPERINSTRUCOES):
+        if isinstance(codigo_3ac, list):
+            self.bytecode = Bytecode(codigo_3ac, superinstrucoes)
+        else:
+            # Bytecode já carregado (também o de um artefato, ver ir_binario.py)
+            self.bytecode = codigo_3ac
+        self.saida = []
+        self.contagem = [0] * len(self.bytecode.blocos)
+        self.despachos = 0
+        self.tempo_execucao = 0.0
+
+    def executar(self, limite_despachos=None):
+        bytecode = self.bytecode
+        c = bytecode.codigo.tolist()
+        modelos = bytecode.modelos
+        entradas = bytecode.entradas
+        formais = bytecode.formais
+        dividir = OPERACOES['/']
+        resto = OPERACOES['%']
+        g = [0] * len(bytecode.globais)
+        q = modelos[0][:]
+        argumentos = []
+        pilha = []
+        saida = []
+        contagem = self.contagem = [0] * len(bytecode.blocos)
+        limite = limite_despachos if limite_despachos is not None else -1
+        despachos = 0
+        pc = 0
+        inicio = time.perf_counter()
+        try:
+            while True:
+                if despachos == limite:
+                    raise Exception(f"Erro de execução: limite de {limite} instruções atingido.")
+                despachos += 1
+                op = c[pc]
+                if op == BC_COPIA:
+                    q[c[pc + 1]] = q[c[pc + 2]]
+                    pc += 3
+                elif op == BC_SOMA_IMEDIATA:
+                    q[c[pc + 1]] = q[c[pc + 2]] + c[pc + 3]
+                    pc += 4
+                elif op == BC_SE_NAO_MENOR:
+                    r = q[c[pc + 1]] = q[c[pc + 2]] < q[c[pc + 3]]
+                    pc = pc + 5 if r else c[pc + 4]
+                elif op == BC_SE_NAO_MAIOR:
+                    r = q[c[pc + 1]] = q[c[pc + 2]] > q[c[pc + 3]]
+                    pc = pc + 5 if r else c[pc + 4]
+                elif op == BC_SOMA:
+                    q[c[pc + 1]] = q[c[pc + 2]] + q[c[pc + 3]]
+                    pc += 4
+                elif op == BC_MULTIPLICA:
+                    q[c[pc + 1]] = q[c[pc + 2]] * q[c[pc + 3]]
+                    pc += 4
+                elif op == BC_SUBTRAI:
+                    q[c[pc + 1]] = q[c[pc + 2]] - q[c[pc + 3]]
+                    pc += 4
+                elif op == BC_DESVIO:
+                    pc = c[pc + 1]
+                elif op == BC_RESTO:
+                    q[c[pc + 1]] = resto(q[c[pc + 2]], q[c[pc + 3]])
+                    pc += 4
+                elif op == BC_LE_GLOBAL:
+                    q[c[pc + 1]] = g[c[pc + 2]]
+                    pc += 3
+                elif op == BC_ESCREVE_GLOBAL:
+                    g[c[pc + 1]] = q[c[pc + 2]]
+                    pc += 3
+                elif op == BC_SE_NAO_MENOR_IGUAL:
+                    r = q[c[pc + 1]] = q[c[pc + 2]] <= q[c[pc + 3]]
+                    pc = pc + 5 if r else c[pc + 4]
+                elif op == BC_SE_NAO_MAIOR_IGUAL:
+                    r = q[c[pc + 1]] = q[c[pc + 2]] >= q[c[pc + 3]]
+                    pc = pc + 5 if r else c[pc + 4]
+                elif op == BC_SE_NAO_IGUAL:
+                    r = q[c[pc + 1]] = q[c[pc + 2]] == q[c[pc + 3]]
+                    pc = pc + 5 if r else c[pc + 4]
+                elif op == BC_SE_NAO_DIFERENTE:
+                    r = q[c[pc + 1]] = q[c[pc + 2]] != q[c[pc + 3]]
+                    pc = pc + 5 if r else c[pc + 4]
+                elif op == BC_SE_FALSO:
+                    pc = pc + 3 if q[c[pc + 1]] else c[pc + 2]
+                elif op == BC_CHAMADA_1:
+                    novo = modelos[c[pc + 2]][:]
+                    novo[0] = q[c[pc + 4]]
+                    pilha.append((pc + 5, q, c[pc + 1]))
+                    q = novo
+                    pc = c[pc + 3]
+                elif op == BC_RETORNO:
+                    r = q[c[pc + 1]]
+                    if not pilha:
+                        break
+                    pc, q, d = pilha.pop()
+                    if d >= 0:
+                        q[d] = r
+                elif op == BC_CHAMADA_2:
+                    novo = modelos[c[pc + 2]][:]
+                    novo[0] = q[c[pc + 4]]
+                    novo[1] = q[c[pc + 5]]
+                    pilha.append((pc + 6, q, c[pc + 1]))
+                    q = novo
+                    pc = c[pc + 3]
+                elif op == BC_CHAMADA_3:
+                    novo = modelos[c[pc + 2]][:]
+                    novo[0] = q[c[pc + 4]]
+                    novo[1] = q[c[pc + 5]]
+                    novo[2] = q[c[pc + 6]]
+                    pilha.append((pc + 7, q, c[pc + 1]))
+                    q = novo
+                    pc = c[pc + 3]
+                elif op == BC_CHAMADA_N:
+                    n = c[pc + 4]
+                    novo = modelos[c[pc + 2]][:]
+                    novo[:n] = [q[x] for x in c[pc + 5:pc + 5 + n]]
+                    pilha.append((pc + 5 + n, q, c[pc + 1]))
+                    q = novo
+                    pc = c[pc + 3]
+                elif op == BC_MENOR:
+                    q[c[pc + 1]] = q[c[pc + 2]] < q[c[pc + 3]]
+                    pc += 4
+                elif op == BC_MENOR_IGUAL:
+                    q[c[pc + 1]] = q[c[pc + 2]] <= q[c[pc + 3]]
+                    pc += 4
+                elif op == BC_MAIOR:
+                    q[c[pc + 1]] = q[c[pc + 2]] > q[c[pc + 3]]
+                    pc += 4
+                elif op == BC_MAIOR_IGUAL:
+                    q[c[pc + 1]] = q[c[pc + 2]] >= q[c[pc + 3]]
+                    pc += 4
+                elif op == BC_IGUAL:
+                    q[c[pc + 1]] = q[c[pc + 2]] == q[c[pc + 3]]
+                    pc += 4
+                elif op == BC_DIFERENTE:
+                    q[c[pc + 1]] = q[c[pc + 2]] != q[c[pc + 3]]
+                    pc += 4
+                elif op == BC_DIVIDE:
+                    q[c[pc + 1]] = dividir(q[c[pc + 2]], q[c[pc + 3]])
+                    pc += 4
+                elif op == BC_E:
+                    q[c[pc + 1]] = bool(q[c[pc + 2]] and q[c[pc + 3]])
+                    pc += 4
+                elif op == BC_OU:
+                    q[c[pc + 1]] = bool(q[c[pc + 2]] or q[c[pc + 3]])
+                    pc += 4
+                elif op == BC_NAO:
+                    q[c[pc + 1]] = not q[c[pc + 2]]
+                    pc += 3
+                elif op == BC_PARAM:
+                    argumentos.append(q[c[pc + 1]])
+                    pc += 2
+                elif op == BC_CHAMADA:
+                    n = c[pc + 4]
+                    funcao = c[pc + 2]
+                    novo = modelos[funcao][:]
+                    k = min(n, formais[funcao])
+                    novo[:k] = argumentos[len(argumentos) - n:len(argumentos) - n + k]
+                    del argumentos[len(argumentos) - n:]
+                    pilha.append((pc + 5, q, c[pc + 1]))
+                    q = novo
+                    pc = c[pc + 3]
+                elif op == BC_IMPRIME:
+                    saida.append(formatar_valor(q[c[pc + 1]]))
+                    pc += 2
+                elif op == BC_RET:
+                    if not pilha:
+                        break
+                    pc, q, d = pilha.pop()
+                    if d >= 0:
+                        q[d] = None
+                elif op == BC_ZERA:
+                    q[c[pc + 1]] = 0
+                    pc += 2
+                elif op == BC_CONTA:
+                    contagem[c[pc + 1]] += 1
+                    pc += 2
+                elif op == BC_ENTRA:
+                    q = modelos[c[pc + 1]][:]
+                    pc = entradas[c[pc + 1]]
+                elif op == BC_PARA:
+                    break
+                else:
+                    raise Exception(f"Erro de execução: opcode {op} inválido na posição {pc}.")
+        except TypeError as e:
+            if 'NoneType' not in str(e):
+                raise
+            raise Exception("Erro de execução: variável usada antes de receber valor.")
+        finally:
+            self.tempo_execucao = time.perf_counter() - inicio
+            self.despachos = despachos
+            self.saida = saida
+        return saida
+
+
+def perfil_execucao(codigo_3ac):
+    # Executa o 3AC sem superinstruções, contando as entradas em cada bloco básico; como um bloco roda
+    # inteiro, daí saem as frequências dinâmicas de cada instrução, de cada par de instruções vizinhas e
+    # de cada superinstrução candidata (em instruções 3AC cobertas)
+    bytecode = Bytecode(codigo_3ac, superinstrucoes=(), contar_blocos=True)
+    maquina = MaquinaBytecode(bytecode)
+    maquina.executar()
+    formais = {nome: n for nome, n in zip(bytecode.nomes, bytecode.formais) if nome is not None}
+    perfil = {'instrucoes': 0, 'pares': Counter(), 'superinstrucoes': Counter()}
+    for (_, inicio, fim, trecho), vezes in zip(bytecode.blocos, maquina.contagem):
+        if not vezes:
+            continue
+        executadas = [i for i in range(inicio, fim) if trecho[i].op not in (OP_FUNCAO, OP_ROTULO)]
+        perfil['instrucoes'] += vezes * len(executadas)
+        for i, j in zip(executadas, executadas[1:]):
+            perfil['pares'][(tipo_instrucao(trecho[i]), tipo_instrucao(trecho[j]))] += vezes
+        i = inicio
+        while i < fim:
+            candidata = superinstrucao(trecho, i, formais)
+            if candidata is not None and i + candidata[1] <= fim:
+                perfil['superinstrucoes'][candidata[0]] += vezes * candidata[1]
+                i += candidata[1]
+            else:
+                i += 1
+    return perfil
+
+
+def medir_perfil(programas, nivel_otimizacao=2):
+    from compilador import compilar
+    total = {'instrucoes': 0, 'pares': Counter(), 'superinstrucoes': Counter()}
+    for codigo in programas:
+        compilacao = compilar(codigo, nivel_otimizacao=nivel_otimizacao)
+        if compilacao.erro:
+            raise Exception(compilacao.erro)
+        perfil = perfil_execucao(compilacao.codigo_otimizado)
+        total['instrucoes'] += perfil['instrucoes']
+        total['pares'].update(perfil['pares'])
+        total['superinstrucoes'].update(perfil['superinstrucoes'])
+    return total
+
+
+def escolher_superinstrucoes(perfil, limiar=0.01):
+    # Candidatas que cobrem ao menos 'limiar' das instruções 3AC executadas, da mais para a menos frequente
+    total = perfil['instrucoes'] or 1
+    return tuple(nome for nome, cobertas in perfil['superinstrucoes'].most_common() if cobertas / total >= limiar)
+
+
+if __name__ == '__main__':
+    import sys
+    from entradas_de_exemplo import entradas_de_exemplo
+    from gerador_de_programas import gerar_programa
+
+    # Perfil de frequências dos exemplos e de programas gerados e as superinstruções que ele escolhe
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    programas = [codigo for nome, codigo in entradas_de_exemplo.items() if not nome.startswith('Erro')]
+    programas.extend(gerar_programa(semente, funcoes=8, profundidade=3) for semente in range(quantidade))
+    perfil = medir_perfil(programas)
+    total = perfil['instrucoes']
+    print(f"{total} instruções 3AC executadas em {len(programas)} programas")
+    print("Pares de instruções vizinhas mais frequentes:")
+    for (primeira, segunda), vezes in perfil['pares'].most_common(12):
+        print(f"  {primeira:>16} -> {segunda:<16} {vezes / total:>7.2%}")
+    print("Superinstruções candidatas (instruções 3AC cobertas):")
+    for nome in CANDIDATAS:
+        print(f"  {nome:<14} {perfil['superinstrucoes'][nome] / total:>7.2%}")
+    print(f"Escolhidas: {escolher_superinstrucoes(perfil)}")
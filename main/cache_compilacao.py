@@ -0,0 +1,122 @@
+import os
+import sys
+import pickle
+import hashlib
+import tempfile
+from collections import OrderedDict
+from compilador import compilar
+from analisador_lexico import ler_blocos
+from instrumentacao import Instrumentacao
+
+
+def versao_compilador():
+    # Hash de todos os módulos .py da pasta do compilador: qualquer mudança em um deles muda a versão e, com
+    # ela, todas as chaves do cache. A lista sai da própria pasta, assim um módulo novo nunca fica de fora
+    # (mudar um módulo que não participa da compilação só custa uma recompilação)
+    resumo = hashlib.sha256(f"python {sys.version_info[0]}.{sys.version_info[1]}".encode())
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    for nome in sorted(os.listdir(pasta)):
+        if not nome.endswith('.py'):
+            continue
+        with open(os.path.join(pasta, nome), 'rb') as arquivo:
+            resumo.update(nome.encode())
+            resumo.update(arquivo.read())
+    return resumo.hexdigest()[:16]
+
+
+class CacheCompilacao:
+    # Camada em memória (LRU com 'capacidade' entradas) e, se 'diretorio' for informado, uma camada em
+    # disco com um pickle por chave. As Compilacao devolvidas são compartilhadas: não devem ser alteradas.
+    def __init__(self, capacidade=128, diretorio=None, versao=None):
+        self.capacidade = capacidade
+        self.diretorio = diretorio
+        self.versao = versao or versao_compilador()
+        self.memoria = OrderedDict()
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.faltas = 0
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+
+    def chave(self, codigo, **opcoes):
+        return self._chave((codigo,), opcoes)
+
+    def chave_arquivo(self, caminho, **opcoes):
+        # Mesma chave do texto do arquivo, calculada bloco a bloco sem carregar o arquivo inteiro
+        return self._chave(ler_blocos(caminho), opcoes)
+
+    def _chave(self, blocos, opcoes):
+        resumo = hashlib.sha256(self.versao.encode())
+        resumo.update(repr(sorted(opcoes.items())).encode())
+        resumo.update(b'\0')
+        for bloco in blocos:
+            resumo.update(bloco.encode('utf-8'))
+        return resumo.hexdigest()
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + '.pickle')
+
+    def _guardar_memoria(self, chave, compilacao):
+        self.memoria[chave] = compilacao
+        self.memoria.move_to_end(chave)
+        while len(self.memoria) > self.capacidade:
+            self.memoria.popitem(last=False)
+
+    def obter(self, chave):
+        compilacao = self.memoria.get(chave)
+        if compilacao is not None:
+            self.memoria.move_to_end(chave)
+            self.acertos_memoria += 1
+            return compilacao, 'memoria'
+        if self.diretorio:
+            try:
+                with open(self._caminho(chave), 'rb') as arquivo:
+                    compilacao = pickle.load(arquivo)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                # Entrada corrompida ou de outra versão do Python: descarta e recompila
+                try:
+                    os.unlink(self._caminho(chave))
+                except OSError:
+                    pass
+            else:
+                self._guardar_memoria(chave, compilacao)
+                self.acertos_disco += 1
+                return compilacao, 'disco'
+        self.faltas += 1
+        return None, None
+
+    def guardar(self, chave, compilacao):
+        self._guardar_memoria(chave, compilacao)
+        if self.diretorio:
+            # Escreve em um arquivo temporário e renomeia, para que processos concorrentes nunca leiam pela metade
+            descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+            try:
+                with os.fdopen(descritor, 'wb') as arquivo:
+                    pickle.dump(compilacao, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporario, self._caminho(chave))
+            except BaseException:
+                os.unlink(temporario)
+                raise
+
+    def compilar(self, codigo=None, instrumentacao=None, caminho=None, **opcoes):
+        # Como compilar(): o código vem como texto ou, em 'caminho', de um arquivo
+        instrumentacao = instrumentacao if instrumentacao is not None else Instrumentacao()
+        with instrumentacao.fase('cache') as registro:
+            chave = self.chave(codigo, **opcoes) if codigo is not None else self.chave_arquivo(caminho, **opcoes)
+            compilacao, origem = self.obter(chave)
+            registro['acerto'] = origem
+        if compilacao is None:
+            compilacao = compilar(codigo, instrumentacao, caminho=caminho, **opcoes)
+            with instrumentacao.fase('cache.guardar'):
+                self.guardar(chave, compilacao.formatar())
+        return compilacao
+
+    def estatisticas(self):
+        return {
+            'acertos_memoria': self.acertos_memoria,
+            'acertos_disco': self.acertos_disco,
+            'faltas': self.faltas,
+            'entradas_memoria': len(self.memoria),
+        }
@@ -0,0 +1,284 @@
+import re
+import operator
+
+# Classes de operando, decididas uma única vez no momento da geração do código
+CONSTANTE, TEMPORARIO, VARIAVEL, ROTULO, FUNCAO = range(5)
+NOMES_CLASSES = ('constante', 'temporario', 'variavel', 'rotulo', 'funcao')
+
+# Códigos de operação do 3AC
+OP_DECLARE = 'declare'
+OP_FUNCAO = 'funcao'
+OP_ROTULO = 'rotulo'
+OP_PUSH_STACK = 'push_stack'
+OP_POP_STACK = 'pop_stack'
+OP_GOTO = 'goto'
+OP_IF_FALSE = 'if_false'
+OP_PARAM = 'param'
+OP_FORMAL = 'formal'
+OP_CALL = 'call'
+OP_RETURN = 'return'
+OP_RET = 'ret'
+OP_PRINT = 'print'
+OP_HALT = 'halt'
+OP_COPIA = 'copia'
+OP_BINARIA = 'binaria'
+OP_UNARIA = 'unaria'
+
+OPS_COM_ATRIBUICAO = frozenset({OP_COPIA, OP_BINARIA, OP_UNARIA})
+
+PADRAO_PARTES = re.compile(r'"[^"]*"|[^\s,]+')
+PADRAO_NUMERO = re.compile(r'-?\d+(\.\d+)?([eE][-+]?\d+)?$')
+PADRAO_TEMPORARIO = re.compile(r't\d+$')
+ROTULO_INTERNO = re.compile(r'L\d+$')
+
+
+def _divisao(a, b):
+    if b == 0:
+        raise Exception("Erro de execução: divisão por zero.")
+    if isinstance(a, int) and isinstance(b, int):
+        # Divisão inteira do C: trunca em direção ao zero
+        q = abs(a) // abs(b)
+        return q if (a < 0) == (b < 0) else -q
+    return a / b
+
+
+def _resto(a, b):
+    if b == 0:
+        raise Exception("Erro de execução: divisão por zero.")
+    return a - b * _divisao(a, b)
+
+
+OPERACOES = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': _divisao,
+    '%': _resto,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '&&': lambda a, b: bool(a and b),
+    '||': lambda a, b: bool(a or b),
+}
+
+
+def formatar_constante(valor):
+    if isinstance(valor, bool):
+        return 'true' if valor else 'false'
+    if isinstance(valor, str):
+        return f'"{valor}"'
+    return str(valor)
+
+
+def converter_constante(texto):
+    if texto == 'true':
+        return True
+    if texto == 'false':
+        return False
+    if texto.startswith('"'):
+        return texto[1:-1]
+    if PADRAO_NUMERO.match(texto):
+        if '.' in texto or 'e' in texto or 'E' in texto:
+            return float(texto)
+        return int(texto)
+    return None
+
+
+class Operando:
+    __slots__ = ('classe', 'valor')
+
+    def __init__(self, classe, valor):
+        self.classe = classe
+        self.valor = valor
+
+    def __eq__(self, outro):
+        return (isinstance(outro, Operando) and self.classe == outro.classe
+                and self.valor == outro.valor and type(self.valor) is type(outro.valor))
+
+    def __hash__(self):
+        return hash((self.classe, self.valor))
+
+    def __str__(self):
+        if self.classe == CONSTANTE:
+            return formatar_constante(self.valor)
+        return self.valor
+
+    def __repr__(self):
+        return f"Operando({NOMES_CLASSES[self.classe]}, {self.valor!r})"
+
+
+def constante(valor):
+    return Operando(CONSTANTE, valor)
+
+
+def temporario(nome):
+    return Operando(TEMPORARIO, nome)
+
+
+def variavel(nome):
+    return Operando(VARIAVEL, nome)
+
+
+def rotulo(nome):
+    return Operando(ROTULO, nome)
+
+
+def funcao(nome):
+    return Operando(FUNCAO, nome)
+
+
+class Instrucao:
+    __slots__ = ('op', 'dest', 'a', 'b', 'oper')
+
+    def __init__(self, op, dest=None, a=None, b=None, oper=None):
+        self.op = op
+        self.dest = dest
+        self.a = a
+        self.b = b
+        self.oper = oper
+
+    def usos(self):
+        # Operandos lidos pela instrução (somente temporários e variáveis)
+        op = self.op
+        if op == OP_BINARIA:
+            return [o for o in (self.a, self.b) if o.classe == TEMPORARIO or o.classe == VARIAVEL]
+        if op in (OP_COPIA, OP_UNARIA, OP_IF_FALSE, OP_PARAM, OP_RETURN, OP_PRINT):
+            if self.a.classe == TEMPORARIO or self.a.classe == VARIAVEL:
+                return [self.a]
+        return []
+
+    def __str__(self):
+        op = self.op
+        if op == OP_BINARIA:
+            return f"{self.dest} = {self.a} {self.oper} {self.b}"
+        if op == OP_COPIA:
+            return f"{self.dest} = {self.a}"
+        if op == OP_UNARIA:
+            return f"{self.dest} = {self.oper}{self.a}"
+        if op == OP_FUNCAO or op == OP_ROTULO:
+            return f"{self.a}:"
+        if op == OP_IF_FALSE:
+            return f"if_false {self.a} goto {self.b}"
+        if op == OP_CALL:
+            if self.dest is not None:
+                return f"{self.dest} = call {self.a}, {self.b}"
+            return f"call {self.a}, {self.b}"
+        if op == OP_DECLARE:
+            return f"declare {self.dest}, {self.oper}"
+        if op == OP_FORMAL:
+            return f"param {self.dest}"
+        if op in (OP_GOTO, OP_PARAM, OP_RETURN, OP_PRINT):
+            return f"{op} {self.a}"
+        return op
+
+    def __repr__(self):
+        return f"Instrucao({str(self)!r})"
+
+
+def formatar_3ac(codigo):
+    # Texto do 3AC, com uma linha em branco antes de cada função
+    return [f"\n{instrucao}" if instrucao.op == OP_FUNCAO else str(instrucao) for instrucao in codigo]
+
+
+def codificar_3ac(codigo):
+    # Forma só com tuplas, strings e números: serializa (pickle/marshal) bem mais rápido que os objetos
+    return [(i.op,
+             None if i.dest is None else (i.dest.classe, i.dest.valor),
+             None if i.a is None else (i.a.classe, i.a.valor),
+             None if i.b is None else (i.b.classe, i.b.valor),
+             i.oper) for i in codigo]
+
+
+def decodificar_3ac(tuplas):
+    # Operandos iguais viram o mesmo objeto; o tipo entra na chave para não confundir 1, 1.0 e True
+    operandos = {}
+
+    def operando(par):
+        if par is None:
+            return None
+        chave = (par, type(par[1]))
+        resultado = operandos.get(chave)
+        if resultado is None:
+            resultado = operandos[chave] = Operando(par[0], par[1])
+        return resultado
+
+    return [Instrucao(op, operando(dest), operando(a), operando(b), oper) for op, dest, a, b, oper in tuplas]
+
+
+def _operando_texto(texto):
+    valor = converter_constante(texto)
+    if valor is not None:
+        return constante(valor)
+    if PADRAO_TEMPORARIO.match(texto):
+        return temporario(texto)
+    return variavel(texto)
+
+
+def ler_3ac(linhas):
+    # Reconstrói a representação estruturada a partir do texto do 3AC
+    linhas = [PADRAO_PARTES.findall(linha) for linha in linhas]
+    linhas = [partes for partes in linhas if partes]
+
+    # Os 'param' logo na entrada de uma função são os formais; a quantidade vem das chamadas
+    aridades = {}
+    for partes in linhas:
+        if 'call' in partes:
+            i = partes.index('call')
+            aridades[partes[i + 1]] = int(partes[i + 2])
+
+    codigo = []
+    formais_restantes = 0
+    na_entrada = False
+    for partes in linhas:
+        instrucao = partes[0]
+        if len(partes) == 1 and instrucao.endswith(':'):
+            nome = instrucao[:-1]
+            if ROTULO_INTERNO.match(nome):
+                codigo.append(Instrucao(OP_ROTULO, a=rotulo(nome)))
+            else:
+                codigo.append(Instrucao(OP_FUNCAO, a=funcao(nome)))
+                formais_restantes = aridades.get(nome, 0)
+                na_entrada = True
+            continue
+        if instrucao == 'push_stack':
+            codigo.append(Instrucao(OP_PUSH_STACK))
+            continue
+        if na_entrada and instrucao == 'param' and formais_restantes:
+            codigo.append(Instrucao(OP_FORMAL, dest=variavel(partes[1])))
+            formais_restantes -= 1
+            continue
+        na_entrada = False
+
+        if instrucao == 'declare':
+            codigo.append(Instrucao(OP_DECLARE, dest=variavel(partes[1]), oper=partes[2]))
+        elif instrucao == 'goto':
+            codigo.append(Instrucao(OP_GOTO, a=rotulo(partes[1])))
+        elif instrucao == 'if_false':
+            codigo.append(Instrucao(OP_IF_FALSE, a=_operando_texto(partes[1]), b=rotulo(partes[3])))
+        elif instrucao in ('param', 'return', 'print'):
+            codigo.append(Instrucao(instrucao, a=_operando_texto(partes[1])))
+        elif instrucao == 'call':
+            codigo.append(Instrucao(OP_CALL, a=funcao(partes[1]), b=constante(int(partes[2]))))
+        elif instrucao in ('pop_stack', 'ret', 'halt'):
+            codigo.append(Instrucao(instrucao))
+        elif len(partes) >= 3 and partes[1] == '=':
+            dest = _operando_texto(partes[0])
+            if partes[2] == 'call':
+                codigo.append(Instrucao(OP_CALL, dest=dest, a=funcao(partes[3]), b=constante(int(partes[4]))))
+            elif len(partes) == 5:
+                if partes[3] not in OPERACOES:
+                    raise Exception(f"Erro de leitura do 3AC: operador desconhecido '{partes[3]}'.")
+                codigo.append(Instrucao(OP_BINARIA, dest=dest, a=_operando_texto(partes[2]),
+                                        b=_operando_texto(partes[4]), oper=partes[3]))
+            elif partes[2] == '!' and len(partes) == 4:
+                codigo.append(Instrucao(OP_UNARIA, dest=dest, a=_operando_texto(partes[3]), oper='!'))
+            elif partes[2].startswith('!') and len(partes[2]) > 1:
+                codigo.append(Instrucao(OP_UNARIA, dest=dest, a=_operando_texto(partes[2][1:]), oper='!'))
+            else:
+                codigo.append(Instrucao(OP_COPIA, dest=dest, a=_operando_texto(partes[2])))
+        else:
+            raise Exception(f"Erro de leitura do 3AC: instrução inválida '{' '.join(partes)}'.")
+    return codigo
@@ -0,0 +1,143 @@
+import os
+from analisador_lexico import Lexer, JanelaTokens
+from analisador_semantico import AnalisadorSemantico
+from otimizador_de_codigo import Otimizador
+from maquina_virtual import MaquinaVirtual
+from instrumentacao import Instrumentacao
+from codigo_intermediario import formatar_3ac, codificar_3ac, decodificar_3ac
+
+
+CAMPOS_3AC = ('codigo_3ac', 'codigo_otimizado')
+
+
+class Compilacao:
+    # Resultado de todas as fases; se uma fase falhar, 'erro' guarda a mensagem e as seguintes ficam None
+    def __init__(self):
+        self.tokens = None
+        self.numero_tokens = 0
+        self.erros_lexicos = []
+        self.tabela_lexica = None
+        self.tabela_simbolos = None
+        self.codigo_3ac = None
+        self.codigo_otimizado = None
+        self.texto_3ac = None
+        self.texto_otimizado = None
+        self.arvore_sintatica = None
+        self.grafo_dependencias = None
+        self.erro = None
+
+    def formatar(self):
+        # Texto do 3AC (formatar_3ac); fica guardado junto com a compilação no cache
+        if self.texto_3ac is None and self.codigo_3ac is not None:
+            self.texto_3ac = "\n".join(formatar_3ac(self.codigo_3ac))
+        if self.texto_otimizado is None and self.codigo_otimizado is not None:
+            self.texto_otimizado = "\n".join(formatar_3ac(self.codigo_otimizado))
+        return self
+
+    def __getstate__(self):
+        # O 3AC vai para o pickle (cache em disco) como tuplas, bem mais rápidas de serializar que os objetos
+        estado = dict(self.__dict__)
+        codificados = estado.pop('_codificados', {})
+        for campo in CAMPOS_3AC:
+            if campo in estado:
+                estado[campo] = None if estado[campo] is None else codificar_3ac(estado[campo])
+            else:
+                estado[campo] = codificados[campo]
+        return estado
+
+    def __setstate__(self, estado):
+        self._codificados = {campo: estado.pop(campo) for campo in CAMPOS_3AC}
+        self.__dict__.update(estado)
+
+    def __getattr__(self, nome):
+        # Só é chamado para atributos ausentes: o 3AC vindo do disco é decodificado no primeiro acesso,
+        # então quem só precisa do texto (compilar_lote.py) nunca paga por isso
+        codificados = self.__dict__.get('_codificados')
+        if codificados is None or nome not in codificados:
+            raise AttributeError(nome)
+        tuplas = codificados.pop(nome)
+        valor = None if tuplas is None else decodificar_3ac(tuplas)
+        setattr(self, nome, valor)
+        return valor
+
+
+def compilar(codigo=None, instrumentacao=None, rastreamento=False, gerar_grafos=False, otimizar=True, compacto=False,
+             nivel_otimizacao=2, caminho=None):
+    # O código vem como texto ou, em 'caminho', de um arquivo. Do arquivo e sem rastreamento (a árvore de
+    # derivação), os tokens vêm em streaming de Lexer.de_arquivo por uma JanelaTokens: léxico e semântico
+    # rodam juntos, em uma só fase, e os tokens não ficam guardados (compilacao.tokens fica None)
+    instrumentacao = instrumentacao if instrumentacao is not None else Instrumentacao()
+    compilacao = Compilacao()
+    rastreamento = rastreamento or gerar_grafos
+    try:
+        if codigo is None and not rastreamento:
+            lexer = Lexer.de_arquivo(caminho)
+            tokens = JanelaTokens(lexer.gerar_tokens())
+            parser = AnalisadorSemantico(tokens, rastreamento=False)
+            with instrumentacao.fase('lexer_semantico', bytes=os.path.getsize(caminho)) as registro:
+                try:
+                    parser.analisar()
+                finally:
+                    # Até onde o parser leu, se parou em um erro
+                    compilacao.numero_tokens = tokens.base + len(tokens.buffer)
+                    compilacao.erros_lexicos = lexer.erros
+                    compilacao.tabela_lexica = lexer.tabela_simbolos
+                registro.update(tokens=compilacao.numero_tokens, simbolos=len(parser.tabela_simbolos),
+                                instrucoes_3ac=len(parser.codigo_3ac))
+        else:
+            if codigo is None:
+                with open(caminho, encoding='utf-8') as arquivo:
+                    codigo = arquivo.read()
+            lexer = Lexer(codigo)
+            with instrumentacao.fase('lexer', bytes=len(codigo.encode('utf-8'))) as registro:
+                compilacao.tokens = lexer.analisar_compacto() if compacto else lexer.analisar()
+                compilacao.numero_tokens = registro['tokens'] = len(compilacao.tokens)
+            compilacao.erros_lexicos = lexer.erros
+            compilacao.tabela_lexica = lexer.tabela_simbolos
+
+            parser = AnalisadorSemantico(compilacao.tokens, rastreamento=rastreamento)
+            with instrumentacao.fase('semantico') as registro:
+                parser.analisar()
+                registro.update(nos_arvore=len(parser.nodes), simbolos=len(parser.tabela_simbolos),
+                                instrucoes_3ac=len(parser.codigo_3ac))
+        compilacao.tabela_simbolos = parser.tabela_simbolos
+        compilacao.codigo_3ac = parser.codigo_3ac
+
+        if gerar_grafos:
+            with instrumentacao.fase('arvore_sintatica'):
+                compilacao.arvore_sintatica = parser.gerar_arvore_sintatica()
+            with instrumentacao.fase('grafo_dependencias'):
+                compilacao.grafo_dependencias = parser.gerar_grafo_dependencias()
+
+        if otimizar:
+            with instrumentacao.fase('otimizador', instrucoes_antes=len(parser.codigo_3ac)) as registro:
+                otimizador = Otimizador(parser.codigo_3ac, instrumentacao, parser.dependencias_funcao,
+                                        nivel=nivel_otimizacao)
+                compilacao.codigo_otimizado = otimizador.otimizar()
+                registro['instrucoes_depois'] = len(compilacao.codigo_otimizado)
+                registro['chamadas_expandidas'] = otimizador.chamadas_expandidas
+                registro['expressoes_reaproveitadas'] = otimizador.expressoes_reaproveitadas
+                registro['invariantes_movidas'] = otimizador.invariantes_movidas
+                registro['multiplicacoes_reduzidas'] = otimizador.multiplicacoes_reduzidas
+                registro['lacos_desenrolados'] = otimizador.lacos_desenrolados
+                registro['regras_peephole'] = dict(otimizador.estatisticas_peephole)
+                registro['temporarios_alocados'] = otimizador.temporarios_alocados
+                registro['temporarios_derramados'] = otimizador.temporarios_derramados
+                registro['nivel'] = nivel_otimizacao
+                registro['iteracoes'] = otimizador.gerenciador.iteracoes
+                registro['limite_atingido'] = otimizador.gerenciador.limite_atingido
+                registro['passagens'] = otimizador.gerenciador.estatisticas
+    except Exception as e:
+        compilacao.erro = str(e)
+    return compilacao
+
+
+def executar(codigo_3ac, instrumentacao=None, fase='execucao', limite_instrucoes=None):
+    instrumentacao = instrumentacao if instrumentacao is not None else Instrumentacao()
+    vm = MaquinaVirtual(codigo_3ac)
+    with instrumentacao.fase(fase) as registro:
+        try:
+            vm.executar(limite_instrucoes)
+        finally:
+            registro['instrucoes_executadas'] = vm.instrucoes_executadas
+    return vm
@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from compilador import compilar
+from cache_compilacao import CacheCompilacao
+from instrumentacao import Instrumentacao
+from ir_binario import gravar_artefato, EXTENSAO
+
+
+# Arquivos gerados por arquivo compilado, além do .diagnosticos.txt
+SAIDAS = ('.3ac', '.otimizado.3ac', EXTENSAO)
+
+# Um cache por processo do pool (a camada em disco é compartilhada entre eles)
+_caches = {}
+
+
+def _obter_cache(diretorio):
+    if diretorio not in _caches:
+        # No lote cada arquivo é compilado uma vez: a camada em memória só precisa ser pequena
+        _caches[diretorio] = CacheCompilacao(capacidade=8, diretorio=diretorio)
+    return _caches[diretorio]
+
+
+def listar_arquivos(raiz, extensoes):
+    arquivos = []
+    for diretorio, subdiretorios, nomes in os.walk(raiz):
+        subdiretorios.sort()
+        for nome in sorted(nomes):
+            if nome.endswith(tuple(extensoes)):
+                arquivos.append(os.path.join(diretorio, nome))
+    return arquivos
+
+
+def _contar_instrucoes(texto):
+    # Uma instrução por linha; as linhas vazias só separam funções
+    return sum(1 for linha in texto.split('\n') if linha)
+
+
+def compilar_arquivo(caminho, raiz, saida, otimizar=True, diretorio_cache=None, nivel_otimizacao=2, artefatos=False):
+    # Executa em um processo do pool: qualquer falha vira diagnóstico, nunca interrompe o lote
+    gravadas = set()
+    relativo = os.path.relpath(caminho, raiz)
+    resultado = {'arquivo': relativo, 'ok': False, 'bytes': 0, 'tokens': 0, 'instrucoes_3ac': 0,
+                 'instrucoes_otimizadas': 0, 'artefato_bytes': 0, 'erros_lexicos': [], 'erro': None, 'cache': None}
+    instrumentacao = Instrumentacao()
+    inicio = time.perf_counter()
+    try:
+        # O arquivo não é lido inteiro: o léxico (e a chave do cache) o percorrem em blocos
+        resultado['bytes'] = os.path.getsize(caminho)
+        if diretorio_cache:
+            compilacao = _obter_cache(diretorio_cache).compilar(caminho=caminho, instrumentacao=instrumentacao,
+                                                                otimizar=otimizar, compacto=True,
+                                                                nivel_otimizacao=nivel_otimizacao)
+            resultado['cache'] = instrumentacao.fases[0]['acerto']
+        else:
+            compilacao = compilar(caminho=caminho, instrumentacao=instrumentacao, otimizar=otimizar, compacto=True,
+                                  nivel_otimizacao=nivel_otimizacao).formatar()
+        resultado['erros_lexicos'] = compilacao.erros_lexicos
+        resultado['erro'] = compilacao.erro
+        resultado['tokens'] = compilacao.numero_tokens
+
+        destino = os.path.join(saida, relativo)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        for campo, extensao, texto in (('instrucoes_3ac', '.3ac', compilacao.texto_3ac),
+                                       ('instrucoes_otimizadas', '.otimizado.3ac', compilacao.texto_otimizado)):
+            if texto is not None:
+                resultado[campo] = _contar_instrucoes(texto)
+                with open(destino + extensao, 'w', encoding='utf-8') as arquivo:
+                    arquivo.write(texto + "\n")
+                gravadas.add(extensao)
+        if artefatos and compilacao.erro is None and not compilacao.erros_lexicos:
+            # Artefato binário (ir_binario.py) do 3AC final, para executores e ferramentas carregarem por mmap
+            codigo_final = compilacao.codigo_otimizado if otimizar else compilacao.codigo_3ac
+            resultado['artefato_bytes'] = gravar_artefato(destino + EXTENSAO, codigo_final,
+                                                          compilacao.tabela_simbolos)
+            gravadas.add(EXTENSAO)
+    except Exception as e:
+        resultado['erro'] = f"{type(e).__name__}: {e}"
+        destino = os.path.join(saida, relativo)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+    resultado['ok'] = resultado['erro'] is None and not resultado['erros_lexicos']
+    resultado['tempo_s'] = time.perf_counter() - inicio
+    resultado['instrumentacao'] = instrumentacao.para_dict()
+    with open(destino + '.diagnosticos.txt', 'w', encoding='utf-8') as arquivo:
+        for erro in resultado['erros_lexicos']:
+            arquivo.write(f"erro léxico: {erro}\n")
+        if resultado['erro']:
+            arquivo.write(f"erro: {resultado['erro']}\n")
+        if resultado['ok']:
+            arquivo.write("ok\n")
+    # Saídas de uma execução anterior que esta não produziu (a fase falhou ou não foi pedida) não podem
+    # ficar ao lado dos diagnósticos novos como se fossem deste arquivo
+    for extensao in SAIDAS:
+        if extensao not in gravadas and os.path.exists(destino + extensao):
+            os.remove(destino + extensao)
+    return resultado
+
+
+def _compilar_arquivo(argumentos):
+    return compilar_arquivo(*argumentos)
+
+
+def compilar_lote(raiz, saida, processos=None, extensoes=('.c',), otimizar=True, diretorio_cache=None,
+                  nivel_otimizacao=2, artefatos=False):
+    arquivos = listar_arquivos(raiz, extensoes)
+    processos = processos or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    tarefas = [(caminho, raiz, saida, otimizar, diretorio_cache, nivel_otimizacao, artefatos) for caminho in arquivos]
+    if processos == 1:
+        resultados = [_compilar_arquivo(tarefa) for tarefa in tarefas]
+    else:
+        # Lotes de vários arquivos por tarefa diluem o custo de comunicação entre processos
+        tamanho_lote = max(1, len(tarefas) // (processos * 8))
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(_compilar_arquivo, tarefas, chunksize=tamanho_lote))
+    tempo = time.perf_counter() - inicio
+    return resultados, resumir(resultados, tempo, processos)
+
+
+def resumir(resultados, tempo, processos):
+    total_bytes = sum(r['bytes'] for r in resultados)
+    total_tokens = sum(r['tokens'] for r in resultados)
+    return {
+        'arquivos': len(resultados),
+        'sucesso': sum(1 for r in resultados if r['ok']),
+        'falhas': sum(1 for r in resultados if not r['ok']),
+        'processos': processos,
+        'tempo_s': tempo,
+        'tempo_cpu_s': sum(r['tempo_s'] for r in resultados),
+        'bytes': total_bytes,
+        'tokens': total_tokens,
+        'instrucoes_3ac': sum(r['instrucoes_3ac'] for r in resultados),
+        'instrucoes_otimizadas': sum(r['instrucoes_otimizadas'] for r in resultados),
+        'artefatos_bytes': sum(r['artefato_bytes'] for r in resultados),
+        'acertos_cache': sum(1 for r in resultados if r['cache']),
+        'arquivos_por_s': len(resultados) / tempo if tempo > 0 else 0.0,
+        'mb_por_s': total_bytes / 2**20 / tempo if tempo > 0 else 0.0,
+        'tokens_por_s': total_tokens / tempo if tempo > 0 else 0.0,
+    }
+
+
+def imprimir_resumo(resultados, resumo):
+    for r in resultados:
+        if not r['ok']:
+            motivo = r['erro'] or f"{len(r['erros_lexicos'])} erro(s) léxico(s)"
+            print(f"FALHA {r['arquivo']}: {motivo}")
+    print(f"{resumo['arquivos']} arquivos ({resumo['sucesso']} ok, {resumo['falhas']} com falha) "
+          f"em {resumo['tempo_s']:.2f} s com {resumo['processos']} processos")
+    print(f"{resumo['arquivos_por_s']:,.1f} arquivos/s | {resumo['mb_por_s']:.2f} MB/s | "
+          f"{resumo['tokens_por_s']:,.0f} tokens/s | {resumo['instrucoes_3ac']} instruções 3AC "
+          f"({resumo['instrucoes_otimizadas']} após otimização)")
+    if resumo['artefatos_bytes']:
+        print(f"{resumo['artefatos_bytes'] / 2**10:,.1f} KB de artefatos binários ({EXTENSAO})")
+    if resumo['acertos_cache']:
+        print(f"{resumo['acertos_cache']} de {resumo['arquivos']} arquivos vieram do cache de compilação")
+
+
+if __name__ == '__main__':
+    argumentos = argparse.ArgumentParser(
+        description="Compila todos os arquivos de um diretório (léxico, semântico e otimizador) em paralelo.")
+    argumentos.add_argument('diretorio')
+    argumentos.add_argument('--saida', default='saida_3ac',
+                            help="diretório onde ficam o 3AC e os diagnósticos de cada arquivo")
+    argumentos.add_argument('--processos', type=int, default=None, help="padrão: número de núcleos")
+    argumentos.add_argument('--extensoes', nargs='+', default=['.c'])
+    argumentos.add_argument('--sem-otimizacao', action='store_true')
+    argumentos.add_argument('--nivel', type=int, default=2, choices=(0, 1, 2),
+                            help="nível de otimização: 0 nenhuma passagem, 1 só as locais, 2 todas (padrão)")
+    argumentos.add_argument('--cache', help="diretório do cache de compilação em disco (reaproveitado entre execuções)")
+    argumentos.add_argument('--artefatos', action='store_true',
+                            help=f"grava também o artefato binário ({EXTENSAO}) de cada arquivo compilado")
+    argumentos.add_argument('--relatorio', help="arquivo JSON com o resumo e a instrumentação de cada arquivo")
+    opcoes = argumentos.parse_args()
+
+    if not os.path.isdir(opcoes.diretorio):
+        print(f"Erro: diretório '{opcoes.diretorio}' não encontrado.")
+        sys.exit(2)
+    resultados, resumo = compilar_lote(opcoes.diretorio, opcoes.saida, opcoes.processos,
+                                       opcoes.extensoes, not opcoes.sem_otimizacao, opcoes.cache, opcoes.nivel,
+                                       opcoes.artefatos)
+    imprimir_resumo(resultados, resumo)
+    if opcoes.relatorio:
+        with open(opcoes.relatorio, 'w', encoding='utf-8') as arquivo:
+            json.dump({'resumo': resumo, 'arquivos': resultados}, arquivo, indent=2, ensure_ascii=False)
+    sys.exit(1 if resumo['falhas'] else 0)
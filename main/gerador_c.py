@@ -0,0 +1,575 @@
+import os
+import shutil
+import tempfile
+import subprocess
+import time
+from codigo_intermediario import (
+    ler_3ac, CONSTANTE, TEMPORARIO, VARIAVEL,
+    OP_DECLARE, OP_FUNCAO, OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_IF_FALSE, OP_PARAM,
+    OP_FORMAL, OP_CALL, OP_RETURN, OP_RET, OP_PRINT, OP_HALT, OP_COPIA, OP_BINARIA, OP_UNARIA
+)
+from grafo_fluxo import GrafoFluxo, dividir_funcoes
+
+# Tipos da inferência: 'i' inteiro (int e bool: a máquina virtual imprime bool como 1/0 e faz contas com
+# ele como inteiro), 'f' float, 's' texto (char), 'm' misto (inteiro em um caminho e float em outro)
+TIPOS_DECLARADOS = {'int': 'i', 'bool': 'i', 'float': 'f', 'char': 's'}
+TIPOS_C = {'i': 'long long', 'f': 'double', 'm': 'double', 's': 'texto'}
+ARITMETICOS = ('+', '-', '*', '/', '%')
+COMPARACOES = ('==', '!=', '<', '<=', '>', '>=')
+COMPILADORES = ('cc', 'gcc', 'clang')
+
+RUNTIME_C = r'''#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+typedef const char *texto;
+
+static void _erro(const char *mensagem) {
+    fflush(stdout);
+    fprintf(stderr, "%s\n", mensagem);
+    exit(1);
+}
+
+static long long _div_i(long long a, long long b) {
+    if (b == 0) _erro("Erro de execução: divisão por zero.");
+    return a / b;
+}
+
+static long long _mod_i(long long a, long long b) {
+    if (b == 0) _erro("Erro de execução: divisão por zero.");
+    return a % b;
+}
+
+static double _div_f(double a, double b) {
+    if (b == 0) _erro("Erro de execução: divisão por zero.");
+    return a / b;
+}
+
+static double _mod_f(double a, double b) {
+    if (b == 0) _erro("Erro de execução: divisão por zero.");
+    return a - b * (a / b);
+}
+
+/* Mesmo texto do repr() do Python: menor número de dígitos que relê o mesmo valor, notação científica
+   fora de 1e-4 <= |v| < 1e16 e ".0" nos valores inteiros */
+static void _imprimir_f(double v) {
+    char texto[40];
+    int digitos, expoente, decimais;
+    if (v != v) { puts("nan"); return; }
+    if (v > 1e308 * 10) { puts("inf"); return; }
+    if (v < -1e308 * 10) { puts("-inf"); return; }
+    for (digitos = 1; digitos < 17; digitos++) {
+        snprintf(texto, sizeof texto, "%.*e", digitos - 1, v);
+        if (strtod(texto, NULL) == v) break;
+    }
+    snprintf(texto, sizeof texto, "%.*e", digitos - 1, v);
+    expoente = atoi(strchr(texto, 'e') + 1);
+    if (expoente < -4 || expoente >= 16) {
+        puts(texto);
+        return;
+    }
+    decimais = digitos - 1 - expoente;
+    printf("%.*f\n", decimais < 1 ? 1 : decimais, v);
+}
+'''
+
+
+def juntar(a, b):
+    if a is None or a == b:
+        return b
+    if b is None:
+        return a
+    if a == 's' or b == 's':
+        raise Exception("Erro do gerador C: texto e número no mesmo valor.")
+    return 'm'
+
+
+def tipo_constante(valor):
+    if isinstance(valor, str):
+        return 's'
+    if isinstance(valor, float):
+        return 'f'
+    return 'i'
+
+
+def literal_c(valor):
+    if isinstance(valor, str):
+        # Sem sequências de escape no fonte: a barra é literal; '?' escapado por causa dos trígrafos
+        corpo = ''.join(c if c.isascii() and c.isprintable() and c not in '\\"?' else
+                        ''.join(f'\\{byte:03o}' for byte in c.encode('utf-8')) for c in valor)
+        return f'"{corpo}"'
+    if isinstance(valor, bool):
+        return '1' if valor else '0'
+    if isinstance(valor, float):
+        return repr(valor)
+    return f'{valor}LL'
+
+
+class _Funcao:
+    # Dados de uma função do 3AC: operandos classificados na ordem do texto como na máquina virtual
+    # (('c', valor), ('t', temporário), ('l', local) ou ('g', global)), grafo de fluxo e o casamento de
+    # cada 'call' com os seus 'param'
+    def __init__(self, nome, trecho):
+        self.nome = nome
+        self.trecho = trecho
+        self.formais = []
+        self.tipos_declarados = {}
+        self.operandos = []
+        locais = set()
+        for instrucao in trecho:
+            if instrucao.op == OP_FORMAL or instrucao.op == OP_DECLARE:
+                locais.add(instrucao.dest.valor)
+                self.tipos_declarados[instrucao.dest.valor] = TIPOS_DECLARADOS.get(instrucao.oper)
+                if instrucao.op == OP_FORMAL:
+                    self.formais.append(instrucao.dest.valor)
+            self.operandos.append(tuple(self._classificar(o, locais) for o in (instrucao.dest, instrucao.a, instrucao.b)))
+        self.grafo = GrafoFluxo(trecho)
+        self.argumentos = self._casar_parametros()
+
+    @staticmethod
+    def _classificar(operando, locais):
+        if operando is None or operando.classe not in (CONSTANTE, TEMPORARIO, VARIAVEL):
+            return None
+        if operando.classe == CONSTANTE:
+            return ('c', operando.valor)
+        if operando.classe == TEMPORARIO:
+            return ('t', operando.valor)
+        return ('l' if operando.valor in locais else 'g', operando.valor)
+
+    def _casar_parametros(self):
+        # Os 'param' de uma chamada ficam no mesmo bloco que ela (pilha, como na máquina virtual)
+        argumentos = {}
+        for b in range(len(self.grafo)):
+            pilha = []
+            for pos in range(self.grafo.inicios[b], self.grafo.fins[b]):
+                instrucao = self.trecho[pos]
+                if instrucao.op == OP_PARAM:
+                    pilha.append(pos)
+                elif instrucao.op == OP_CALL:
+                    n = instrucao.b.valor
+                    if n > len(pilha):
+                        raise Exception(f"Erro do gerador C: 'call {instrucao.a.valor}' em '{self.nome}' com "
+                                        f"parâmetros fora do bloco.")
+                    argumentos[pos] = pilha[len(pilha) - n:]
+                    del pilha[len(pilha) - n:]
+            if pilha:
+                raise Exception(f"Erro do gerador C: 'param' sem 'call' no mesmo bloco em '{self.nome}'.")
+        return argumentos
+
+
+class GeradorC:
+    # Gera C99 a partir do 3AC. Os tipos vêm de uma inferência sobre o programa inteiro, semeada pelos tipos
+    # declarados ('declare'/'formal' e a tabela_simbolos). Dentro de cada função o tipo de cada nome é
+    # seguido pelo fluxo (o alocador de registradores reaproveita um temporário para valores de tipos
+    # diferentes). Cada função ganha uma versão por combinação de tipos dos argumentos com que é chamada, a
+    # partir de main: a máquina virtual guarda um int passado a um formal float como int, e a versão
+    # especializada faz o mesmo. Globais e retornos juntam os tipos de todas as atribuições e 'return' até
+    # um ponto fixo. Um nome com tipos diferentes em pontos diferentes vira uma variável C por tipo; um que
+    # chega a um ponto com inteiro por um caminho e float por outro vira um double ('m').
+    def __init__(self, codigo_3ac, tabela_simbolos=None, max_iteracoes=20):
+        if codigo_3ac and isinstance(codigo_3ac[0], str):
+            codigo_3ac = ler_3ac(codigo_3ac)
+        self.codigo = codigo_3ac
+        self.max_iteracoes = max_iteracoes
+        self.declarados = {}
+        for simbolo in tabela_simbolos or ():
+            self.declarados[(simbolo['escopo'], simbolo['identificador'])] = simbolo['tipo']
+        self.funcoes = {}
+        self.inicio = []
+        for nome, inicio, fim in dividir_funcoes(codigo_3ac):
+            if nome is None:
+                self.inicio = codigo_3ac[inicio:fim]
+            else:
+                self.funcoes[nome] = _Funcao(nome, codigo_3ac[inicio:fim])
+        self.globais_declaradas = {i.dest.valor: TIPOS_DECLARADOS.get(i.oper) for i in self.inicio if i.op == OP_DECLARE}
+        self.entrada = self._entrada()
+        self.tipos_globais = {}
+        # (função, tipos dos formais) -> tipo de retorno; 'versoes' guarda, das alcançadas a partir da
+        # entrada, os tipos de cada instrução e a versão chamada em cada 'call'
+        self.tipos_retorno = {}
+        self.versoes = {}
+
+    def _entrada(self):
+        # Trecho antes da primeira função: 'declare' das globais (já zeradas em C) e o 'goto main'
+        entrada = next(iter(self.funcoes), None)
+        for instrucao in self.inicio:
+            if instrucao.op == OP_GOTO:
+                entrada = instrucao.a.valor
+                if entrada not in self.funcoes:
+                    raise Exception(f"Erro do gerador C: desvio inicial para '{entrada}', que não é uma função.")
+                break
+            if instrucao.op == OP_HALT:
+                return None
+            if instrucao.op != OP_DECLARE:
+                raise Exception(f"Erro do gerador C: instrução '{instrucao}' antes da primeira função.")
+        return entrada
+
+    def _declarado(self, escopo, nome, funcao=None):
+        if funcao is not None and funcao.tipos_declarados.get(nome):
+            return funcao.tipos_declarados[nome]
+        tipo = self.declarados.get((escopo, nome)) or self.declarados.get(('global', nome))
+        return TIPOS_DECLARADOS.get(tipo) or self.globais_declaradas.get(nome)
+
+    def _globais(self):
+        globais = set(self.globais_declaradas)
+        for funcao in self.funcoes.values():
+            globais.update(o[1] for operandos in funcao.operandos for o in operandos if o is not None and o[0] == 'g')
+        return globais
+
+    # Inferência de tipos
+
+    def _tipo(self, operando, estado):
+        classe, valor = operando
+        if classe == 'c':
+            return tipo_constante(valor)
+        if classe == 'g':
+            return self.tipos_globais.get(valor)
+        return estado.get(operando)
+
+    def _transferir(self, funcao, pos, estado, versao, rodada):
+        # Aplica a instrução ao estado (operando -> tipo) e guarda (tipo do destino, tipo de a, tipo de b)
+        instrucao = funcao.trecho[pos]
+        op = instrucao.op
+        dest, a, b = funcao.operandos[pos]
+        tipo_a = self._tipo(a, estado) if a is not None else None
+        tipo_b = self._tipo(b, estado) if b is not None else None
+        resultado = None
+        if op == OP_COPIA:
+            resultado = tipo_a
+        elif op == OP_BINARIA:
+            if instrucao.oper not in ARITMETICOS:
+                resultado = 'i'
+            elif tipo_a is not None and tipo_b is not None:
+                resultado = 'i' if tipo_a == tipo_b == 'i' else 'f' if 'f' in (tipo_a, tipo_b) else 'm'
+        elif op == OP_UNARIA or op == OP_DECLARE:
+            resultado = 'i'
+        elif op == OP_CALL:
+            chamada = self._versao_chamada(funcao, pos, instrucao, versao)
+            versao['chamadas'][pos] = chamada
+            rodada['pendentes'].append(chamada)
+            resultado = self.tipos_retorno.get(chamada)
+        elif op == OP_RETURN:
+            chave = versao['chave']
+            rodada['retornos'][chave] = juntar(rodada['retornos'].get(chave), tipo_a)
+        if dest is not None and op in (OP_COPIA, OP_BINARIA, OP_UNARIA, OP_DECLARE, OP_CALL):
+            if dest[0] == 'g':
+                rodada['globais'][dest[1]] = juntar(rodada['globais'].get(dest[1]), resultado)
+            else:
+                estado[dest] = resultado
+        versao['tipos'][pos] = (resultado, tipo_a, tipo_b)
+
+    def _versao_chamada(self, funcao, pos, instrucao, versao):
+        nome = instrucao.a.valor
+        chamada = self.funcoes.get(nome)
+        if chamada is None:
+            raise Exception(f"Erro de carga: função '{nome}' não encontrada no código 3AC.")
+        tipos = [versao['tipos'][p][1] for p in funcao.argumentos[pos]]
+        # Argumento ainda sem tipo (retorno de recursão na primeira volta): usa o tipo declarado do formal
+        assinatura = tuple(tipo or self._declarado(nome, formal, chamada) or 'i'
+                           for formal, tipo in zip(chamada.formais, tipos))
+        if len(assinatura) < len(chamada.formais):
+            raise Exception(f"Erro do gerador C: '{nome}' chamada com {len(tipos)} argumentos, espera "
+                            f"{len(chamada.formais)}.")
+        return (nome, assinatura)
+
+    def _inferir_versao(self, chave, rodada):
+        funcao = self.funcoes[chave[0]]
+        versao = {'chave': chave, 'tipos': [None] * len(funcao.trecho), 'chamadas': {}}
+        grafo = funcao.grafo
+        entradas = [None] * len(grafo)
+        entradas[0] = {('l', nome): tipo for nome, tipo in zip(funcao.formais, chave[1])}
+        pendentes = [0]
+        while pendentes:
+            b = pendentes.pop()
+            estado = dict(entradas[b])
+            for pos in range(grafo.inicios[b], grafo.fins[b]):
+                self._transferir(funcao, pos, estado, versao, rodada)
+            for s in grafo.sucessores[b]:
+                if entradas[s] is None:
+                    entradas[s] = dict(estado)
+                    pendentes.append(s)
+                    continue
+                mudou = False
+                for operando, tipo in estado.items():
+                    junto = juntar(entradas[s].get(operando), tipo)
+                    if junto != entradas[s].get(operando):
+                        entradas[s][operando] = junto
+                        mudou = True
+                if mudou:
+                    pendentes.append(s)
+        return versao
+
+    def _rodada(self):
+        # Percorre as versões alcançáveis a partir da entrada com os tipos de globais e retornos atuais
+        rodada = {'globais': dict(self.tipos_globais), 'retornos': dict(self.tipos_retorno), 'pendentes': []}
+        versoes = {}
+        if self.entrada is not None:
+            rodada['pendentes'].append((self.entrada, ()))
+        while rodada['pendentes']:
+            chave = rodada['pendentes'].pop()
+            if chave not in versoes:
+                versoes[chave] = self._inferir_versao(chave, rodada)
+        return versoes, rodada
+
+    def inferir(self):
+        for _ in range(self.max_iteracoes):
+            self.versoes, rodada = self._rodada()
+            if rodada['globais'] == self.tipos_globais and rodada['retornos'] == self.tipos_retorno:
+                break
+            self.tipos_globais = rodada['globais']
+            self.tipos_retorno = rodada['retornos']
+        else:
+            raise Exception("Erro do gerador C: a inferência de tipos não convergiu.")
+        # O que ficou sem tipo (global só lida, função que nunca retorna valor) usa o tipo declarado; uma
+        # última volta registra os tipos de cada instrução com esses valores
+        for nome in self._globais():
+            if self.tipos_globais.get(nome) is None:
+                self.tipos_globais[nome] = self._declarado('global', nome) or 'i'
+        for chave in self.versoes:
+            if self.tipos_retorno.get(chave) is None:
+                tipo = self.declarados.get(('global', chave[0]))
+                self.tipos_retorno[chave] = None if tipo in (None, 'void') else TIPOS_DECLARADOS.get(tipo, 'i')
+        self.versoes, _ = self._rodada()
+
+    # Emissão
+
+    def _nome_versao(self, chave):
+        if sum(1 for outra in self.versoes if outra[0] == chave[0]) == 1:
+            return f"f_{chave[0]}"
+        return f"f_{chave[0]}__{''.join(chave[1])}"
+
+    def _nomes_locais(self, funcao, versao):
+        # Tipos de cada temporário/local na versão; com 'm' ou um tipo só, uma variável C; senão uma por tipo
+        vistos = {}
+        for formal, tipo in zip(funcao.formais, versao['chave'][1]):
+            vistos.setdefault(('l', formal), set()).add(tipo)
+        for pos, tipos in enumerate(versao['tipos']):
+            if tipos is None:
+                continue
+            for operando, tipo in zip(funcao.operandos[pos], tipos):
+                if operando is not None and operando[0] in 'tl':
+                    vistos.setdefault(operando, set()).add(tipo or 'i')
+        variaveis = {}
+        for operando, tipos in vistos.items():
+            base = operando[1] if operando[0] == 't' else 'v_' + operando[1]
+            if 'm' in tipos or len(tipos) == 1:
+                tipo = 'm' if 'm' in tipos else next(iter(tipos))
+                for t in tipos:
+                    variaveis[(operando, t)] = (base, tipo)
+            else:
+                for t in tipos:
+                    variaveis[(operando, t)] = (f"{base}_{t}", t)
+        return variaveis
+
+    def _texto(self, operando, tipo, variaveis):
+        classe, valor = operando
+        if classe == 'c':
+            return literal_c(valor)
+        if classe == 'g':
+            return 'g_' + valor
+        return variaveis[(operando, tipo or 'i')][0]
+
+    def _expressao(self, instrucao, a, b, tipo_a, tipo_b):
+        oper = instrucao.oper
+        if instrucao.op == OP_UNARIA:
+            return f"!{a}"
+        if oper in ('/', '%'):
+            sufixo = 'i' if tipo_a == tipo_b == 'i' else 'f'
+            return f"_{'div' if oper == '/' else 'mod'}_{sufixo}({a}, {b})"
+        if oper in COMPARACOES and 's' in (tipo_a, tipo_b):
+            return f"strcmp({a}, {b}) {oper} 0"
+        return f"{a} {oper} {b}"
+
+    def _assinatura(self, chave, variaveis=None):
+        funcao = self.funcoes[chave[0]]
+        retorno = self.tipos_retorno.get(chave)
+        parametros = []
+        for formal, tipo in zip(funcao.formais, chave[1]):
+            nome_c, tipo_c = variaveis[(('l', formal), tipo)] if variaveis else (None, tipo)
+            parametros.append(TIPOS_C[tipo_c] if nome_c is None else f"{TIPOS_C[tipo_c]} {nome_c}")
+        tipo_retorno = 'void' if retorno is None else TIPOS_C[retorno]
+        return f"static {tipo_retorno} {self._nome_versao(chave)}({', '.join(parametros) or 'void'})"
+
+    def _funcao(self, chave, versao):
+        funcao = self.funcoes[chave[0]]
+        variaveis = self._nomes_locais(funcao, versao)
+        nomes_formais = {variaveis[(('l', formal), tipo)][0] for formal, tipo in zip(funcao.formais, chave[1])}
+        linhas = [self._assinatura(chave, variaveis) + " {"]
+        declaracoes = {}
+        for nome_c, tipo_c in set(variaveis.values()):
+            if nome_c not in nomes_formais:
+                declaracoes.setdefault(TIPOS_C[tipo_c], []).append(nome_c)
+        for pos, instrucao in enumerate(funcao.trecho):
+            if instrucao.op == OP_PARAM and versao['tipos'][pos] is not None:
+                declaracoes.setdefault(TIPOS_C[versao['tipos'][pos][1] or 'i'], []).append(f"_p{pos}")
+        for tipo_c, nomes in sorted(declaracoes.items()):
+            linhas.append(f"    {tipo_c} {', '.join(f'{nome} = 0' for nome in sorted(nomes))};")
+
+        void = self.tipos_retorno.get(chave) is None
+        for pos, instrucao in enumerate(funcao.trecho):
+            if versao['tipos'][pos] is None:
+                # Bloco inalcançável: a inferência não passou por ele
+                continue
+            op = instrucao.op
+            dest, a, b = funcao.operandos[pos]
+            tipo_dest, tipo_a, tipo_b = versao['tipos'][pos]
+            texto_a = self._texto(a, tipo_a, variaveis) if a is not None else None
+            texto_b = self._texto(b, tipo_b, variaveis) if b is not None else None
+            texto_dest = self._texto(dest, tipo_dest, variaveis) if dest is not None else None
+            if op == OP_ROTULO or (op == OP_FUNCAO and pos == 0):
+                linhas.append(f"L_{instrucao.a.valor}:;")
+            elif op == OP_COPIA:
+                linhas.append(f"    {texto_dest} = {texto_a};")
+            elif op == OP_BINARIA or op == OP_UNARIA:
+                linhas.append(f"    {texto_dest} = {self._expressao(instrucao, texto_a, texto_b, tipo_a, tipo_b)};")
+            elif op == OP_DECLARE:
+                linhas.append(f"    {texto_dest} = 0;")
+            elif op == OP_PRINT:
+                if tipo_a == 's':
+                    linhas.append(f"    puts({texto_a});")
+                elif tipo_a in ('f', 'm'):
+                    linhas.append(f"    _imprimir_f({texto_a});")
+                else:
+                    linhas.append(f'    printf("%lld\\n", (long long) {texto_a});')
+            elif op == OP_PARAM:
+                linhas.append(f"    _p{pos} = {texto_a};")
+            elif op == OP_CALL:
+                chamada = versao['chamadas'][pos]
+                argumentos = funcao.argumentos[pos][:len(chamada[1])]
+                texto = f"{self._nome_versao(chamada)}({', '.join(f'_p{p}' for p in argumentos)})"
+                if dest is not None and self.tipos_retorno.get(chamada) is not None:
+                    linhas.append(f"    {texto_dest} = {texto};")
+                else:
+                    linhas.append(f"    {texto};")
+            elif op == OP_GOTO:
+                linhas.append(f"    goto L_{self._rotulo(funcao, instrucao.a.valor)};")
+            elif op == OP_IF_FALSE:
+                linhas.append(f"    if (!({texto_a})) goto L_{self._rotulo(funcao, instrucao.b.valor)};")
+            elif op == OP_RETURN:
+                linhas.append("    return;" if void else f"    return {texto_a};")
+            elif op == OP_RET:
+                linhas.append("    return;" if void else "    return 0;")
+            elif op == OP_HALT:
+                linhas.append("    exit(0);")
+            elif op in (OP_FUNCAO, OP_FORMAL, OP_PUSH_STACK, OP_POP_STACK):
+                pass
+            else:
+                raise Exception(f"Erro do gerador C: instrução 3AC inválida '{instrucao}'.")
+        linhas.append("    return;" if void else "    return 0;")
+        linhas.append("}")
+        return linhas
+
+    def _rotulo(self, funcao, nome):
+        if nome not in funcao.grafo.bloco_do_rotulo:
+            raise Exception(f"Erro do gerador C: desvio para '{nome}', fora da função '{funcao.nome}'.")
+        return nome
+
+    def gerar(self):
+        self.inferir()
+        partes = [RUNTIME_C]
+        globais = self._globais()
+        if globais:
+            partes.append('\n'.join(f"static {TIPOS_C[self.tipos_globais[nome]]} g_{nome};" for nome in sorted(globais)))
+        # Versões em ordem do texto do 3AC (e, dentro de uma função, pela assinatura), para um fonte estável
+        ordem = {nome: i for i, nome in enumerate(self.funcoes)}
+        chaves = sorted(self.versoes, key=lambda chave: (ordem[chave[0]], chave[1]))
+        if chaves:
+            partes.append('\n'.join(self._assinatura(chave) + ";" for chave in chaves))
+        for chave in chaves:
+            partes.append('\n'.join(self._funcao(chave, self.versoes[chave])))
+        principal = ["int main(void) {"]
+        if self.entrada is not None:
+            principal.append(f"    {self._nome_versao((self.entrada, ()))}();")
+        principal.extend(["    return 0;", "}"])
+        partes.append('\n'.join(principal))
+        return '\n\n'.join(partes) + '\n'
+
+
+def encontrar_compilador_c():
+    for nome in COMPILADORES:
+        caminho = shutil.which(nome)
+        if caminho:
+            return caminho
+    raise Exception("Erro do gerador C: nenhum compilador C (cc, gcc ou clang) encontrado no PATH.")
+
+
+class ProgramaC:
+    # Gera o C, compila com o compilador do sistema em um diretório temporário e executa o binário;
+    # executar() devolve a saída em linhas, como a máquina virtual. Erros de execução (divisão por zero)
+    # saem pelo stderr com a mesma mensagem da máquina virtual e viram Exception.
+    def __init__(self, codigo_3ac, tabela_simbolos=None, compilador=None, opcoes=('-std=c99', '-O2')):
+        inicio = time.perf_counter()
+        self.fonte = GeradorC(codigo_3ac, tabela_simbolos).gerar()
+        meio = time.perf_counter()
+        self.diretorio = tempfile.mkdtemp(prefix='compilador_c_')
+        caminho_fonte = os.path.join(self.diretorio, 'programa.c')
+        self.executavel = os.path.join(self.diretorio, 'programa')
+        with open(caminho_fonte, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(self.fonte)
+        compilador = compilador or encontrar_compilador_c()
+        resultado = subprocess.run([compilador, *opcoes, '-o', self.executavel, caminho_fonte],
+                                   capture_output=True, text=True)
+        if resultado.returncode != 0:
+            raise Exception(f"Erro do gerador C: o compilador C falhou:\n{resultado.stderr.strip()}")
+        self.tempo_geracao = meio - inicio
+        self.tempo_compilacao = time.perf_counter() - meio
+        self.saida = []
+        self.tempo_execucao = 0.0
+
+    def executar(self, tempo_limite=None):
+        inicio = time.perf_counter()
+        try:
+            resultado = subprocess.run([self.executavel], capture_output=True, text=True, timeout=tempo_limite)
+        finally:
+            self.tempo_execucao = time.perf_counter() - inicio
+        self.saida = resultado.stdout.splitlines()
+        if resultado.returncode != 0:
+            mensagem = resultado.stderr.strip() or f"código de saída {resultado.returncode}"
+            raise Exception(mensagem if mensagem.startswith('Erro') else f"Erro de execução: {mensagem}.")
+        return self.saida
+
+    def remover(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+
+def conferir_com_maquina_virtual(classe_programa, descricao_compilacao, quantidade=20):
+    # Oráculo dos backends nativos: o binário gerado do 3AC otimizado tem de imprimir o mesmo que a máquina
+    # virtual executando o 3AC original, sem otimização; assim um erro de uma passagem do otimizador vira
+    # divergência em vez de aparecer dos dois lados. Erros de execução também entram na comparação.
+    from compilador import compilar
+    from maquina_virtual import MaquinaVirtual
+    from entradas_de_exemplo import entradas_de_exemplo
+    from gerador_de_programas import gerar_programa
+
+    programas = [(nome.split(':')[0], codigo) for nome, codigo in entradas_de_exemplo.items() if not nome.startswith('Erro')]
+    programas.extend((f'gerado #{semente}', gerar_programa(semente, funcoes=8, profundidade=3))
+                     for semente in range(quantidade))
+    divergencias = 0
+    for nome, codigo in programas:
+        compilacao = compilar(codigo)
+        vm = MaquinaVirtual(compilacao.codigo_3ac)
+        try:
+            esperado = (vm.executar(), None)
+        except Exception as e:
+            esperado = (vm.saida, str(e))
+        programa = classe_programa(compilacao.codigo_otimizado, compilacao.tabela_simbolos)
+        try:
+            obtido = (programa.executar(tempo_limite=60), None)
+        except Exception as e:
+            obtido = (programa.saida, str(e))
+        finally:
+            programa.remover()
+        confere = obtido == esperado
+        divergencias += not confere
+        print(f"{nome:<12} {'OK' if confere else 'DIVERGE'} | VM (sem otimização) {vm.tempo_execucao:.4f}s, nativo "
+              f"{programa.tempo_execucao:.4f}s ({descricao_compilacao} {programa.tempo_compilacao:.2f}s)")
+    print(f"{divergencias} divergência(s) em {len(programas)} programas")
+    return divergencias
+
+
+if __name__ == '__main__':
+    import sys
+
+    # Confere a saída do binário nativo com a da máquina virtual nos exemplos e em programas gerados
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    conferir_com_maquina_virtual(ProgramaC, os.path.basename(encontrar_compilador_c()), quantidade)
@@ -0,0 +1,244 @@
+import random
+
+MODULO = 10007
+
+
+class GeradorDeProgramas:
+    # Gera programas válidos para o AnalisadorSemantico, sempre os mesmos para a mesma semente.
+    # Valores são reduzidos com '% 10007' a cada atribuição e multiplicações usam só constantes
+    # pequenas, então tudo cabe em um int de 32 bits; laços têm poucas iterações e cada função tem
+    # um orçamento de instruções executadas para as chamadas que faz.
+    def __init__(self, semente=0, funcoes=10, profundidade=2, tamanho_expressao=4, comandos_por_bloco=4,
+                 globais=4, locais=4, proporcao_globais=0.3, iteracoes_laco=(2, 4), orcamento_funcao=3000):
+        self.aleatorio = random.Random(semente)
+        self.n_funcoes = funcoes
+        self.profundidade = profundidade
+        self.tamanho_expressao = max(1, tamanho_expressao)
+        self.comandos_por_bloco = max(1, comandos_por_bloco)
+        self.n_globais = globais
+        self.n_locais = locais
+        self.proporcao_globais = proporcao_globais
+        self.iteracoes_laco = iteracoes_laco
+        self.orcamento_funcao = orcamento_funcao
+
+    def gerar(self):
+        self.linhas = []
+        self.globais = [f"g{i}" for i in range(self.n_globais)]
+        self.funcoes = []
+        if self.globais:
+            self.linhas.append(f"int {', '.join(self.globais)};")
+            self.linhas.append("")
+            self.linhas.append("void inicializa() {")
+            for nome in self.globais:
+                self.linhas.append(f"    {nome} = {self.aleatorio.randint(0, 99)};")
+            self.linhas.append("}")
+            self.linhas.append("")
+        for indice in range(self.n_funcoes):
+            self._funcao(f"f{indice}")
+            self.linhas.append("")
+        self._main()
+        return "\n".join(self.linhas) + "\n"
+
+    # Escopos: pilha de listas com as variáveis inteiras e booleanas visíveis (já inicializadas)
+    def _abrir_escopo(self):
+        self.escopos.append(([], []))
+
+    def _fechar_escopo(self):
+        self.escopos.pop()
+
+    def _inteiros_locais(self):
+        return [v for inteiros, _ in self.escopos for v in inteiros]
+
+    def _booleanos(self):
+        return [v for _, booleanos in self.escopos for v in booleanos]
+
+    def _novo_nome(self, prefixo):
+        self.contador_nomes += 1
+        return f"{prefixo}{self.contador_nomes}"
+
+    def _emitir(self, nivel, texto):
+        self.linhas.append("    " * nivel + texto)
+
+    def _variavel_leitura(self):
+        locais = self._inteiros_locais()
+        if self.globais and (not locais or self.aleatorio.random() < self.proporcao_globais):
+            return self.aleatorio.choice(self.globais)
+        if locais:
+            return self.aleatorio.choice(locais)
+        return None
+
+    def _variavel_escrita(self):
+        locais = [v for v in self._inteiros_locais() if v not in self.contadores]
+        if self.globais and (not locais or self.aleatorio.random() < self.proporcao_globais):
+            return self.aleatorio.choice(self.globais)
+        if locais:
+            return self.aleatorio.choice(locais)
+        return None
+
+    def _chamada_permitida(self, tipo, multiplicador):
+        candidatas = [f for f in self.funcoes if f[1] == tipo
+                      and self.custo + multiplicador * f[3] <= self.orcamento_funcao]
+        return self.aleatorio.choice(candidatas) if candidatas else None
+
+    def _chamada(self, funcao, multiplicador):
+        nome, _, n_params, custo = funcao
+        self.custo += multiplicador * (custo + n_params + 4)
+        argumentos = [self._expressao(multiplicador, max(1, self.tamanho_expressao // 2), chamadas=False)
+                      for _ in range(n_params)]
+        return f"{nome}({', '.join(argumentos)})"
+
+    def _operando(self, multiplicador, chamadas):
+        sorteio = self.aleatorio.random()
+        if chamadas and sorteio < 0.15:
+            funcao = self._chamada_permitida('int', multiplicador)
+            if funcao:
+                return self._chamada(funcao, multiplicador)
+        variavel = self._variavel_leitura()
+        if variavel is None or sorteio > 0.8:
+            return str(self.aleatorio.randint(0, 99))
+        if sorteio > 0.65:
+            return f"{variavel} * {self.aleatorio.randint(2, 9)}"
+        if sorteio > 0.6:
+            return f"{variavel} / {self.aleatorio.randint(1, 9)}"
+        return variavel
+
+    def _expressao(self, multiplicador, tamanho=None, chamadas=True):
+        tamanho = tamanho or self.tamanho_expressao
+        n = self.aleatorio.randint(1, tamanho)
+        self.custo += multiplicador * 2 * n
+        partes = [self._operando(multiplicador, chamadas)]
+        for _ in range(n - 1):
+            if self.aleatorio.random() < 0.15 and n > 2:
+                sub = self._expressao(multiplicador, max(1, tamanho // 2), chamadas)
+                partes.append(self.aleatorio.choice('+-') + f" ({sub})")
+            else:
+                partes.append(self.aleatorio.choice('+-') + " " + self._operando(multiplicador, chamadas))
+        return " ".join(partes)
+
+    def _condicao(self, multiplicador):
+        booleanos = self._booleanos()
+        if booleanos and self.aleatorio.random() < 0.25:
+            return self.aleatorio.choice(booleanos)
+        tamanho = max(1, self.tamanho_expressao // 2)
+        operador = self.aleatorio.choice(['<', '<=', '>', '>=', '==', '!='])
+        condicao = (f"{self._expressao(multiplicador, tamanho, False)} {operador} "
+                    f"{self._expressao(multiplicador, tamanho, False)}")
+        sorteio = self.aleatorio.random()
+        if sorteio < 0.15:
+            outro = self.aleatorio.choice(['<', '>', '!='])
+            ligacao = self.aleatorio.choice(['&&', '||'])
+            condicao += f" {ligacao} {self._expressao(multiplicador, tamanho, False)} {outro} {self.aleatorio.randint(0, 99)}"
+        elif sorteio < 0.25:
+            condicao = f"!({condicao})"
+        return condicao
+
+    def _atribuicao(self, nivel, multiplicador):
+        destino = self._variavel_escrita()
+        if destino is None:
+            return
+        self._emitir(nivel, f"{destino} = ({self._expressao(multiplicador)}) % {MODULO};")
+        self.custo += multiplicador * 3
+
+    def _bloco(self, nivel, profundidade, multiplicador, dentro_de_laco):
+        self._abrir_escopo()
+        for _ in range(self.aleatorio.randint(1, self.comandos_por_bloco)):
+            self._comando(nivel, profundidade, multiplicador, dentro_de_laco)
+        self._fechar_escopo()
+
+    def _comando(self, nivel, profundidade, multiplicador, dentro_de_laco):
+        sorteio = self.aleatorio.random()
+        if profundidade > 0 and sorteio < 0.2:
+            self._emitir(nivel, f"if ({self._condicao(multiplicador)}) {{")
+            self._bloco(nivel + 1, profundidade - 1, multiplicador, dentro_de_laco)
+            if self.aleatorio.random() < 0.5:
+                self._emitir(nivel, "} else {")
+                self._bloco(nivel + 1, profundidade - 1, multiplicador, dentro_de_laco)
+            self._emitir(nivel, "}")
+        elif profundidade > 0 and sorteio < 0.35:
+            iteracoes = self.aleatorio.randint(*self.iteracoes_laco)
+            contador = self._novo_nome('i')
+            self._emitir(nivel, f"int {contador};")
+            self._emitir(nivel, f"{contador} = {iteracoes};")
+            self.escopos[-1][0].append(contador)
+            self.contadores.add(contador)
+            self._emitir(nivel, f"while ({contador} > 0) {{")
+            self._emitir(nivel + 1, f"{contador} = {contador} - 1;")
+            self._bloco(nivel + 1, profundidade - 1, multiplicador * iteracoes, True)
+            if self.aleatorio.random() < 0.2:
+                self._emitir(nivel + 1, f"if ({self._condicao(multiplicador * iteracoes)}) {{")
+                self._emitir(nivel + 2, self.aleatorio.choice(['break;', 'continue;']))
+                self._emitir(nivel + 1, "}")
+            self._emitir(nivel, "}")
+            self.custo += multiplicador * iteracoes * 4
+        elif sorteio < 0.45:
+            nome = self._novo_nome('b')
+            self._emitir(nivel, f"bool {nome};")
+            self._emitir(nivel, f"{nome} = {self._condicao(multiplicador)};")
+            self.escopos[-1][1].append(nome)
+        elif sorteio < 0.55:
+            nome = self._novo_nome('a')
+            self._emitir(nivel, f"int {nome};")
+            self._emitir(nivel, f"{nome} = ({self._expressao(multiplicador)}) % {MODULO};")
+            self.escopos[-1][0].append(nome)
+        elif sorteio < 0.62:
+            funcao = self._chamada_permitida('void', multiplicador)
+            if funcao:
+                self._emitir(nivel, f"{self._chamada(funcao, multiplicador)};")
+            else:
+                self._atribuicao(nivel, multiplicador)
+        elif sorteio < 0.67 and multiplicador == 1:
+            self._emitir(nivel, f"print({self._expressao(multiplicador)});")
+        else:
+            self._atribuicao(nivel, multiplicador)
+
+    def _funcao(self, nome):
+        tipo = 'int' if self.aleatorio.random() < 0.75 else 'void'
+        n_params = self.aleatorio.randint(0, 3)
+        params = [f"p{i}" for i in range(n_params)]
+        self.escopos = [(list(params), [])]
+        self.contadores = set()
+        self.contador_nomes = 0
+        self.custo = 0
+        self.linhas.append(f"{tipo} {nome}({', '.join(f'int {p}' for p in params)}) {{")
+        locais = [self._novo_nome('a') for _ in range(self.n_locais)]
+        if locais:
+            self._emitir(1, f"int {', '.join(locais)};")
+            for local in locais:
+                self._emitir(1, f"{local} = ({self._expressao(1)}) % {MODULO};")
+                self.escopos[-1][0].append(local)
+        self._bloco(1, self.profundidade, 1, False)
+        if tipo == 'int':
+            self._emitir(1, f"return ({self._expressao(1)}) % {MODULO};")
+        self.linhas.append("}")
+        self.funcoes.append((nome, tipo, n_params, self.custo + 4))
+
+    def _main(self):
+        self.escopos = [([], [])]
+        self.contadores = set()
+        self.contador_nomes = 0
+        self.custo = 0
+        self.linhas.append("int main() {")
+        self._emitir(1, "int r;")
+        self._emitir(1, "r = 0;")
+        if self.globais:
+            self._emitir(1, "inicializa();")
+        for funcao in self.funcoes:
+            nome, tipo, n_params, _ = funcao
+            argumentos = ", ".join(str(self.aleatorio.randint(0, 20)) for _ in range(n_params))
+            if tipo == 'int':
+                self._emitir(1, f"r = (r + {nome}({argumentos})) % {MODULO};")
+            else:
+                self._emitir(1, f"{nome}({argumentos});")
+        self._emitir(1, "print(r);")
+        for variavel in self.globais:
+            self._emitir(1, f"print({variavel});")
+        self._emitir(1, "return 0;")
+        self.linhas.append("}")
+
+
+def gerar_programa(semente=0, **parametros):
+    return GeradorDeProgramas(semente, **parametros).gerar()
+
+
+if __name__ == '__main__':
+    print(gerar_programa())
@@ -0,0 +1,727 @@
+import os
+import re
+import shutil
+import struct
+import tempfile
+import subprocess
+import time
+from codigo_intermediario import (
+    ler_3ac,
+    OP_DECLARE, OP_FUNCAO, OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_IF_FALSE, OP_PARAM,
+    OP_FORMAL, OP_CALL, OP_RETURN, OP_RET, OP_PRINT, OP_HALT, OP_COPIA, OP_BINARIA, OP_UNARIA
+)
+from alocacao_registradores import AlocacaoRegistradores
+from gerador_c import (
+    GeradorC, ProgramaC, ARITMETICOS, COMPARACOES, literal_c, tipo_constante, encontrar_compilador_c,
+    conferir_com_maquina_virtual
+)
+
+# Registradores dos temporários t0..t(k-1): só os preservados entre chamadas no System V (callee-saved),
+# assim nem as chamadas do programa nem as do runtime precisam salvar temporários vivos
+REGISTRADORES = ('%rbx', '%r12', '%r13', '%r14', '%r15')
+ARGUMENTOS_INTEIROS = ('%rdi', '%rsi', '%rdx', '%rcx', '%r8', '%r9')
+ARGUMENTOS_FLOAT = ('%xmm0', '%xmm1', '%xmm2', '%xmm3', '%xmm4', '%xmm5', '%xmm6', '%xmm7')
+# Sufixo do setcc de cada comparação entre inteiros e o do desvio contrário (usado pelo if_false seguinte)
+CONDICOES = {'==': ('e', 'ne'), '!=': ('ne', 'e'), '<': ('l', 'ge'), '<=': ('le', 'g'), '>': ('g', 'le'), '>=': ('ge', 'l')}
+INSTRUCOES_INTEIRAS = {'+': 'addq', '-': 'subq', '*': 'imulq'}
+INSTRUCOES_FLOAT = {'+': 'addsd', '-': 'subsd', '*': 'mulsd', '/': 'divsd'}
+MENSAGEM_DIVISAO = "Erro de execução: divisão por zero."
+
+# Runtime: impressão com a libc (o float com o mesmo texto do repr() do Python, como no gerador C) e a
+# saída por divisão por zero, que esvazia o stdout antes de escrever a mensagem no stderr
+RUNTIME_X86 = f'''    .section .rodata
+.Lformato_i:
+    .string "%lld\\n"
+.Lformato_e:
+    .string "%.*e"
+.Lformato_f:
+    .string "%.*f\\n"
+.Lnan:
+    .string "nan"
+.Linf:
+    .string "inf"
+.Lmenos_inf:
+    .string "-inf"
+.Ldivisao:
+    .ascii {literal_c(MENSAGEM_DIVISAO + chr(10))}
+.Ldivisao_fim:
+    .align 8
+.Lmaior:
+    .double 1.7976931348623157e308
+.Lmenor:
+    .double -1.7976931348623157e308
+
+    .text
+_imprimir_i:
+    subq $8, %rsp
+    movq %rdi, %rsi
+    leaq .Lformato_i(%rip), %rdi
+    xorl %eax, %eax
+    call printf@PLT
+    addq $8, %rsp
+    ret
+
+_imprimir_s:
+    subq $8, %rsp
+    call puts@PLT
+    addq $8, %rsp
+    ret
+
+# -48(%rbp): texto; -56(%rbp): o valor; -60(%rbp): dígitos
+_imprimir_f:
+    pushq %rbp
+    movq %rsp, %rbp
+    subq $64, %rsp
+    movsd %xmm0, -56(%rbp)
+    leaq .Lnan(%rip), %rdi
+    ucomisd %xmm0, %xmm0
+    jp .Lescrever
+    leaq .Linf(%rip), %rdi
+    ucomisd .Lmaior(%rip), %xmm0
+    ja .Lescrever
+    leaq .Lmenos_inf(%rip), %rdi
+    movsd .Lmenor(%rip), %xmm1
+    ucomisd %xmm0, %xmm1
+    ja .Lescrever
+    movl $1, -60(%rbp)
+.Ldigitos:
+    leaq -48(%rbp), %rdi
+    movl $40, %esi
+    leaq .Lformato_e(%rip), %rdx
+    movl -60(%rbp), %ecx
+    decl %ecx
+    movsd -56(%rbp), %xmm0
+    movl $1, %eax
+    call snprintf@PLT
+    cmpl $17, -60(%rbp)
+    jge .Lexpoente
+    leaq -48(%rbp), %rdi
+    xorl %esi, %esi
+    call strtod@PLT
+    ucomisd -56(%rbp), %xmm0
+    jp .Lmais_digitos
+    je .Lexpoente
+.Lmais_digitos:
+    incl -60(%rbp)
+    jmp .Ldigitos
+.Lexpoente:
+    leaq -48(%rbp), %rdi
+    movl $101, %esi
+    call strchr@PLT
+    leaq 1(%rax), %rdi
+    call atoi@PLT
+    leaq -48(%rbp), %rdi
+    cmpl $-4, %eax
+    jl .Lescrever
+    cmpl $16, %eax
+    jge .Lescrever
+    movl -60(%rbp), %esi
+    decl %esi
+    subl %eax, %esi
+    movl $1, %eax
+    cmpl %eax, %esi
+    cmovl %eax, %esi
+    leaq .Lformato_f(%rip), %rdi
+    movsd -56(%rbp), %xmm0
+    movl $1, %eax
+    call printf@PLT
+    leave
+    ret
+.Lescrever:
+    call puts@PLT
+    leave
+    ret
+
+# Chegamos aqui por desvio, de qualquer alinhamento de pilha
+_divisao_por_zero:
+    andq $-16, %rsp
+    xorl %edi, %edi
+    call fflush@PLT
+    movl $2, %edi
+    leaq .Ldivisao(%rip), %rsi
+    movl $(.Ldivisao_fim - .Ldivisao), %edx
+    call write@PLT
+    movl $1, %edi
+    call exit@PLT
+'''
+
+
+def imediato(valor):
+    if -2 ** 31 <= valor < 2 ** 31:
+        return f"${valor}"
+    return None
+
+
+class GeradorX86:
+    # Gera assembly x86-64 (sintaxe AT&T do GNU as, ABI System V) a partir do 3AC, em geral o otimizado.
+    # Os tipos e as versões de cada função por tipos dos argumentos vêm da inferência do GeradorC. Todo
+    # valor ocupa 8 bytes: inteiro (int e bool) como long long, float como double (os bits ficam em
+    # registradores de uso geral e passam por %xmm só nas contas) e char como endereço do texto.
+    # Temporários: a alocação por varredura linear (AlocacaoRegistradores) é refeita com k registradores;
+    # t0..t(k-1) ficam nos REGISTRADORES e t(k), t(k+1)... em posições do quadro. Locais e formais ficam no
+    # quadro, no deslocamento dado pelo 'endereco' que o analisador semântico atribuiu (4 por símbolo, a
+    # partir do primeiro símbolo da função; dobrado aqui porque cada valor ocupa 8 bytes). Nomes fora da
+    # tabela (criados pelo otimizador, ou sem tabela_simbolos) recebem os endereços seguintes.
+    # Quadro, a partir de %rbp: locais, posições dos temporários, 'param' guardados e registradores salvos.
+    def __init__(self, codigo_3ac, tabela_simbolos=None, registradores=len(REGISTRADORES)):
+        if not 1 <= registradores <= len(REGISTRADORES):
+            raise Exception(f"Erro do gerador x86-64: número de registradores inválido ({registradores}, "
+                            f"use de 1 a {len(REGISTRADORES)}).")
+        if codigo_3ac and isinstance(codigo_3ac[0], str):
+            codigo_3ac = ler_3ac(codigo_3ac)
+        self.registradores = registradores
+        alocacao = AlocacaoRegistradores(codigo_3ac, registradores)
+        self.codigo = alocacao.aplicar()
+        self.alocacao = alocacao.funcoes
+        self.tipos = GeradorC(self.codigo, tabela_simbolos)
+        self.enderecos = {}
+        for simbolo in tabela_simbolos or ():
+            self.enderecos.setdefault(simbolo['escopo'], {})[simbolo['identificador']] = simbolo['endereco']
+        self.textos = {}
+        self.doubles = {}
+        self.linhas = []
+
+    # Constantes no .rodata
+
+    def _rotulo_texto(self, valor):
+        if valor not in self.textos:
+            self.textos[valor] = f".LS{len(self.textos)}"
+        return self.textos[valor]
+
+    def _rotulo_double(self, valor):
+        bits = struct.unpack('<Q', struct.pack('<d', valor))[0]
+        if bits not in self.doubles:
+            self.doubles[bits] = f".LD{len(self.doubles)}"
+        return self.doubles[bits]
+
+    # Quadro e lugar de cada operando
+
+    def _quadro(self, funcao, versao):
+        enderecos = self.enderecos.get(funcao.nome, {})
+        base = min(enderecos.values(), default=4) - 4
+        proximo = max(enderecos.values(), default=base) + 4
+        lugares = {}
+        topo = 0
+        for operandos in funcao.operandos:
+            for operando in operandos:
+                if operando is None or operando[0] != 'l' or operando in lugares:
+                    continue
+                endereco = enderecos.get(operando[1])
+                if endereco is None:
+                    endereco = proximo
+                    proximo += 4
+                deslocamento = 2 * (endereco - base)
+                lugares[operando] = f"-{deslocamento}(%rbp)"
+                topo = max(topo, deslocamento)
+        k = self.registradores
+        usados = set()
+        posicoes = 0
+        for pos, operandos in enumerate(funcao.operandos):
+            if versao['tipos'][pos] is None:
+                continue
+            for operando in operandos:
+                if operando is None or operando[0] != 't' or operando in lugares:
+                    continue
+                numero = re.fullmatch(r't(\d+)', operando[1])
+                if numero is None:
+                    raise Exception(f"Erro do gerador x86-64: temporário '{operando[1]}' não alocado.")
+                numero = int(numero.group(1))
+                if numero < k:
+                    lugares[operando] = REGISTRADORES[numero]
+                    usados.add(REGISTRADORES[numero])
+                else:
+                    lugares[operando] = f"-{topo + 8 * (numero - k + 1)}(%rbp)"
+                    posicoes = max(posicoes, numero - k + 1)
+        topo += 8 * posicoes
+        # 'param' que não ficam logo antes do seu 'call' são copiados para o quadro na hora
+        parametros = {}
+        for pos, argumentos in funcao.argumentos.items():
+            if versao['tipos'][pos] is None:
+                continue
+            for p in argumentos:
+                if any(funcao.trecho[q].op != OP_PARAM for q in range(p + 1, pos)):
+                    topo += 8
+                    parametros[p] = f"-{topo}(%rbp)"
+        salvos = []
+        for registrador in REGISTRADORES:
+            if registrador in usados:
+                topo += 8
+                salvos.append((registrador, f"-{topo}(%rbp)"))
+        return lugares, parametros, salvos, (topo + 15) // 16 * 16
+
+    def _representacao(self, operando, tipo):
+        # 'i' inteiro, 'f' double ou 's' endereço de texto; um nome que em algum ponto junta inteiro e
+        # float ('m') é sempre double, como a variável C do GeradorC
+        classe = operando[0]
+        if classe == 'c':
+            tipo = tipo_constante(operando[1])
+        elif classe == 'g':
+            tipo = self.tipos.tipos_globais.get(operando[1])
+        elif operando in self.misturados:
+            return 'f'
+        return 'f' if tipo in ('f', 'm') else 's' if tipo == 's' else 'i'
+
+    def _lugar(self, operando):
+        if operando[0] == 'g':
+            return f"g_{operando[1]}(%rip)"
+        return self.lugares[operando]
+
+    # Emissão
+
+    def _emitir(self, texto):
+        self.linhas.append(f"    {texto}")
+
+    def _inteiro_em(self, valor, registrador):
+        if not -2 ** 63 <= valor < 2 ** 63:
+            raise Exception(f"Erro do gerador x86-64: constante {valor} não cabe em 64 bits.")
+        if imediato(valor):
+            self._emitir(f"movq ${valor}, {registrador}")
+        else:
+            self._emitir(f"movabsq ${valor}, {registrador}")
+
+    def _para_gpr(self, operando, tipo, representacao, registrador):
+        # Carrega o operando em um registrador de uso geral na representação pedida
+        if operando[0] == 'c':
+            valor = operando[1]
+            if representacao == 's':
+                self._emitir(f"leaq {self._rotulo_texto(valor)}(%rip), {registrador}")
+            elif representacao == 'f':
+                self._emitir(f"movq {self._rotulo_double(float(valor))}(%rip), {registrador}")
+            else:
+                self._inteiro_em(int(valor), registrador)
+            return
+        origem = self._representacao(operando, tipo)
+        lugar = self._lugar(operando)
+        if origem == representacao or 's' in (origem, representacao):
+            if lugar != registrador:
+                self._emitir(f"movq {lugar}, {registrador}")
+        elif representacao == 'i':
+            self._emitir(f"movq {lugar}, %xmm15")
+            self._emitir(f"cvttsd2siq %xmm15, {registrador}")
+        else:
+            self._emitir(f"cvtsi2sdq {lugar}, %xmm15")
+            self._emitir(f"movq %xmm15, {registrador}")
+
+    def _para_xmm(self, operando, tipo, registrador):
+        if operando[0] == 'c':
+            self._emitir(f"movsd {self._rotulo_double(float(operando[1]))}(%rip), {registrador}")
+        elif self._representacao(operando, tipo) == 'f':
+            self._emitir(f"movq {self._lugar(operando)}, {registrador}")
+        else:
+            self._emitir(f"cvtsi2sdq {self._lugar(operando)}, {registrador}")
+
+    def _guardar(self, operando, tipo, registrador, origem):
+        # Guarda um registrador de uso geral (na representação 'origem') no lugar do operando
+        representacao = self._representacao(operando, tipo)
+        lugar = self._lugar(operando)
+        if representacao != origem and 's' not in (representacao, origem):
+            if representacao == 'i':
+                self._emitir(f"movq {registrador}, %xmm15")
+                self._emitir(f"cvttsd2siq %xmm15, {registrador}")
+            else:
+                self._emitir(f"cvtsi2sdq {registrador}, %xmm15")
+                self._emitir(f"movq %xmm15, {registrador}")
+        if lugar != registrador:
+            self._emitir(f"movq {registrador}, {lugar}")
+
+    def _guardar_xmm(self, operando, tipo, registrador):
+        if self._representacao(operando, tipo) == 'f':
+            self._emitir(f"movq {registrador}, {self._lugar(operando)}")
+        else:
+            self._emitir(f"cvttsd2siq {registrador}, %rax")
+            self._emitir(f"movq %rax, {self._lugar(operando)}")
+
+    def _fonte_inteira(self, operando, tipo):
+        # Operando inteiro usável direto como fonte (imediato de 32 bits, registrador ou memória), ou None
+        if operando[0] == 'c':
+            return None if isinstance(operando[1], (str, float)) else imediato(int(operando[1]))
+        if self._representacao(operando, tipo) == 'i':
+            return self._lugar(operando)
+        return None
+
+    def _copia(self, dest, tipo_dest, a, tipo_a):
+        representacao = self._representacao(dest, tipo_dest)
+        lugar = self._lugar(dest)
+        if lugar.startswith('%'):
+            self._para_gpr(a, tipo_a, representacao, lugar)
+            return
+        fonte = self._fonte_inteira(a, tipo_a) if representacao == 'i' else None
+        if fonte is None and a[0] != 'c' and self._representacao(a, tipo_a) == representacao:
+            fonte = self._lugar(a)
+        if fonte is not None and not fonte.endswith(')'):
+            self._emitir(f"movq {fonte}, {lugar}")
+            return
+        self._para_gpr(a, tipo_a, representacao, '%rax')
+        self._emitir(f"movq %rax, {lugar}")
+
+    def _verdade(self, operando, tipo):
+        # %al = 1 se o operando é verdadeiro (diferente de zero; texto não vazio), senão 0
+        representacao = self._representacao(operando, tipo)
+        if representacao == 'f':
+            self._para_xmm(operando, tipo, '%xmm0')
+            self._emitir("xorpd %xmm1, %xmm1")
+            self._emitir("ucomisd %xmm1, %xmm0")
+            self._emitir("setne %al")
+            self._emitir("setp %cl")
+            self._emitir("orb %cl, %al")
+            return
+        self._para_gpr(operando, tipo, representacao, '%rax')
+        self._emitir("cmpb $0, (%rax)" if representacao == 's' else "testq %rax, %rax")
+        self._emitir("setne %al")
+
+    def _binaria(self, instrucao, dest, a, b, tipos):
+        # Devolve o sufixo do desvio contrário quando deixa nos flags uma comparação entre inteiros
+        tipo_dest, tipo_a, tipo_b = tipos
+        oper = instrucao.oper
+        representacoes = (self._representacao(a, tipo_a), self._representacao(b, tipo_b))
+        if oper in ('&&', '||'):
+            self._verdade(a, tipo_a)
+            self._emitir("movb %al, %r10b")
+            self._verdade(b, tipo_b)
+            self._emitir(f"{'andb' if oper == '&&' else 'orb'} %r10b, %al")
+            self._emitir("movzbl %al, %eax")
+            self._guardar(dest, tipo_dest, '%rax', 'i')
+        elif oper in COMPARACOES and 's' in representacoes:
+            self._para_gpr(a, tipo_a, 's', '%rdi')
+            self._para_gpr(b, tipo_b, 's', '%rsi')
+            self._emitir("call strcmp@PLT")
+            self._emitir("cmpl $0, %eax")
+            self._emitir(f"set{CONDICOES[oper][0]} %al")
+            self._emitir("movzbl %al, %eax")
+            self._guardar(dest, tipo_dest, '%rax', 'i')
+        elif representacoes == ('i', 'i'):
+            return self._binaria_inteira(oper, dest, a, b, tipos)
+        elif oper in COMPARACOES:
+            self._comparacao_float(oper, dest, a, b, tipos)
+        elif oper in ARITMETICOS:
+            self._para_xmm(a, tipo_a, '%xmm0')
+            self._para_xmm(b, tipo_b, '%xmm1')
+            if oper in ('/', '%'):
+                self._emitir("xorpd %xmm2, %xmm2")
+                self._emitir("ucomisd %xmm2, %xmm1")
+                self._emitir("jp 1f")
+                self._emitir("je _divisao_por_zero")
+                self.linhas.append("1:")
+            if oper == '%':
+                # Como a máquina virtual: a - b * (a / b)
+                self._emitir("movapd %xmm0, %xmm2")
+                self._emitir("divsd %xmm1, %xmm2")
+                self._emitir("mulsd %xmm1, %xmm2")
+                self._emitir("subsd %xmm2, %xmm0")
+            else:
+                self._emitir(f"{INSTRUCOES_FLOAT[oper]} %xmm1, %xmm0")
+            self._guardar_xmm(dest, tipo_dest, '%xmm0')
+        else:
+            raise Exception(f"Erro do gerador x86-64: operador desconhecido '{oper}' em '{instrucao}'.")
+        return None
+
+    def _binaria_inteira(self, oper, dest, a, b, tipos):
+        tipo_dest, tipo_a, tipo_b = tipos
+        if oper in ('/', '%'):
+            self._para_gpr(b, tipo_b, 'i', '%rcx')
+            if b[0] != 'c' or not b[1]:
+                self._emitir("testq %rcx, %rcx")
+                self._emitir("je _divisao_por_zero")
+            self._para_gpr(a, tipo_a, 'i', '%rax')
+            self._emitir("cqto")
+            self._emitir("idivq %rcx")
+            self._guardar(dest, tipo_dest, '%rax' if oper == '/' else '%rdx', 'i')
+            return None
+        fonte_b = self._fonte_inteira(b, tipo_b)
+        if fonte_b is None:
+            self._para_gpr(b, tipo_b, 'i', '%rcx')
+            fonte_b = '%rcx'
+        if oper in COMPARACOES:
+            fonte_a = self._fonte_inteira(a, tipo_a)
+            if fonte_a is None or not fonte_a.startswith('%'):
+                self._para_gpr(a, tipo_a, 'i', '%rax')
+                fonte_a = '%rax'
+            self._emitir(f"cmpq {fonte_b}, {fonte_a}")
+            self._emitir(f"set{CONDICOES[oper][0]} %al")
+            self._emitir("movzbl %al, %eax")
+            self._guardar(dest, tipo_dest, '%rax', 'i')
+            return CONDICOES[oper][1]
+        lugar = self._lugar(dest)
+        destino_inteiro = self._representacao(dest, tipo_dest) == 'i'
+        if (destino_inteiro and oper != '*' and a[0] != 'c' and self._lugar(a) == lugar
+                and not (lugar.endswith(')') and fonte_b.endswith(')'))):
+            # dest = dest + b direto no lugar, também na memória
+            self._emitir(f"{INSTRUCOES_INTEIRAS[oper]} {fonte_b}, {lugar}")
+            return None
+        alvo = lugar if destino_inteiro and lugar.startswith('%') and lugar != fonte_b else '%rax'
+        self._para_gpr(a, tipo_a, 'i', alvo)
+        self._emitir(f"{INSTRUCOES_INTEIRAS[oper]} {fonte_b}, {alvo}")
+        self._guardar(dest, tipo_dest, alvo, 'i')
+        return None
+
+    def _comparacao_float(self, oper, dest, a, b, tipos):
+        tipo_dest, tipo_a, tipo_b = tipos
+        self._para_xmm(a, tipo_a, '%xmm0')
+        self._para_xmm(b, tipo_b, '%xmm1')
+        # Com NaN (não ordenado) só '!=' é verdadeiro: < e <= comparam b com a para usar seta/setae
+        if oper in ('<', '<='):
+            self._emitir("ucomisd %xmm0, %xmm1")
+        else:
+            self._emitir("ucomisd %xmm1, %xmm0")
+        if oper == '==':
+            self._emitir("sete %al")
+            self._emitir("setnp %cl")
+            self._emitir("andb %cl, %al")
+        elif oper == '!=':
+            self._emitir("setne %al")
+            self._emitir("setp %cl")
+            self._emitir("orb %cl, %al")
+        else:
+            self._emitir(f"set{'a' if oper in ('<', '>') else 'ae'} %al")
+        self._emitir("movzbl %al, %eax")
+        self._guardar(dest, tipo_dest, '%rax', 'i')
+
+    def _if_false(self, a, tipo_a, destino):
+        representacao = self._representacao(a, tipo_a)
+        if a[0] == 'c':
+            if not a[1]:
+                self._emitir(f"jmp {destino}")
+        elif representacao == 'i':
+            lugar = self._lugar(a)
+            self._emitir(f"testq {lugar}, {lugar}" if lugar.startswith('%') else f"cmpq $0, {lugar}")
+            self._emitir(f"je {destino}")
+        elif representacao == 'f':
+            self._para_xmm(a, tipo_a, '%xmm0')
+            self._emitir("xorpd %xmm1, %xmm1")
+            self._emitir("ucomisd %xmm1, %xmm0")
+            self._emitir("jp 1f")
+            self._emitir(f"je {destino}")
+            self.linhas.append("1:")
+        else:
+            self._para_gpr(a, tipo_a, 's', '%rax')
+            self._emitir("cmpb $0, (%rax)")
+            self._emitir(f"je {destino}")
+
+    def _chamada(self, funcao, versao, pos, dest, tipo_dest):
+        chamada = versao['chamadas'][pos]
+        inteiros, floats, pilha = [], [], []
+        for p, tipo_formal in zip(funcao.argumentos[pos], chamada[1]):
+            flutuante = tipo_formal in ('f', 'm')
+            argumento = (p, flutuante, 'f' if flutuante else 's' if tipo_formal == 's' else 'i')
+            if flutuante and len(floats) < len(ARGUMENTOS_FLOAT):
+                floats.append(argumento)
+            elif not flutuante and len(inteiros) < len(ARGUMENTOS_INTEIROS):
+                inteiros.append(argumento)
+            else:
+                pilha.append(argumento)
+
+        def carregar(argumento, registrador):
+            p, flutuante, representacao = argumento
+            guardado = self.parametros.get(p)
+            if guardado is not None:
+                self._emitir(f"movq {guardado}, {registrador}")
+            elif registrador.startswith('%xmm'):
+                self._para_xmm(funcao.operandos[p][1], versao['tipos'][p][1], registrador)
+            else:
+                self._para_gpr(funcao.operandos[p][1], versao['tipos'][p][1], representacao, registrador)
+
+        # Argumentos além dos registradores vão na pilha, o primeiro no topo, mantendo %rsp alinhado em 16
+        desempilhar = 8 * (len(pilha) + len(pilha) % 2)
+        if len(pilha) % 2:
+            self._emitir("subq $8, %rsp")
+        for argumento in reversed(pilha):
+            carregar(argumento, '%rax')
+            self._emitir("pushq %rax")
+        for argumento, registrador in zip(inteiros, ARGUMENTOS_INTEIROS):
+            carregar(argumento, registrador)
+        for argumento, registrador in zip(floats, ARGUMENTOS_FLOAT):
+            carregar(argumento, registrador)
+        self._emitir(f"call {self.tipos._nome_versao(chamada)}")
+        if desempilhar:
+            self._emitir(f"addq ${desempilhar}, %rsp")
+        retorno = self.tipos.tipos_retorno.get(chamada)
+        if dest is not None and retorno is not None:
+            if retorno in ('f', 'm'):
+                self._guardar_xmm(dest, tipo_dest, '%xmm0')
+            else:
+                self._guardar(dest, tipo_dest, '%rax', retorno if retorno == 's' else 'i')
+
+    def _parametro(self, funcao, versao, pos):
+        # 'param' longe do 'call': o valor é copiado agora, já na representação que o formal espera
+        call = next(q for q, argumentos in funcao.argumentos.items() if pos in argumentos)
+        tipo_formal = dict(zip(funcao.argumentos[call], versao['chamadas'][call][1])).get(pos)
+        if tipo_formal is None:
+            return
+        representacao = 'f' if tipo_formal in ('f', 'm') else 's' if tipo_formal == 's' else 'i'
+        self._para_gpr(funcao.operandos[pos][1], versao['tipos'][pos][1], representacao, '%rax')
+        self._emitir(f"movq %rax, {self.parametros[pos]}")
+
+    def _prologo(self, funcao, chave, nome, tamanho, salvos):
+        self.linhas.append(f"{nome}:")
+        self._emitir("pushq %rbp")
+        self._emitir("movq %rsp, %rbp")
+        if tamanho:
+            self._emitir(f"subq ${tamanho}, %rsp")
+        for registrador, lugar in salvos:
+            self._emitir(f"movq {registrador}, {lugar}")
+        inteiros = floats = pilha = 0
+        for formal, tipo in zip(funcao.formais, chave[1]):
+            operando = ('l', formal)
+            if tipo in ('f', 'm') and floats < len(ARGUMENTOS_FLOAT):
+                self._guardar_xmm(operando, tipo, ARGUMENTOS_FLOAT[floats])
+                floats += 1
+                continue
+            if tipo not in ('f', 'm') and inteiros < len(ARGUMENTOS_INTEIROS):
+                registrador = ARGUMENTOS_INTEIROS[inteiros]
+                inteiros += 1
+            else:
+                self._emitir(f"movq {16 + 8 * pilha}(%rbp), %rax")
+                registrador = '%rax'
+                pilha += 1
+            self._guardar(operando, tipo, registrador, 'f' if tipo in ('f', 'm') else 's' if tipo == 's' else 'i')
+
+    def _funcao(self, chave, versao):
+        funcao = self.tipos.funcoes[chave[0]]
+        nome = self.tipos._nome_versao(chave)
+        self.misturados = {('l', formal) for formal, tipo in zip(funcao.formais, chave[1]) if tipo == 'm'}
+        for pos, tipos in enumerate(versao['tipos']):
+            if tipos is not None:
+                self.misturados.update(o for o, t in zip(funcao.operandos[pos], tipos)
+                                       if o is not None and o[0] in 'tl' and t == 'm')
+        self.lugares, self.parametros, salvos, tamanho = self._quadro(funcao, versao)
+        retorno = self.tipos.tipos_retorno.get(chave)
+        fim = f".L{nome}__fim"
+        self._prologo(funcao, chave, nome, tamanho, salvos)
+        desvio = None
+        for pos, instrucao in enumerate(funcao.trecho):
+            if versao['tipos'][pos] is None:
+                # Bloco inalcançável: a inferência não passou por ele
+                continue
+            op = instrucao.op
+            dest, a, b = funcao.operandos[pos]
+            tipos = versao['tipos'][pos]
+            pendente, desvio = desvio, None
+            if op == OP_ROTULO or (op == OP_FUNCAO and pos == 0):
+                self.linhas.append(f".L{nome}_{instrucao.a.valor}:")
+            elif op == OP_COPIA:
+                self._copia(dest, tipos[0], a, tipos[1])
+            elif op == OP_BINARIA:
+                desvio = self._binaria(instrucao, dest, a, b, tipos)
+                desvio = (dest, desvio) if desvio else None
+            elif op == OP_UNARIA:
+                self._verdade(a, tipos[1])
+                self._emitir("xorb $1, %al")
+                self._emitir("movzbl %al, %eax")
+                self._guardar(dest, tipos[0], '%rax', 'i')
+            elif op == OP_DECLARE:
+                self._emitir(f"movq $0, {self._lugar(dest)}")
+            elif op == OP_PRINT:
+                representacao = self._representacao(a, tipos[1])
+                if representacao == 'f':
+                    self._para_xmm(a, tipos[1], '%xmm0')
+                else:
+                    self._para_gpr(a, tipos[1], representacao, '%rdi')
+                self._emitir(f"call _imprimir_{representacao}")
+            elif op == OP_PARAM:
+                if pos in self.parametros:
+                    self._parametro(funcao, versao, pos)
+            elif op == OP_CALL:
+                self._chamada(funcao, versao, pos, dest, tipos[0])
+            elif op == OP_GOTO:
+                self._emitir(f"jmp .L{nome}_{self.tipos._rotulo(funcao, instrucao.a.valor)}")
+            elif op == OP_IF_FALSE:
+                destino = f".L{nome}_{self.tipos._rotulo(funcao, instrucao.b.valor)}"
+                if pendente is not None and pendente[0] == a:
+                    # Comparação logo antes: os flags ainda valem, basta o desvio contrário
+                    self._emitir(f"j{pendente[1]} {destino}")
+                else:
+                    self._if_false(a, tipos[1], destino)
+            elif op == OP_RETURN:
+                if retorno in ('f', 'm'):
+                    self._para_xmm(a, tipos[1], '%xmm0')
+                elif retorno is not None:
+                    self._para_gpr(a, tipos[1], 's' if retorno == 's' else 'i', '%rax')
+                self._emitir(f"jmp {fim}")
+            elif op == OP_RET:
+                if retorno in ('f', 'm'):
+                    self._emitir("xorpd %xmm0, %xmm0")
+                elif retorno is not None:
+                    self._emitir("xorl %eax, %eax")
+                self._emitir(f"jmp {fim}")
+            elif op == OP_HALT:
+                self._emitir("xorl %edi, %edi")
+                self._emitir("call exit@PLT")
+            elif op in (OP_FUNCAO, OP_FORMAL, OP_PUSH_STACK, OP_POP_STACK):
+                pass
+            else:
+                raise Exception(f"Erro do gerador x86-64: instrução 3AC inválida '{instrucao}'.")
+        if self.linhas[-1] == f"    jmp {fim}":
+            self.linhas.pop()
+        self.linhas.append(f"{fim}:")
+        for registrador, lugar in salvos:
+            self._emitir(f"movq {lugar}, {registrador}")
+        self._emitir("leave")
+        self._emitir("ret")
+        self.linhas.append("")
+
+    def gerar(self):
+        self.tipos.inferir()
+        self.linhas = ["    .text"]
+        ordem = {nome: i for i, nome in enumerate(self.tipos.funcoes)}
+        for chave in sorted(self.tipos.versoes, key=lambda chave: (ordem[chave[0]], chave[1])):
+            self._funcao(chave, self.tipos.versoes[chave])
+        self.linhas.extend(["    .globl main", "main:", "    pushq %rbp", "    movq %rsp, %rbp"])
+        if self.tipos.entrada is not None:
+            self._emitir(f"call {self.tipos._nome_versao((self.tipos.entrada, ()))}")
+        self.linhas.extend(["    xorl %eax, %eax", "    popq %rbp", "    ret", ""])
+        globais = self.tipos._globais()
+        if globais:
+            self.linhas.extend(["    .bss", "    .align 8"])
+            for nome in sorted(globais):
+                self.linhas.extend([f"g_{nome}:", "    .zero 8"])
+            self.linhas.append("")
+        if self.textos or self.doubles:
+            self.linhas.extend(["    .section .rodata", "    .align 8"])
+            for bits, rotulo in self.doubles.items():
+                self.linhas.extend([f"{rotulo}:", f"    .quad {bits:#x}"])
+            for valor, rotulo in self.textos.items():
+                self.linhas.extend([f"{rotulo}:", f"    .string {literal_c(valor)}"])
+            self.linhas.append("")
+        self.linhas.append('    .section .note.GNU-stack,"",@progbits')
+        return RUNTIME_X86 + '\n' + '\n'.join(self.linhas) + '\n'
+
+
+class ProgramaX86(ProgramaC):
+    # Gera o assembly, monta com o 'as' e liga com o compilador C do sistema (que só entra como ligador,
+    # para o crt e a libc do runtime); executar() e remover() são os do ProgramaC
+    def __init__(self, codigo_3ac, tabela_simbolos=None, registradores=len(REGISTRADORES), montador=None,
+                 ligador=None):
+        inicio = time.perf_counter()
+        self.fonte = GeradorX86(codigo_3ac, tabela_simbolos, registradores).gerar()
+        meio = time.perf_counter()
+        self.diretorio = tempfile.mkdtemp(prefix='compilador_x86_')
+        caminho_fonte = os.path.join(self.diretorio, 'programa.s')
+        objeto = os.path.join(self.diretorio, 'programa.o')
+        self.executavel = os.path.join(self.diretorio, 'programa')
+        with open(caminho_fonte, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(self.fonte)
+        montador = montador or shutil.which('as')
+        if montador is None:
+            raise Exception("Erro do gerador x86-64: montador 'as' não encontrado no PATH.")
+        resultado = subprocess.run([montador, '-o', objeto, caminho_fonte], capture_output=True, text=True)
+        if resultado.returncode != 0:
+            raise Exception(f"Erro do gerador x86-64: o montador falhou:\n{resultado.stderr.strip()}")
+        montado = time.perf_counter()
+        resultado = subprocess.run([ligador or encontrar_compilador_c(), '-o', self.executavel, objeto],
+                                   capture_output=True, text=True)
+        if resultado.returncode != 0:
+            raise Exception(f"Erro do gerador x86-64: a ligação falhou:\n{resultado.stderr.strip()}")
+        self.tempo_geracao = meio - inicio
+        self.tempo_montagem = montado - meio
+        self.tempo_ligacao = time.perf_counter() - montado
+        self.tempo_compilacao = self.tempo_montagem + self.tempo_ligacao
+        self.saida = []
+        self.tempo_execucao = 0.0
+
+
+if __name__ == '__main__':
+    import sys
+
+    # Confere a saída do binário com a da máquina virtual nos exemplos e em programas gerados
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    conferir_com_maquina_virtual(ProgramaX86, f"as + {os.path.basename(encontrar_compilador_c())}", quantidade)
@@ -0,0 +1,116 @@
+import time
+
+# Níveis de otimização: O0 não altera o código, O1 só faz as passagens locais e baratas, O2 faz todas
+NIVEIS = (0, 1, 2)
+
+# Limite de voltas do grupo de ponto fixo, o mesmo para o Otimizador e para quem usa o gerenciador direto.
+# Só protege contra grupos que não convergem: nos exemplos e programas gerados quase todos chegam ao ponto
+# fixo em até 4 voltas (contando a última, sem mudança) e o mais lento em 19; com limite 2, metade
+# terminava antes do ponto fixo, com código maior
+MAX_ITERACOES_PADRAO = 20
+
+
+def mesmo_codigo(codigo, outro):
+    if codigo is outro:
+        return True
+    if len(codigo) != len(outro):
+        return False
+    for x, y in zip(codigo, outro):
+        if x is not y and (x.op != y.op or x.oper != y.oper or x.dest != y.dest or x.a != y.a or x.b != y.b):
+            return False
+    return True
+
+
+class Passagem:
+    def __init__(self, nome, funcao, ordem, niveis, ponto_fixo):
+        self.nome = nome
+        self.funcao = funcao
+        self.ordem = ordem
+        self.niveis = niveis
+        self.ponto_fixo = ponto_fixo
+
+
+class GerenciadorPassagens:
+    # As passagens são registradas com nome, ordem e os níveis em que entram. Na execução, as escolhidas
+    # pelo nível rodam pela ordem; uma sequência de passagens com ponto_fixo=True forma um grupo que é
+    # repetido até uma volta inteira não mudar o código (ou até max_iteracoes voltas). Dentro do grupo,
+    # uma passagem que não mudou nada não roda de novo enquanto as outras também não mudarem o código.
+    # Cada execução de passagem vira uma fase da instrumentação (tempo e instruções antes/depois), e
+    # 'estatisticas' acumula por passagem: execuções, alterações, tempo, variação do número de instruções e
+    # 'limite_atingido', se o grupo da passagem parou no max_iteracoes ainda mudando o código (sem chegar ao
+    # ponto fixo); 'limite_atingido' do gerenciador diz se isso aconteceu com algum grupo.
+    def __init__(self, instrumentacao=None, max_iteracoes=MAX_ITERACOES_PADRAO):
+        self.instrumentacao = instrumentacao
+        self.max_iteracoes = max_iteracoes
+        self.passagens = {}
+        self.estatisticas = {}
+        self.iteracoes = 0
+        self.limite_atingido = False
+
+    def registrar(self, nome, funcao, ordem, niveis=(1, 2), ponto_fixo=True):
+        if nome in self.passagens:
+            raise Exception(f"Erro do otimizador: passagem '{nome}' já registrada.")
+        self.passagens[nome] = Passagem(nome, funcao, ordem, tuple(niveis), ponto_fixo)
+        self.estatisticas[nome] = {'execucoes': 0, 'alteracoes': 0, 'tempo_s': 0.0, 'delta_instrucoes': 0,
+                                   'limite_atingido': False}
+
+    def selecionar(self, nivel):
+        if nivel not in NIVEIS:
+            raise Exception(f"Erro do otimizador: nível de otimização {nivel} inválido (use 0, 1 ou 2).")
+        return sorted((p for p in self.passagens.values() if nivel in p.niveis), key=lambda p: p.ordem)
+
+    def _rodar(self, passagem, codigo):
+        estatisticas = self.estatisticas[passagem.nome]
+        inicio = time.perf_counter()
+        if self.instrumentacao is None:
+            codigo_novo = passagem.funcao(codigo)
+        else:
+            with self.instrumentacao.fase(f'otimizador.{passagem.nome}', instrucoes_antes=len(codigo)) as registro:
+                codigo_novo = passagem.funcao(codigo)
+                registro['instrucoes_depois'] = len(codigo_novo)
+        estatisticas['tempo_s'] += time.perf_counter() - inicio
+        estatisticas['execucoes'] += 1
+        estatisticas['delta_instrucoes'] += len(codigo_novo) - len(codigo)
+        alterou = not mesmo_codigo(codigo, codigo_novo)
+        estatisticas['alteracoes'] += alterou
+        return codigo_novo, alterou
+
+    def _grupo(self, grupo, codigo):
+        # 'estavel': passagens que, desde a última vez que rodaram, não viram o código mudar
+        estavel = set()
+        for _ in range(self.max_iteracoes):
+            self.iteracoes += 1
+            mudou = False
+            for passagem in grupo:
+                if passagem.nome in estavel:
+                    continue
+                codigo, alterou = self._rodar(passagem, codigo)
+                if alterou:
+                    # Inclusive ela mesma: uma passagem pode achar mais o que fazer no próprio resultado
+                    mudou = True
+                    estavel = set()
+                else:
+                    estavel.add(passagem.nome)
+            if not mudou:
+                break
+        else:
+            self.limite_atingido = True
+            for passagem in grupo:
+                self.estatisticas[passagem.nome]['limite_atingido'] = True
+        return codigo
+
+    def executar(self, codigo, nivel):
+        selecionadas = self.selecionar(nivel)
+        i = 0
+        while i < len(selecionadas):
+            passagem = selecionadas[i]
+            if not passagem.ponto_fixo:
+                codigo, _ = self._rodar(passagem, codigo)
+                i += 1
+                continue
+            fim = i
+            while fim < len(selecionadas) and selecionadas[fim].ponto_fixo:
+                fim += 1
+            codigo = self._grupo(selecionadas[i:fim], codigo)
+            i = fim
+        return codigo
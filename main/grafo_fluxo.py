@@ -0,0 +1,223 @@
+from array import array
+from codigo_intermediario import (
+    VARIAVEL, OP_FUNCAO, OP_ROTULO, OP_GOTO, OP_IF_FALSE, OP_RET, OP_RETURN, OP_HALT, OP_DECLARE, OP_FORMAL
+)
+
+TERMINADORES = (OP_GOTO, OP_IF_FALSE, OP_RET, OP_RETURN, OP_HALT)
+
+
+def dividir_funcoes(codigo):
+    # Intervalos [inicio, fim) de cada função; o trecho antes da primeira (goto main e globais) tem nome None
+    intervalos = []
+    nome = None
+    inicio = 0
+    for i, instrucao in enumerate(codigo):
+        if instrucao.op == OP_FUNCAO:
+            if i > inicio or nome is not None:
+                intervalos.append((nome, inicio, i))
+            nome = instrucao.a.valor
+            inicio = i
+    if len(codigo) > inicio or nome is not None:
+        intervalos.append((nome, inicio, len(codigo)))
+    return intervalos
+
+
+def globais_da_funcao(codigo, inicio, fim):
+    # Variáveis usadas na função que não são declaradas nem formais nela: são globais
+    trecho = codigo[inicio:fim]
+    locais = {i.dest.valor for i in trecho if i.op == OP_DECLARE or i.op == OP_FORMAL}
+    return {o.valor for i in trecho for o in (i.dest, i.a, i.b)
+            if o is not None and o.classe == VARIAVEL and o.valor not in locais}
+
+
+class GrafoFluxo:
+    # Blocos básicos de um trecho do código (em geral uma função). O bloco b ocupa codigo[inicios[b]:fins[b]];
+    # sucessores[b] e predecessores[b] são tuplas de índices de blocos. Desvios para rótulos fora do
+    # trecho (como 'goto main') e ret/return/halt não têm sucessor.
+    def __init__(self, codigo, inicio=0, fim=None):
+        self.codigo = codigo
+        fim = len(codigo) if fim is None else fim
+        self.inicios = array('I')
+        self.fins = array('I')
+        self.bloco_do_rotulo = {}
+
+        # Líderes: início do trecho, rótulos e a instrução seguinte a cada desvio ou saída
+        novo_bloco = True
+        for i in range(inicio, fim):
+            op = codigo[i].op
+            if op == OP_ROTULO or op == OP_FUNCAO or novo_bloco:
+                if len(self.inicios) > len(self.fins):
+                    self.fins.append(i)
+                self.inicios.append(i)
+            if op == OP_ROTULO or op == OP_FUNCAO:
+                self.bloco_do_rotulo[codigo[i].a.valor] = len(self.inicios) - 1
+            novo_bloco = op in TERMINADORES
+        if len(self.inicios) > len(self.fins):
+            self.fins.append(fim)
+
+        n = len(self.inicios)
+        sucessores = []
+        predecessores = [[] for _ in range(n)]
+        for b in range(n):
+            ultima = codigo[self.fins[b] - 1]
+            op = ultima.op
+            if op == OP_GOTO:
+                alvos = (self.bloco_do_rotulo.get(ultima.a.valor),)
+            elif op == OP_IF_FALSE:
+                alvos = (b + 1 if b + 1 < n else None, self.bloco_do_rotulo.get(ultima.b.valor))
+            elif op in (OP_RET, OP_RETURN, OP_HALT):
+                alvos = ()
+            else:
+                alvos = (b + 1 if b + 1 < n else None,)
+            alvos = tuple(dict.fromkeys(alvo for alvo in alvos if alvo is not None))
+            sucessores.append(alvos)
+            for alvo in alvos:
+                predecessores[alvo].append(b)
+        self.sucessores = sucessores
+        self.predecessores = [tuple(p) for p in predecessores]
+
+    def __len__(self):
+        return len(self.inicios)
+
+    def instrucoes(self, bloco):
+        return self.codigo[self.inicios[bloco]:self.fins[bloco]]
+
+    def alcancaveis(self):
+        visitados = bytearray(len(self))
+        if len(self):
+            pilha = [0]
+            visitados[0] = 1
+            while pilha:
+                for sucessor in self.sucessores[pilha.pop()]:
+                    if not visitados[sucessor]:
+                        visitados[sucessor] = 1
+                        pilha.append(sucessor)
+        return visitados
+
+    def ordem_reversa_pos(self):
+        # Pós-ordem invertida a partir do bloco de entrada (só blocos alcançáveis), sem recursão
+        ordem = []
+        if not len(self):
+            return ordem
+        visitados = bytearray(len(self))
+        visitados[0] = 1
+        pilha = [(0, 0)]
+        while pilha:
+            bloco, proximo = pilha[-1]
+            sucessores = self.sucessores[bloco]
+            if proximo < len(sucessores):
+                pilha[-1] = (bloco, proximo + 1)
+                sucessor = sucessores[proximo]
+                if not visitados[sucessor]:
+                    visitados[sucessor] = 1
+                    pilha.append((sucessor, 0))
+            else:
+                pilha.pop()
+                ordem.append(bloco)
+        ordem.reverse()
+        return ordem
+
+    def dominadores(self):
+        # Dominador imediato de cada bloco (algoritmo iterativo de Cooper, Harvey e Kennedy sobre a ordem
+        # reversa de pós-ordem); -1 para a entrada e para blocos inalcançáveis
+        n = len(self)
+        idom = [-1] * n
+        if not n:
+            return idom
+        ordem = self.ordem_reversa_pos()
+        posicao = [-1] * n
+        for i, b in enumerate(ordem):
+            posicao[b] = i
+
+        def intersecao(a, b):
+            while a != b:
+                while posicao[a] > posicao[b]:
+                    a = idom[a]
+                while posicao[b] > posicao[a]:
+                    b = idom[b]
+            return a
+
+        idom[0] = 0
+        mudou = True
+        while mudou:
+            mudou = False
+            for b in ordem[1:]:
+                novo = -1
+                for p in self.predecessores[b]:
+                    if idom[p] == -1:
+                        continue
+                    novo = p if novo == -1 else intersecao(p, novo)
+                if idom[b] != novo:
+                    idom[b] = novo
+                    mudou = True
+        idom[0] = -1
+        return idom
+
+    def filhos_dominancia(self, idom):
+        filhos = [[] for _ in range(len(self))]
+        for b, pai in enumerate(idom):
+            if pai != -1:
+                filhos[pai].append(b)
+        return filhos
+
+    def fronteiras_dominancia(self, idom):
+        fronteiras = [set() for _ in range(len(self))]
+        for b in range(len(self)):
+            predecessores = [p for p in self.predecessores[b] if p == 0 or idom[p] != -1]
+            if len(predecessores) < 2 or (b != 0 and idom[b] == -1):
+                continue
+            for p in predecessores:
+                corredor = p
+                while corredor != idom[b] and corredor != -1:
+                    fronteiras[corredor].add(b)
+                    corredor = idom[corredor]
+        return fronteiras
+
+    def domina(self, idom, a, b):
+        while b != -1:
+            if b == a:
+                return True
+            b = idom[b]
+        return False
+
+    def lacos_naturais(self, idom):
+        # Para cada aresta de retorno b -> h (h domina b), o laço natural são os blocos que alcançam b sem passar
+        # por h; laços com o mesmo cabeçalho são unidos (um 'continue' cria outra aresta de retorno).
+        # Devolve {cabecalho: frozenset de blocos}
+        lacos = {}
+        for b in range(len(self)):
+            if b != 0 and idom[b] == -1:
+                continue
+            for h in self.sucessores[b]:
+                if not self.domina(idom, h, b):
+                    continue
+                corpo = lacos.setdefault(h, {h})
+                if b in corpo:
+                    continue
+                corpo.add(b)
+                pilha = [b]
+                while pilha:
+                    for p in self.predecessores[pilha.pop()]:
+                        if p not in corpo and (p == 0 or idom[p] != -1):
+                            corpo.add(p)
+                            pilha.append(p)
+        return {h: frozenset(corpo) for h, corpo in lacos.items()}
+
+    def gerar_dot(self, nome='CFG'):
+        linhas = [
+            f"digraph {nome} {{",
+            "  node [shape=box, style=filled, fillcolor=lightyellow, fontname=monospace];"
+        ]
+        for b in range(len(self)):
+            texto = "\\l".join(str(i).replace('"', '\\"') for i in self.instrucoes(b)) + "\\l"
+            linhas.append(f'  B{b} [label="B{b}\\l{texto}"];')
+        for b, sucessores in enumerate(self.sucessores):
+            for s in sucessores:
+                linhas.append(f'  B{b} -> B{s};')
+        linhas.append("}")
+        return "\n".join(linhas)
+
+
+def construir_grafos(codigo):
+    # Um GrafoFluxo por função, na ordem do código
+    return [(nome, GrafoFluxo(codigo, inicio, fim)) for nome, inicio, fim in dividir_funcoes(codigo)]
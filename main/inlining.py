@@ -0,0 +1,260 @@
+from collections import defaultdict
+from codigo_intermediario import (
+    Instrucao, TEMPORARIO, VARIAVEL, ROTULO, PADRAO_TEMPORARIO, ROTULO_INTERNO, temporario, variavel, rotulo,
+    OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_PARAM, OP_FORMAL, OP_DECLARE, OP_CALL,
+    OP_RETURN, OP_RET, OP_HALT, OP_COPIA
+)
+from grafo_fluxo import dividir_funcoes
+
+
+def grafo_chamadas(codigo):
+    # Mesmo formato de AnalisadorSemantico.dependencias_funcao, quando só se tem o 3AC
+    chamadas = defaultdict(set)
+    for nome, inicio, fim in dividir_funcoes(codigo):
+        if nome is not None:
+            chamadas[nome].update(i.a.valor for i in codigo[inicio:fim] if i.op == OP_CALL)
+    return chamadas
+
+
+def componentes_fortes(chamadas):
+    # Componentes fortemente conexas (Tarjan, sem recursão), já em ordem topológica invertida:
+    # cada função aparece depois de todas as que ela chama
+    indice = {}
+    menor = {}
+    pilha = []
+    na_pilha = set()
+    componentes = []
+    for raiz in sorted(chamadas):
+        if raiz in indice:
+            continue
+        indice[raiz] = menor[raiz] = len(indice)
+        pilha.append(raiz)
+        na_pilha.add(raiz)
+        trabalho = [(raiz, iter(sorted(chamadas.get(raiz, ()))))]
+        while trabalho:
+            no, vizinhos = trabalho[-1]
+            for vizinho in vizinhos:
+                if vizinho not in indice:
+                    indice[vizinho] = menor[vizinho] = len(indice)
+                    pilha.append(vizinho)
+                    na_pilha.add(vizinho)
+                    trabalho.append((vizinho, iter(sorted(chamadas.get(vizinho, ())))))
+                    break
+                if vizinho in na_pilha:
+                    menor[no] = min(menor[no], indice[vizinho])
+            else:
+                trabalho.pop()
+                if trabalho:
+                    pai = trabalho[-1][0]
+                    menor[pai] = min(menor[pai], menor[no])
+                if menor[no] == indice[no]:
+                    componente = []
+                    while True:
+                        membro = pilha.pop()
+                        na_pilha.discard(membro)
+                        componente.append(membro)
+                        if membro == no:
+                            break
+                    componentes.append(componente)
+    return componentes
+
+
+def funcoes_recursivas(chamadas):
+    recursivas = set()
+    for componente in componentes_fortes(chamadas):
+        if len(componente) > 1 or componente[0] in chamadas.get(componente[0], ()):
+            recursivas.update(componente)
+    return recursivas
+
+
+class Inlining:
+    # Substitui chamadas a funções pequenas e não recursivas pelo corpo da função: os 'param' viram cópias
+    # para os formais, temporários, rótulos e variáveis locais do corpo ganham nomes novos a cada expansão
+    # e 'return'/'ret' viram uma cópia para o destino da chamada seguida de um desvio para o fim do corpo.
+    # push_stack, pop_stack e o próprio call deixam de existir.
+    # As funções são processadas das folhas para cima no grafo de chamadas, então o corpo expandido já
+    # contém as expansões feitas nele. 'tamanho_maximo' limita o corpo da função chamada e
+    # 'tamanho_maximo_chamador' o crescimento de quem chama.
+    def __init__(self, codigo, dependencias_funcao=None, tamanho_maximo=40, tamanho_maximo_chamador=2000):
+        self.codigo = codigo
+        self.chamadas = grafo_chamadas(codigo) if dependencias_funcao is None else dependencias_funcao
+        self.tamanho_maximo = tamanho_maximo
+        self.tamanho_maximo_chamador = tamanho_maximo_chamador
+        self.expandidas = 0
+        self.removidas = 0
+
+        self.intervalos = dividir_funcoes(codigo)
+        self.corpos = {}
+        self.caudas = {}
+        for nome, inicio, fim in self.intervalos:
+            if nome is None:
+                continue
+            # O halt do fim do programa fica no intervalo da última função, mas não faz parte dela
+            corpo = codigo[inicio + 1:fim]
+            cauda = []
+            while corpo and corpo[-1].op == OP_HALT:
+                cauda.append(corpo.pop())
+            self.corpos[nome] = corpo
+            self.caudas[nome] = cauda
+        self.recursivas = funcoes_recursivas(self.chamadas)
+
+        nomes = set()
+        maior_temp = maior_rotulo = 0
+        for instrucao in codigo:
+            for operando in (instrucao.dest, instrucao.a, instrucao.b):
+                if operando is None:
+                    continue
+                nomes.add(operando.valor)
+                if operando.classe == TEMPORARIO and PADRAO_TEMPORARIO.match(operando.valor):
+                    maior_temp = max(maior_temp, int(operando.valor[1:]))
+                elif operando.classe == ROTULO and ROTULO_INTERNO.match(operando.valor):
+                    maior_rotulo = max(maior_rotulo, int(operando.valor[1:]))
+        self.nomes = nomes
+        self.proximo_temp = maior_temp + 1
+        self.proximo_rotulo = maior_rotulo + 1
+        self.proxima_copia = 1
+        self.resumos = {}
+
+    def _resumo(self, nome):
+        # (locais, globais, quantidade de formais) do corpo atual da função
+        resumo = self.resumos.get(nome)
+        if resumo is None:
+            corpo = self.corpos[nome]
+            locais = {i.dest.valor for i in corpo if i.op == OP_DECLARE or i.op == OP_FORMAL}
+            globais = {o.valor for i in corpo for o in (i.dest, i.a, i.b)
+                       if o is not None and o.classe == VARIAVEL and o.valor not in locais}
+            resumo = self.resumos[nome] = (locais, globais, sum(1 for i in corpo if i.op == OP_FORMAL))
+        return resumo
+
+    def _expansivel(self, nome):
+        corpo = self.corpos.get(nome)
+        if corpo is None or nome == 'main' or nome in self.recursivas or len(corpo) > self.tamanho_maximo:
+            return False
+        return all(i.op != OP_HALT for i in corpo)
+
+    def _novo_operando(self, operando, funcao):
+        if operando.classe == TEMPORARIO:
+            self.proximo_temp += 1
+            return temporario(f"t{self.proximo_temp - 1}")
+        if operando.classe == ROTULO:
+            self.proximo_rotulo += 1
+            return rotulo(f"L{self.proximo_rotulo - 1}")
+        while True:
+            nome = f"{funcao}_{operando.valor}_{self.proxima_copia}"
+            self.proxima_copia += 1
+            if nome not in self.nomes:
+                self.nomes.add(nome)
+                return variavel(nome)
+
+    def _expandir(self, chamada, argumentos, nome, declaracoes):
+        corpo = self.corpos[nome]
+        locais = self._resumo(nome)[0]
+        novos = {}
+
+        def renomear(operando):
+            if operando is None:
+                return None
+            if (operando.classe == TEMPORARIO or operando.classe == ROTULO
+                    or (operando.classe == VARIAVEL and operando.valor in locais)):
+                novo = novos.get(operando.valor)
+                if novo is None:
+                    novo = novos[operando.valor] = self._novo_operando(operando, nome)
+                return novo
+            return operando
+
+        # A partir de 'fim_util' só há pop_stack e ret: um return ali não precisa de desvio
+        fim_util = len(corpo)
+        while fim_util and corpo[fim_util - 1].op in (OP_POP_STACK, OP_RET):
+            fim_util -= 1
+
+        fim = rotulo(f"L{self.proximo_rotulo}")
+        self.proximo_rotulo += 1
+        usou_fim = False
+        argumentos = iter(argumentos)
+        expandido = []
+        for k, instrucao in enumerate(corpo):
+            op = instrucao.op
+            if op == OP_PUSH_STACK or op == OP_POP_STACK:
+                continue
+            if op == OP_FORMAL:
+                # A declaração vai para a entrada de quem chama; aqui fica só a passagem do argumento
+                formal = renomear(instrucao.dest)
+                declaracoes.append(Instrucao(OP_DECLARE, dest=formal, oper=instrucao.oper))
+                expandido.append(Instrucao(OP_COPIA, dest=formal, a=next(argumentos).a))
+            elif op == OP_RETURN or op == OP_RET:
+                if op == OP_RETURN and chamada.dest is not None:
+                    expandido.append(Instrucao(OP_COPIA, dest=chamada.dest, a=renomear(instrucao.a)))
+                if k + 1 < fim_util:
+                    expandido.append(Instrucao(OP_GOTO, a=fim))
+                    usou_fim = True
+            else:
+                expandido.append(Instrucao(op, dest=renomear(instrucao.dest), a=renomear(instrucao.a),
+                                           b=renomear(instrucao.b), oper=instrucao.oper))
+        if usou_fim:
+            expandido.append(Instrucao(OP_ROTULO, a=fim))
+        return expandido
+
+    def _expandir_funcao(self, nome):
+        corpo = self.corpos[nome]
+        locais = self._resumo(nome)[0]
+        tamanho = len(corpo)
+        novo = []
+        declaracoes = []
+        for instrucao in corpo:
+            if instrucao.op == OP_CALL and self._expansivel(instrucao.a.valor):
+                chamado = instrucao.a.valor
+                corpo_chamado = self.corpos[chamado]
+                _, globais_chamado, formais = self._resumo(chamado)
+                n = instrucao.b.valor
+                argumentos = novo[len(novo) - n:] if n else []
+                # Uma global da função chamada não pode ser confundida com uma local de quem chama
+                if (len(argumentos) == n == formais and all(i.op == OP_PARAM for i in argumentos)
+                        and tamanho + len(corpo_chamado) <= self.tamanho_maximo_chamador
+                        and not globais_chamado & locais):
+                    del novo[len(novo) - n:]
+                    novo.extend(self._expandir(instrucao, argumentos, chamado, declaracoes))
+                    tamanho += len(corpo_chamado)
+                    self.expandidas += 1
+                    continue
+            novo.append(instrucao)
+
+        # Declarações dos formais expandidos logo após o cabeçalho (push_stack e formais) de quem chama
+        entrada = 0
+        while entrada < len(novo) and novo[entrada].op in (OP_PUSH_STACK, OP_FORMAL):
+            entrada += 1
+        novo[entrada:entrada] = declaracoes
+        self.corpos[nome] = novo
+        self.resumos.pop(nome, None)
+
+    def aplicar(self):
+        ordem = [nome for componente in componentes_fortes(self.chamadas) for nome in componente]
+        processadas = set(ordem)
+        ordem += [nome for nome in self.corpos if nome not in processadas]
+        for nome in ordem:
+            if nome in self.corpos:
+                self._expandir_funcao(nome)
+
+        # Funções que ninguém mais chama (todas as chamadas foram expandidas) saem do código
+        usadas = self._alcancaveis('main') if 'main' in self.corpos else set(self.corpos)
+        codigo_novo = []
+        for nome, inicio, fim in self.intervalos:
+            if nome is None:
+                codigo_novo.extend(self.codigo[inicio:fim])
+                continue
+            if nome in usadas:
+                codigo_novo.append(self.codigo[inicio])
+                codigo_novo.extend(self.corpos[nome])
+            else:
+                self.removidas += 1
+            codigo_novo.extend(reversed(self.caudas[nome]))
+        return codigo_novo
+
+    def _alcancaveis(self, raiz):
+        alcancadas = {raiz}
+        pilha = [raiz]
+        while pilha:
+            for instrucao in self.corpos.get(pilha.pop(), ()):
+                if instrucao.op == OP_CALL and instrucao.a.valor not in alcancadas:
+                    alcancadas.add(instrucao.a.valor)
+                    pilha.append(instrucao.a.valor)
+        return alcancadas
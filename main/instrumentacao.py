@@ -0,0 +1,58 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Instrumentacao:
+    # Cada fase registra tempo de parede, contadores próprios (tokens, nós, instruções...) e,
+    # se medir_memoria=True, o pico de memória alocada (tracemalloc) enquanto a fase executava.
+    def __init__(self, medir_memoria=False):
+        self.medir_memoria = medir_memoria
+        self.fases = []
+        self._pilha = []
+
+    @contextmanager
+    def fase(self, nome, **dados):
+        registro = {'fase': nome, 'nivel': len(self._pilha), **dados}
+        iniciou_tracemalloc = False
+        if self.medir_memoria:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                iniciou_tracemalloc = True
+            if self._pilha:
+                pai = self._pilha[-1]
+                pai['_pico'] = max(pai['_pico'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            registro['_pico'] = 0
+        self.fases.append(registro)
+        self._pilha.append(registro)
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except Exception as e:
+            registro['erro'] = str(e)
+            raise
+        finally:
+            registro['tempo_s'] = time.perf_counter() - inicio
+            self._pilha.pop()
+            if self.medir_memoria:
+                pico = max(registro.pop('_pico'), tracemalloc.get_traced_memory()[1])
+                registro['pico_memoria_bytes'] = pico
+                if self._pilha:
+                    pai = self._pilha[-1]
+                    pai['_pico'] = max(pai['_pico'], pico)
+                if iniciou_tracemalloc:
+                    tracemalloc.stop()
+
+    def tempo(self, nome):
+        return sum(r['tempo_s'] for r in self.fases if r['fase'] == nome)
+
+    def para_dict(self):
+        return {
+            'tempo_total_s': sum(r['tempo_s'] for r in self.fases if r['nivel'] == 0),
+            'fases': self.fases,
+        }
+
+    def para_json(self):
+        return json.dumps(self.para_dict(), indent=2, ensure_ascii=False)
@@ -0,0 +1,423 @@
+import os
+import sys
+import mmap
+import struct
+import tempfile
+from array import array
+from collections import Counter
+from codigo_intermediario import (
+    ler_3ac, decodificar_3ac, CONSTANTE,
+    OP_DECLARE, OP_FUNCAO, OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_IF_FALSE, OP_PARAM,
+    OP_FORMAL, OP_CALL, OP_RETURN, OP_RET, OP_PRINT, OP_HALT, OP_COPIA, OP_BINARIA, OP_UNARIA
+)
+from grafo_fluxo import dividir_funcoes
+from bytecode import Bytecode, SUPERINSTRUCOES
+
+# Formato binário de uma unidade compilada (extensão .c3ir), todo em little-endian:
+#   cabeçalho   MAGICO, versão, número de seções, tamanho do arquivo
+#   diretório   uma entrada (marca de 4 bytes, deslocamento, tamanho) por seção
+#   seções      alinhadas em 8 bytes; cada uma é um vetor de registros de tamanho fixo, então qualquer
+#               registro é lido direto do mmap pelo índice, sem percorrer os anteriores
+MAGICO = b'C3IR'
+VERSAO = 1
+EXTENSAO = '.c3ir'
+
+CABECALHO = struct.Struct('<4sHHII')
+ENTRADA_DIRETORIO = struct.Struct('<4sII')
+# Constante: etiqueta do tipo e o valor (inteiro, float ou índice de string)
+CONSTANTE_INTEIRA = struct.Struct('<B7xq')
+CONSTANTE_FLOAT = struct.Struct('<B7xd')
+# Instrução 3AC: código da operação, classe de dest/a/b (SEM_OPERANDO se ausente), valores de dest/a/b
+# (índice de string para nomes, índice do pool para constantes) e índice de string do 'oper' (-1 se None)
+INSTRUCAO = struct.Struct('<4B4i')
+# Função (trecho do 3AC; o nome -1 é o código antes da primeira função): nome, início e fim no 3AC,
+# entrada no bytecode, número de formais, início e tamanho do quadro modelo
+FUNCAO = struct.Struct('<7i')
+# Símbolo: identificador, tipo, escopo, endereço, inicializada, primeiro parâmetro e número de parâmetros
+SIMBOLO = struct.Struct('<7i')
+PARAMETRO = struct.Struct('<2i')
+# Rótulo (inclui os de função): nome, função, índice no 3AC e posição no bytecode
+ROTULO = struct.Struct('<4i')
+
+SECOES = (b'STRS', b'CONS', b'INST', b'FUNC', b'ROTL', b'SIMB', b'PARM', b'BYTE', b'MODL', b'GLOB', b'SUPR')
+
+OPERACOES_IR = (OP_DECLARE, OP_FUNCAO, OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_IF_FALSE,
+                OP_PARAM, OP_FORMAL, OP_CALL, OP_RETURN, OP_RET, OP_PRINT, OP_HALT, OP_COPIA, OP_BINARIA,
+                OP_UNARIA)
+CODIGOS_IR = {op: codigo for codigo, op in enumerate(OPERACOES_IR)}
+SEM_OPERANDO = 255
+INTEIRO, FLOAT, BOOLEANO, TEXTO, INTEIRO_GRANDE = range(5)
+
+
+class _Escritor:
+    # Monta as seções de um artefato: tabela de strings e pool de constantes compartilhados por todas
+    def __init__(self):
+        self.strings = []
+        self.indice_strings = {}
+        self.constantes = []
+        self.indice_constantes = {}
+
+    def string(self, texto):
+        if texto is None:
+            return -1
+        if texto not in self.indice_strings:
+            self.indice_strings[texto] = len(self.strings)
+            self.strings.append(texto)
+        return self.indice_strings[texto]
+
+    def constante(self, valor):
+        chave = (type(valor), valor)
+        if chave not in self.indice_constantes:
+            self.indice_constantes[chave] = len(self.constantes)
+            self.constantes.append(valor)
+        return self.indice_constantes[chave]
+
+    def operando(self, operando):
+        if operando is None:
+            return SEM_OPERANDO, 0
+        if operando.classe == CONSTANTE:
+            return operando.classe, self.constante(operando.valor)
+        return operando.classe, self.string(operando.valor)
+
+    def secao_strings(self):
+        codificadas = [texto.encode('utf-8') for texto in self.strings]
+        deslocamentos = array('I', [0])
+        for dados in codificadas:
+            deslocamentos.append(deslocamentos[-1] + len(dados))
+        return struct.pack('<I', len(codificadas)) + _little_endian(deslocamentos) + b''.join(codificadas)
+
+    def secao_constantes(self):
+        # Chamar antes de secao_strings: constantes de texto (e inteiros fora de 64 bits) entram na tabela
+        registros = []
+        for valor in self.constantes:
+            if type(valor) is bool:
+                registros.append(CONSTANTE_INTEIRA.pack(BOOLEANO, int(valor)))
+            elif type(valor) is int and -2 ** 63 <= valor < 2 ** 63:
+                registros.append(CONSTANTE_INTEIRA.pack(INTEIRO, valor))
+            elif type(valor) is int:
+                registros.append(CONSTANTE_INTEIRA.pack(INTEIRO_GRANDE, self.string(str(valor))))
+            elif type(valor) is float:
+                registros.append(CONSTANTE_FLOAT.pack(FLOAT, valor))
+            elif type(valor) is str:
+                registros.append(CONSTANTE_INTEIRA.pack(TEXTO, self.string(valor)))
+            else:
+                raise Exception(f"Erro de serialização: constante {valor!r} de tipo não suportado.")
+        return b''.join(registros)
+
+
+def _little_endian(vetor):
+    if sys.byteorder != 'little':
+        vetor = array(vetor.typecode, vetor)
+        vetor.byteswap()
+    return vetor.tobytes()
+
+
+def _inteiros(visao, typecode='i'):
+    # Vetor de inteiros de 32 bits sem cópia (visão sobre o mmap) quando a máquina é little-endian
+    if sys.byteorder == 'little':
+        return visao.cast(typecode)
+    vetor = array(typecode, visao.tobytes())
+    vetor.byteswap()
+    return vetor
+
+
+def serializar(codigo_3ac, tabela_simbolos=None, superinstrucoes=SUPERINSTRUCOES):
+    # Artefato (bytes) com o 3AC, a tabela de símbolos e o bytecode já resolvido do código
+    if codigo_3ac and isinstance(codigo_3ac[0], str):
+        codigo_3ac = ler_3ac(codigo_3ac)
+    bytecode = Bytecode(codigo_3ac, superinstrucoes)
+    escritor = _Escritor()
+    # O pool começa pelo do bytecode, assim os quadros modelo guardam só o índice de cada constante
+    for valor in bytecode.constantes:
+        escritor.constante(valor)
+
+    instrucoes = []
+    for instrucao in codigo_3ac:
+        classe_dest, dest = escritor.operando(instrucao.dest)
+        classe_a, a = escritor.operando(instrucao.a)
+        classe_b, b = escritor.operando(instrucao.b)
+        instrucoes.append(INSTRUCAO.pack(CODIGOS_IR[instrucao.op], classe_dest, classe_a, classe_b,
+                                         dest, a, b, escritor.string(instrucao.oper)))
+
+    funcoes = []
+    rotulos = []
+    modelos = array('i')
+    trechos = dividir_funcoes(codigo_3ac) or [(None, 0, 0)]
+    for indice, (nome, inicio, fim) in enumerate(trechos):
+        modelo = bytecode.modelos[indice]
+        funcoes.append(FUNCAO.pack(escritor.string(nome), inicio, fim, bytecode.entradas[indice],
+                                   bytecode.formais[indice], len(modelos), len(modelo)))
+        for valor in modelo:
+            modelos.append(-1 if valor is None else escritor.constante(valor))
+        for i in range(inicio, fim):
+            if codigo_3ac[i].op in (OP_FUNCAO, OP_ROTULO):
+                rotulo = codigo_3ac[i].a.valor
+                rotulos.append(ROTULO.pack(escritor.string(rotulo), indice, i, bytecode.rotulos[rotulo][0]))
+
+    simbolos = []
+    parametros = []
+    for simbolo in tabela_simbolos or []:
+        simbolos.append(SIMBOLO.pack(escritor.string(simbolo['identificador']), escritor.string(simbolo['tipo']),
+                                     escritor.string(simbolo['escopo']), simbolo['endereco'],
+                                     int(bool(simbolo['inicializada'])), len(parametros), len(simbolo['params'])))
+        for parametro in simbolo['params']:
+            parametros.append(PARAMETRO.pack(escritor.string(parametro['tipo']), escritor.string(parametro['nome'])))
+
+    globais = array('i', [escritor.string(nome) for nome in bytecode.globais])
+    superinstrucoes = array('i', [escritor.string(nome) for nome in sorted(bytecode.superinstrucoes)])
+    constantes = escritor.secao_constantes()
+    conteudo = {
+        b'STRS': escritor.secao_strings(),
+        b'CONS': constantes,
+        b'INST': b''.join(instrucoes),
+        b'FUNC': b''.join(funcoes),
+        b'ROTL': b''.join(rotulos),
+        b'SIMB': b''.join(simbolos),
+        b'PARM': b''.join(parametros),
+        b'BYTE': _little_endian(bytecode.codigo),
+        b'MODL': _little_endian(modelos),
+        b'GLOB': _little_endian(globais),
+        b'SUPR': _little_endian(superinstrucoes),
+    }
+
+    deslocamento = CABECALHO.size + ENTRADA_DIRETORIO.size * len(SECOES)
+    diretorio = []
+    corpo = []
+    for marca in SECOES:
+        preenchimento = -deslocamento % 8
+        corpo.append(b'\0' * preenchimento)
+        deslocamento += preenchimento
+        diretorio.append(ENTRADA_DIRETORIO.pack(marca, deslocamento, len(conteudo[marca])))
+        corpo.append(conteudo[marca])
+        deslocamento += len(conteudo[marca])
+    return CABECALHO.pack(MAGICO, VERSAO, len(SECOES), deslocamento, 0) + b''.join(diretorio) + b''.join(corpo)
+
+
+def gravar_artefato(caminho, codigo_3ac, tabela_simbolos=None, superinstrucoes=SUPERINSTRUCOES):
+    # Grava em um temporário e troca de uma vez: um leitor nunca vê o artefato pela metade
+    dados = serializar(codigo_3ac, tabela_simbolos, superinstrucoes)
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(caminho)), suffix='.tmp')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    return len(dados)
+
+
+class BytecodeCarregado:
+    # Bytecode vindo de um artefato, com os mesmos atributos que a MaquinaBytecode usa do Bytecode;
+    # o código é uma visão sobre o mmap, sem cópia
+    def __init__(self, artefato):
+        self.codigo = artefato._vetor(b'BYTE')
+        self.constantes = [artefato.constante(i) for i in range(artefato.numero_constantes)]
+        modelos = artefato._vetor(b'MODL')
+        self.modelos = [[None if c < 0 else self.constantes[c] for c in modelos[f['modelo']:f['modelo'] + f['quadro']]]
+                        for f in artefato.funcoes]
+        self.nomes = [f['nome'] for f in artefato.funcoes]
+        self.entradas = array('i', [f['entrada'] for f in artefato.funcoes])
+        self.formais = array('i', [f['formais'] for f in artefato.funcoes])
+        self.globais = [artefato.string(i) for i in artefato._vetor(b'GLOB')]
+        self.superinstrucoes = frozenset(artefato.superinstrucoes)
+        self.rotulos = {r['nome']: (r['bytecode'], r['funcao']) for r in artefato.rotulos()}
+        self.blocos = []
+        self.usos = Counter()
+
+
+class ArtefatoIR:
+    # Leitura de um artefato .c3ir por mmap. Abrir só confere o cabeçalho e lê o diretório e a tabela de
+    # funções; strings, constantes, instruções e símbolos são decodificados quando pedidos (as
+    # instruções, por função). Feche (ou use com 'with') depois de parar de usar o que foi carregado:
+    # o bytecode e os vetores devolvidos são visões sobre o arquivo mapeado.
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, 'rb') as arquivo:
+            tamanho = os.fstat(arquivo.fileno()).st_size
+            if tamanho < CABECALHO.size:
+                raise Exception(f"Erro de carga: '{caminho}' não é um artefato 3AC.")
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self._dados = memoryview(self._mapa)
+        self._visoes = [self._dados]
+        magico, self.versao, numero_secoes, tamanho_declarado, _ = CABECALHO.unpack_from(self._dados)
+        if magico != MAGICO:
+            self.fechar()
+            raise Exception(f"Erro de carga: '{caminho}' não é um artefato 3AC.")
+        if self.versao != VERSAO:
+            self.fechar()
+            raise Exception(f"Erro de carga: versão {self.versao} do formato não suportada (esperada {VERSAO}).")
+        if tamanho_declarado != tamanho:
+            self.fechar()
+            raise Exception(f"Erro de carga: '{caminho}' truncado ({tamanho} de {tamanho_declarado} bytes).")
+        self.secoes = {}
+        for i in range(numero_secoes):
+            marca, deslocamento, tamanho_secao = ENTRADA_DIRETORIO.unpack_from(
+                self._dados, CABECALHO.size + i * ENTRADA_DIRETORIO.size)
+            self.secoes[marca] = (deslocamento, tamanho_secao)
+        for marca in SECOES:
+            if marca not in self.secoes:
+                self.fechar()
+                raise Exception(f"Erro de carga: seção {marca.decode()} ausente em '{caminho}'.")
+
+        inicio, _ = self.secoes[b'STRS']
+        (quantidade,) = struct.unpack_from('<I', self._dados, inicio)
+        self._deslocamentos_strings = self._visao(inicio + 4, 4 * (quantidade + 1), 'I')
+        self._base_strings = inicio + 4 + 4 * (quantidade + 1)
+        self._strings = {}
+        self.numero_constantes = self.secoes[b'CONS'][1] // CONSTANTE_INTEIRA.size
+        self.numero_instrucoes = self.secoes[b'INST'][1] // INSTRUCAO.size
+        self.funcoes = [{'nome': self.string(nome), 'inicio': inicio_3ac, 'fim': fim, 'entrada': entrada,
+                         'formais': formais, 'modelo': modelo, 'quadro': quadro}
+                        for nome, inicio_3ac, fim, entrada, formais, modelo, quadro
+                        in self._registros(b'FUNC', FUNCAO)]
+        self.superinstrucoes = tuple(self.string(i) for i in self._vetor(b'SUPR'))
+
+    def _visao(self, inicio, tamanho, typecode):
+        visao = _inteiros(self._dados[inicio:inicio + tamanho], typecode)
+        if isinstance(visao, memoryview):
+            self._visoes.append(visao)
+        return visao
+
+    def _vetor(self, marca):
+        inicio, tamanho = self.secoes[marca]
+        return self._visao(inicio, tamanho, 'i')
+
+    def _registros(self, marca, estrutura, primeiro=0, quantidade=None):
+        inicio, tamanho = self.secoes[marca]
+        fim = inicio + tamanho
+        inicio += primeiro * estrutura.size
+        if quantidade is not None:
+            fim = min(fim, inicio + quantidade * estrutura.size)
+        return estrutura.iter_unpack(self._dados[inicio:fim])
+
+    def string(self, indice):
+        if indice < 0:
+            return None
+        texto = self._strings.get(indice)
+        if texto is None:
+            inicio = self._base_strings + self._deslocamentos_strings[indice]
+            fim = self._base_strings + self._deslocamentos_strings[indice + 1]
+            texto = self._strings[indice] = str(self._dados[inicio:fim], 'utf-8')
+        return texto
+
+    def constante(self, indice):
+        posicao = self.secoes[b'CONS'][0] + indice * CONSTANTE_INTEIRA.size
+        etiqueta = self._dados[posicao]
+        if etiqueta == FLOAT:
+            return CONSTANTE_FLOAT.unpack_from(self._dados, posicao)[1]
+        valor = CONSTANTE_INTEIRA.unpack_from(self._dados, posicao)[1]
+        if etiqueta == INTEIRO:
+            return valor
+        if etiqueta == BOOLEANO:
+            return bool(valor)
+        if etiqueta == TEXTO:
+            return self.string(valor)
+        if etiqueta == INTEIRO_GRANDE:
+            return int(self.string(valor))
+        raise Exception(f"Erro de carga: constante {indice} com tipo {etiqueta} inválido.")
+
+    def _operando(self, classe, valor):
+        if classe == SEM_OPERANDO:
+            return None
+        if classe == CONSTANTE:
+            return classe, self.constante(valor)
+        return classe, self.string(valor)
+
+    def instrucoes(self, funcao=None):
+        # 3AC de uma função (índice em 'funcoes' ou nome; None para o programa inteiro)
+        if funcao is None:
+            inicio, fim = 0, self.numero_instrucoes
+        else:
+            if isinstance(funcao, str):
+                funcao = [f['nome'] for f in self.funcoes].index(funcao)
+            inicio, fim = self.funcoes[funcao]['inicio'], self.funcoes[funcao]['fim']
+        tuplas = [(OPERACOES_IR[op], self._operando(classe_dest, dest), self._operando(classe_a, a),
+                   self._operando(classe_b, b), self.string(oper))
+                  for op, classe_dest, classe_a, classe_b, dest, a, b, oper
+                  in self._registros(b'INST', INSTRUCAO, inicio, fim - inicio)]
+        return decodificar_3ac(tuplas)
+
+    def rotulos(self):
+        return [{'nome': self.string(nome), 'funcao': funcao, 'indice': indice, 'bytecode': posicao}
+                for nome, funcao, indice, posicao in self._registros(b'ROTL', ROTULO)]
+
+    def tabela_simbolos(self):
+        parametros = [{'tipo': self.string(tipo), 'nome': self.string(nome)}
+                      for tipo, nome in self._registros(b'PARM', PARAMETRO)]
+        return [{'identificador': self.string(identificador), 'tipo': self.string(tipo),
+                 'escopo': self.string(escopo), 'endereco': endereco,
+                 'params': [dict(p) for p in parametros[primeiro:primeiro + quantidade]],
+                 'inicializada': bool(inicializada)}
+                for identificador, tipo, escopo, endereco, inicializada, primeiro, quantidade
+                in self._registros(b'SIMB', SIMBOLO)]
+
+    def bytecode(self):
+        return BytecodeCarregado(self)
+
+    def fechar(self):
+        if self._mapa is None:
+            return
+        for visao in reversed(self._visoes):
+            visao.release()
+        self._visoes = []
+        self._mapa.close()
+        self._mapa = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+
+if __name__ == '__main__':
+    from compilador import compilar
+    from maquina_virtual import MaquinaVirtual
+    from bytecode import MaquinaBytecode
+    from entradas_de_exemplo import entradas_de_exemplo
+    from gerador_de_programas import gerar_programa
+
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        # Resumo de cada artefato e execução do seu bytecode
+        for caminho in sys.argv[1:]:
+            with ArtefatoIR(caminho) as artefato:
+                bytecode = artefato.bytecode()
+                print(f"{caminho}: versão {artefato.versao}, {artefato.numero_instrucoes} instruções 3AC, "
+                      f"{len(artefato.funcoes)} funções, {len(bytecode.codigo)} inteiros de bytecode")
+                for secao, (deslocamento, tamanho) in artefato.secoes.items():
+                    print(f"  {secao.decode()} {deslocamento:>8} {tamanho:>8} bytes")
+                maquina = MaquinaBytecode(bytecode)
+                maquina.executar()
+                print("  saída:", " ".join(maquina.saida))
+        sys.exit(0)
+
+    # Ida e volta pelo formato nos exemplos e em N programas gerados: o 3AC e a tabela de símbolos lidos
+    # do artefato têm de ser os gravados, e o bytecode carregado tem de imprimir o mesmo que a máquina virtual
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    programas = [(nome.split(':')[0], codigo) for nome, codigo in entradas_de_exemplo.items()
+                 if not nome.startswith('Erro')]
+    programas.extend((f'gerado #{semente}', gerar_programa(semente, funcoes=8, profundidade=3))
+                     for semente in range(quantidade))
+    divergencias = 0
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'programa' + EXTENSAO)
+        for nome, codigo in programas:
+            compilacao = compilar(codigo)
+            gravar_artefato(caminho, compilacao.codigo_otimizado, compilacao.tabela_simbolos)
+            with ArtefatoIR(caminho) as artefato:
+                iguais = ([str(i) for i in artefato.instrucoes()] == [str(i) for i in compilacao.codigo_otimizado]
+                          and artefato.tabela_simbolos() == compilacao.tabela_simbolos)
+                vm = MaquinaVirtual(compilacao.codigo_otimizado)
+                maquina = MaquinaBytecode(artefato.bytecode())
+                for executor in (vm, maquina):
+                    try:
+                        executor.executar()
+                    except Exception as e:
+                        executor.saida = executor.saida + [str(e)]
+                iguais = iguais and maquina.saida == vm.saida
+            divergencias += not iguais
+            if not iguais:
+                print(f"{nome}: diverge")
+    print(f"{len(programas)} programas, {divergencias} divergências")
@@ -0,0 +1,552 @@
+from collections import Counter
+from codigo_intermediario import (
+    Instrucao, constante, temporario, variavel, rotulo, CONSTANTE, TEMPORARIO, ROTULO, PADRAO_TEMPORARIO,
+    ROTULO_INTERNO, OP_ROTULO, OP_GOTO, OP_IF_FALSE, OP_CALL, OP_DECLARE, OP_FORMAL, OP_COPIA, OP_BINARIA,
+    OP_UNARIA
+)
+from ssa import FormaSSA, VALOR_INSTRUCAO, VALOR_PHI, VALOR_INDEFINIDO
+
+
+def tem_desvio_para_tras(codigo):
+    # Todo laço tem ao menos um desvio para um rótulo que aparece antes no código
+    vistos = set()
+    for instrucao in codigo:
+        if instrucao.op == OP_ROTULO:
+            vistos.add(instrucao.a.valor)
+        elif instrucao.op == OP_GOTO and instrucao.a.valor in vistos:
+            return True
+        elif instrucao.op == OP_IF_FALSE and instrucao.b.valor in vistos:
+            return True
+    return False
+
+
+def maior_rotulo(codigo):
+    maior = 0
+    for instrucao in codigo:
+        for operando in (instrucao.a, instrucao.b):
+            if operando is not None and operando.classe == ROTULO and ROTULO_INTERNO.match(operando.valor):
+                maior = max(maior, int(operando.valor[1:]))
+    return maior
+
+
+def pura(instrucao):
+    # Pode executar mais vezes (ou antes) sem mudar o resultado do programa: não falha nem tem efeito colateral
+    op = instrucao.op
+    if op == OP_COPIA or op == OP_UNARIA:
+        return True
+    if op == OP_BINARIA:
+        if instrucao.oper in ('/', '%'):
+            return instrucao.b.classe == CONSTANTE and instrucao.b.valor != 0
+        return True
+    return False
+
+
+def criar_pre_cabecalho(grafo, cabecalho, blocos, proximo_rotulo, redirecionadas):
+    # Início do pré-cabeçalho, que vai logo antes do rótulo do cabeçalho: quem entra no laço por fora passa
+    # por ele (desvios de fora são redirecionados para um rótulo novo, em 'redirecionadas'), as arestas de
+    # retorno continuam indo direto ao cabeçalho. Devolve as instruções iniciais e o próximo rótulo livre.
+    codigo = grafo.codigo
+    inicio = grafo.inicios[cabecalho]
+    alvo = codigo[inicio].a
+    pre_cabecalho = []
+    anterior = cabecalho - 1
+    if anterior in blocos and cabecalho in grafo.sucessores[anterior] and codigo[inicio - 1].op != OP_GOTO:
+        # O bloco anterior é do laço e cai no cabeçalho: precisa pular o pré-cabeçalho
+        pre_cabecalho.append(Instrucao(OP_GOTO, a=alvo))
+    novo_rotulo = None
+    for p in grafo.predecessores[cabecalho]:
+        if p in blocos:
+            continue
+        ultima = grafo.fins[p] - 1
+        instrucao = codigo[ultima]
+        desvio = instrucao.a if instrucao.op == OP_GOTO else instrucao.b if instrucao.op == OP_IF_FALSE else None
+        if desvio is not None and desvio.valor == alvo.valor:
+            if novo_rotulo is None:
+                novo_rotulo = rotulo(f"L{proximo_rotulo}")
+                proximo_rotulo += 1
+            if instrucao.op == OP_GOTO:
+                redirecionadas[ultima] = Instrucao(OP_GOTO, a=novo_rotulo)
+            else:
+                redirecionadas[ultima] = Instrucao(OP_IF_FALSE, a=instrucao.a, b=novo_rotulo)
+    if novo_rotulo is not None:
+        pre_cabecalho.append(Instrucao(OP_ROTULO, a=novo_rotulo))
+    return pre_cabecalho, proximo_rotulo
+
+
+def reescrever(codigo, removidas, insercoes, redirecionadas):
+    # insercoes[pos]: instruções colocadas antes da posição pos; redirecionadas[pos]: substitui a instrução
+    codigo_novo = []
+    for pos, instrucao in enumerate(codigo):
+        if pos in insercoes:
+            codigo_novo.extend(insercoes[pos])
+        if pos not in removidas:
+            codigo_novo.append(redirecionadas.get(pos, instrucao))
+    return codigo_novo
+
+
+class MovimentacaoInvariantes:
+    # Move as computações invariantes de cada laço natural para um pré-cabeçalho, colocado logo antes do
+    # rótulo do cabeçalho: quem entra no laço por fora passa por ele, as arestas de retorno (fim do corpo
+    # e 'continue') vão direto ao cabeçalho. Uma atribuição x = e sai do laço quando:
+    #   - e é pura e seus operandos são constantes, definidos fora do laço ou por outra invariante já movida;
+    #   - é a única definição de x no laço e x não está vivo na entrada do cabeçalho;
+    #   - x não está vivo em nenhuma saída do laço (o 'break' também é uma) ou o bloco domina todas elas.
+    # Globais lidas só são invariantes se o laço não as escreve nem faz chamadas; globais não são movidas.
+    # Cada rodada trata laços disjuntos, dos mais internos para fora, e a forma SSA é refeita na seguinte.
+    # Rótulos são globais no programa: proximo_rotulo é o primeiro livre em todo o código, não só no trecho.
+    def __init__(self, codigo, proximo_rotulo=None):
+        self.codigo = codigo
+        self.proximo_rotulo = maior_rotulo(codigo) + 1 if proximo_rotulo is None else proximo_rotulo
+        self.movidas = 0
+
+    def aplicar(self):
+        codigo = self.codigo
+        if not tem_desvio_para_tras(codigo):
+            return codigo
+        while True:
+            codigo, movidas, adiados = self._rodada(codigo)
+            self.movidas += movidas
+            # Um laço tratado já perdeu todas as suas invariantes: só vale outra rodada se algum ficou para depois
+            if not movidas or not adiados:
+                return codigo
+
+    def _invariantes(self, forma, cabecalho, blocos):
+        grafo = forma.grafo
+        codigo = forma.codigo
+        ordem = [b for b in grafo.ordem_reversa_pos() if b in blocos]
+        posicoes = [pos for b in ordem for pos in range(grafo.inicios[b], grafo.fins[b])]
+        definicoes = Counter(codigo[pos].dest.valor for pos in posicoes if codigo[pos].dest is not None)
+        com_chamada = any(codigo[pos].op == OP_CALL for pos in posicoes)
+        vivas_no_cabecalho = {forma.lista_phis[indice][1] for indice in forma.phis[cabecalho]}
+        saidas = {s for b in blocos for s in grafo.sucessores[b] if s not in blocos}
+        vivas_nas_saidas = 0
+        for s in saidas:
+            vivas_nas_saidas |= forma.vivacidade.entrada[s]
+
+        def invariante(operando, uso):
+            if operando is None or operando.classe == CONSTANTE:
+                return True
+            if uso < 0:
+                return not com_chamada and not definicoes[operando.valor]
+            origem = forma.origem_valores[uso]
+            if origem == VALOR_INSTRUCAO:
+                return forma.bloco_da_posicao[forma.local_valores[uso]] not in blocos or uso in movidos
+            if origem == VALOR_PHI:
+                return forma.lista_phis[forma.local_valores[uso]][0] not in blocos
+            return True
+
+        movidos = set()
+        escolhidas = []
+        for pos in posicoes:
+            instrucao = codigo[pos]
+            valor = forma.definicao[pos]
+            if valor < 0 or not pura(instrucao):
+                continue
+            nome = instrucao.dest.valor
+            if definicoes[nome] != 1 or nome in vivas_no_cabecalho:
+                continue
+            bloco = forma.bloco_da_posicao[pos]
+            if (forma.vivacidade.bit(nome) & vivas_nas_saidas
+                    and not all(grafo.domina(forma.idom, bloco, s) for s in saidas)):
+                continue
+            if invariante(instrucao.a, forma.uso_a[pos]) and invariante(instrucao.b, forma.uso_b[pos]):
+                movidos.add(valor)
+                escolhidas.append(pos)
+        return escolhidas
+
+    def _rodada(self, codigo):
+        forma = FormaSSA(codigo)
+        grafo = forma.grafo
+        lacos = grafo.lacos_naturais(forma.idom)
+        proximo_rotulo = self.proximo_rotulo
+        removidas = set()
+        insercoes = {}
+        redirecionadas = {}
+        tratados = []
+        adiados = 0
+        for cabecalho, blocos in sorted(lacos.items(), key=lambda laco: len(laco[1])):
+            # Um laço que contém outro já alterado nesta rodada fica para a próxima
+            if any(blocos & outro for outro in tratados):
+                adiados += 1
+                continue
+            inicio = grafo.inicios[cabecalho]
+            if codigo[inicio].op != OP_ROTULO:
+                continue
+            escolhidas = self._invariantes(forma, cabecalho, blocos)
+            if not escolhidas:
+                continue
+            tratados.append(blocos)
+            removidas.update(escolhidas)
+
+            pre_cabecalho, proximo_rotulo = criar_pre_cabecalho(grafo, cabecalho, blocos, proximo_rotulo,
+                                                                redirecionadas)
+            pre_cabecalho.extend(codigo[pos] for pos in escolhidas)
+            insercoes[inicio] = pre_cabecalho
+
+        if not removidas:
+            return codigo, 0, adiados
+        self.proximo_rotulo = proximo_rotulo
+        return reescrever(codigo, removidas, insercoes, redirecionadas), len(removidas), adiados
+
+
+def maior_temporario(codigo):
+    maior = 0
+    for instrucao in codigo:
+        for operando in (instrucao.dest, instrucao.a, instrucao.b):
+            if operando is not None and operando.classe == TEMPORARIO and PADRAO_TEMPORARIO.match(operando.valor):
+                maior = max(maior, int(operando.valor[1:]))
+    return maior
+
+
+def _inteira(operando):
+    return operando is not None and operando.classe == CONSTANTE and type(operando.valor) is int
+
+
+def resolver_copias(forma, valor):
+    # Segue as cópias entre valores SSA até a definição que produziu o valor
+    while valor >= 0 and forma.origem_valores[valor] == VALOR_INSTRUCAO:
+        pos = forma.local_valores[valor]
+        if forma.codigo[pos].op != OP_COPIA or forma.uso_a[pos] < 0:
+            break
+        valor = forma.uso_a[pos]
+    return valor
+
+
+def valor_constante(forma, valor):
+    # Constante inteira atribuída (por cópias) ao valor SSA, ou None
+    valor = resolver_copias(forma, valor)
+    if valor >= 0 and forma.origem_valores[valor] == VALOR_INSTRUCAO:
+        instrucao = forma.codigo[forma.local_valores[valor]]
+        if instrucao.op == OP_COPIA and _inteira(instrucao.a):
+            return instrucao.a.valor
+    return None
+
+
+def variaveis_inducao(forma, cabecalho, blocos):
+    # Variáveis de indução básicas do laço: phi do cabeçalho de uma variável int que, em cada aresta de
+    # retorno, recebe i + c (ou i - c) com o mesmo c constante. Devolve {valor da phi: (nome, passo)}
+    codigo = forma.codigo
+    inteiras = {i.dest.valor for i in codigo if (i.op == OP_DECLARE or i.op == OP_FORMAL) and i.oper == 'int'}
+    predecessores = forma.grafo.predecessores[cabecalho]
+
+    def passo_de(valor, atualizado):
+        atualizado = resolver_copias(forma, atualizado)
+        if atualizado < 0 or forma.origem_valores[atualizado] != VALOR_INSTRUCAO:
+            return 0
+        pos = forma.local_valores[atualizado]
+        instrucao = codigo[pos]
+        if (forma.bloco_da_posicao[pos] not in blocos or instrucao.op != OP_BINARIA
+                or instrucao.oper not in ('+', '-')):
+            return 0
+        if _inteira(instrucao.b) and resolver_copias(forma, forma.uso_a[pos]) == valor:
+            return instrucao.b.valor if instrucao.oper == '+' else -instrucao.b.valor
+        if instrucao.oper == '+' and _inteira(instrucao.a) and resolver_copias(forma, forma.uso_b[pos]) == valor:
+            return instrucao.a.valor
+        return 0
+
+    basicas = {}
+    for indice in forma.phis[cabecalho]:
+        _, nome, valor, argumentos = forma.lista_phis[indice]
+        if nome not in inteiras:
+            continue
+        de_fora = [argumentos[k] for k, p in enumerate(predecessores) if p not in blocos]
+        if not de_fora or any(a < 0 or forma.origem_valores[a] == VALOR_INDEFINIDO for a in de_fora):
+            continue
+        passos = {passo_de(valor, argumentos[k]) for k, p in enumerate(predecessores) if p in blocos}
+        if len(passos) == 1 and 0 not in passos:
+            basicas[valor] = (nome, passos.pop())
+    return basicas
+
+
+def _arestas_de_retorno(grafo, cabecalho, blocos):
+    # Posições dos 'goto cabecalho' que fecham o laço, ou None se alguma aresta de retorno tiver outra forma
+    codigo = grafo.codigo
+    alvo = codigo[grafo.inicios[cabecalho]].a.valor
+    posicoes = []
+    for p in grafo.predecessores[cabecalho]:
+        if p in blocos:
+            ultima = codigo[grafo.fins[p] - 1]
+            if ultima.op != OP_GOTO or ultima.a.valor != alvo:
+                return None
+            posicoes.append(grafo.fins[p] - 1)
+    return posicoes
+
+
+class ReducaoForca:
+    # Redução de força sobre variáveis de indução: uma multiplicação t = i * k (k constante inteira) dentro
+    # do laço, onde i é variável de indução básica com passo c, vira cópia de um temporário novo s que vale
+    # i * k a cada iteração: s = i * k no pré-cabeçalho e s = s + c * k antes de cada aresta de retorno.
+    # Só variáveis declaradas int: com float a soma repetida acumularia erro de arredondamento. Na máquina
+    # virtual a troca é neutra (a soma no fim da volta paga a cópia); o ganho é nos geradores nativos.
+    def __init__(self, codigo, rodadas=4, proximo_rotulo=None):
+        self.codigo = codigo
+        self.proximo_rotulo = maior_rotulo(codigo) + 1 if proximo_rotulo is None else proximo_rotulo
+        self.rodadas = rodadas
+        self.reduzidas = 0
+
+    def aplicar(self):
+        codigo = self.codigo
+        if not tem_desvio_para_tras(codigo) or not any(
+                i.op == OP_BINARIA and i.oper == '*' and (_inteira(i.a) or _inteira(i.b)) for i in codigo):
+            return codigo
+        for _ in range(self.rodadas):
+            codigo, reduzidas = self._rodada(codigo)
+            self.reduzidas += reduzidas
+            if not reduzidas:
+                break
+        return codigo
+
+    def _candidatas(self, forma, blocos, basicas):
+        codigo = forma.codigo
+        grafo = forma.grafo
+        candidatas = []
+        for b in sorted(blocos):
+            for pos in range(grafo.inicios[b], grafo.fins[b]):
+                instrucao = codigo[pos]
+                if instrucao.op != OP_BINARIA or instrucao.oper != '*':
+                    continue
+                for uso, fator in ((forma.uso_a[pos], instrucao.b), (forma.uso_b[pos], instrucao.a)):
+                    valor = resolver_copias(forma, uso)
+                    if _inteira(fator) and valor >= 0 and valor in basicas:
+                        candidatas.append((pos, valor, fator.valor))
+                        break
+        return candidatas
+
+    def _rodada(self, codigo):
+        forma = FormaSSA(codigo)
+        grafo = forma.grafo
+        proximo_rotulo = self.proximo_rotulo
+        proximo_temp = maior_temporario(codigo) + 1
+        insercoes = {}
+        redirecionadas = {}
+        tratados = []
+        reduzidas = 0
+        for cabecalho, blocos in sorted(grafo.lacos_naturais(forma.idom).items(), key=lambda laco: len(laco[1])):
+            if any(blocos & outro for outro in tratados) or codigo[grafo.inicios[cabecalho]].op != OP_ROTULO:
+                continue
+            retornos = _arestas_de_retorno(grafo, cabecalho, blocos)
+            basicas = variaveis_inducao(forma, cabecalho, blocos) if retornos else None
+            candidatas = self._candidatas(forma, blocos, basicas) if basicas else None
+            if not candidatas:
+                continue
+            tratados.append(blocos)
+
+            pre_cabecalho, proximo_rotulo = criar_pre_cabecalho(grafo, cabecalho, blocos, proximo_rotulo,
+                                                                redirecionadas)
+            novos = {}
+            for pos, valor, fator in candidatas:
+                chave = (valor, fator)
+                if chave not in novos:
+                    nome, passo = basicas[valor]
+                    s = novos[chave] = temporario(f"t{proximo_temp}")
+                    proximo_temp += 1
+                    pre_cabecalho.append(Instrucao(OP_BINARIA, dest=s, a=variavel(nome), b=constante(fator), oper='*'))
+                    for retorno in retornos:
+                        insercoes.setdefault(retorno, []).append(
+                            Instrucao(OP_BINARIA, dest=s, a=s, b=constante(passo * fator), oper='+'))
+                redirecionadas[pos] = Instrucao(OP_COPIA, dest=codigo[pos].dest, a=novos[chave])
+                reduzidas += 1
+            insercoes[grafo.inicios[cabecalho]] = pre_cabecalho
+
+        if not reduzidas:
+            return codigo, 0
+        self.proximo_rotulo = proximo_rotulo
+        return reescrever(codigo, (), insercoes, redirecionadas), reduzidas
+
+
+class Desenrolamento:
+    # Desenrola laços mais internos com número de iterações conhecido na compilação: o cabeçalho testa uma
+    # variável de indução básica contra uma constante e o valor inicial dela também é constante. O laço
+    # precisa ocupar um trecho contínuo do código, sair só pelo teste do cabeçalho (sem 'break') e voltar
+    # só por 'goto cabecalho' (o 'continue' é aceito).
+    # Se n iterações cabem no orçamento (instruções geradas), o laço some: n cópias do cabeçalho sem o teste
+    # e do corpo, mais o cabeçalho uma última vez. Senão, com fator f, n % f iterações saem antes do laço
+    # e o corpo é repetido f vezes por volta, com o teste só na primeira.
+    def __init__(self, codigo, fator=4, orcamento=200, proximo_rotulo=None):
+        self.codigo = codigo
+        self.proximo_rotulo = maior_rotulo(codigo) + 1 if proximo_rotulo is None else proximo_rotulo
+        self.fator = fator
+        self.orcamento = orcamento
+        self.completos = 0
+        self.parciais = 0
+
+    def aplicar(self):
+        codigo = self.codigo
+        if self.fator < 2 or not tem_desvio_para_tras(codigo):
+            return codigo
+        while True:
+            codigo, desenrolados = self._rodada(codigo)
+            if not desenrolados:
+                return codigo
+
+    def _iteracoes(self, inicial, relacao, limite, passo):
+        # Quantas vezes 'i relacao limite' é verdadeiro com i = inicial, inicial + passo, ...; None se infinito
+        if relacao == '<' or relacao == '<=':
+            if not (inicial < limite if relacao == '<' else inicial <= limite):
+                return 0
+            if passo <= 0:
+                return None
+            distancia = limite - inicial + (1 if relacao == '<=' else 0)
+            return -(-distancia // passo)
+        if relacao == '>' or relacao == '>=':
+            if not (inicial > limite if relacao == '>' else inicial >= limite):
+                return 0
+            if passo >= 0:
+                return None
+            distancia = inicial - limite + (1 if relacao == '>=' else 0)
+            return -(-distancia // -passo)
+        if relacao == '!=':
+            if (limite - inicial) % passo or (limite - inicial) // passo < 0:
+                return None
+            return (limite - inicial) // passo
+        return None
+
+    def _analisar(self, forma, cabecalho, blocos, lacos):
+        # (fim do trecho do laço, posição do teste, número de iterações) ou None se o laço não se encaixa
+        grafo = forma.grafo
+        codigo = forma.codigo
+        if sorted(blocos) != list(range(cabecalho, cabecalho + len(blocos))):
+            return None
+        if any(h != cabecalho and h in blocos for h in lacos):
+            return None
+        if _arestas_de_retorno(grafo, cabecalho, blocos) is None:
+            return None
+        teste = grafo.fins[cabecalho] - 1
+        if codigo[teste].op != OP_IF_FALSE or codigo[teste].a.classe == CONSTANTE:
+            return None
+        fim = grafo.fins[cabecalho + len(blocos) - 1]
+        if codigo[fim - 1].op != OP_GOTO or codigo[fim - 1].a.valor != codigo[grafo.inicios[cabecalho]].a.valor:
+            return None
+        if any(s not in blocos for b in blocos if b != cabecalho for s in grafo.sucessores[b]):
+            return None
+
+        condicao = resolver_copias(forma, forma.uso_a[teste])
+        if condicao < 0 or forma.origem_valores[condicao] != VALOR_INSTRUCAO:
+            return None
+        pos = forma.local_valores[condicao]
+        comparacao = codigo[pos]
+        if comparacao.op != OP_BINARIA or comparacao.oper not in ('<', '<=', '>', '>=', '!='):
+            return None
+        basicas = variaveis_inducao(forma, cabecalho, blocos)
+        relacao = comparacao.oper
+        if _inteira(comparacao.b) and forma.uso_a[pos] >= 0:
+            variavel_laco, limite = resolver_copias(forma, forma.uso_a[pos]), comparacao.b.valor
+        elif _inteira(comparacao.a) and forma.uso_b[pos] >= 0:
+            variavel_laco, limite = resolver_copias(forma, forma.uso_b[pos]), comparacao.a.valor
+            relacao = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '!=': '!='}[relacao]
+        else:
+            return None
+        if variavel_laco not in basicas:
+            return None
+
+        _, _, _, argumentos = forma.lista_phis[forma.local_valores[variavel_laco]]
+        iniciais = {valor_constante(forma, argumentos[k])
+                    for k, p in enumerate(grafo.predecessores[cabecalho]) if p not in blocos}
+        if len(iniciais) != 1 or None in iniciais:
+            return None
+        iteracoes = self._iteracoes(iniciais.pop(), relacao, limite, basicas[variavel_laco][1])
+        if not iteracoes:
+            return None
+        return fim, teste, iteracoes
+
+    def _copiar(self, trecho, cabecalho, continuar, proximo_rotulo, rotulos_internos):
+        # Cópia do trecho com rótulos novos; desvios para o cabeçalho vão para 'continuar'
+        novos = {}
+        for nome in rotulos_internos:
+            novos[nome] = rotulo(f"L{proximo_rotulo}")
+            proximo_rotulo += 1
+        copia = []
+        for instrucao in trecho:
+            op = instrucao.op
+            if op == OP_ROTULO:
+                copia.append(Instrucao(OP_ROTULO, a=novos[instrucao.a.valor]))
+            elif op == OP_GOTO:
+                copia.append(Instrucao(OP_GOTO, a=continuar if instrucao.a.valor == cabecalho
+                                       else novos.get(instrucao.a.valor, instrucao.a)))
+            elif op == OP_IF_FALSE:
+                copia.append(Instrucao(OP_IF_FALSE, a=instrucao.a, b=continuar if instrucao.b.valor == cabecalho
+                                       else novos.get(instrucao.b.valor, instrucao.b)))
+            else:
+                copia.append(instrucao)
+        return copia, proximo_rotulo
+
+    def _desenrolar(self, codigo, inicio, teste, fim, n):
+        # Novo trecho para codigo[inicio:fim], ou None se o laço não cabe no orçamento
+        cabecalho = codigo[inicio].a.valor
+        cabeca = codigo[inicio + 1:teste]
+        corpo = codigo[teste + 1:fim - 1]
+        rotulos_internos = [i.a.valor for i in corpo if i.op == OP_ROTULO]
+        tamanho = len(cabeca) + len(corpo)
+        if n * tamanho <= self.orcamento:
+            repeticoes, fator = n, 0
+        elif self.fator * tamanho <= self.orcamento and n >= 2 * self.fator:
+            repeticoes, fator = n % self.fator, self.fator
+        else:
+            return None
+
+        novo = [codigo[inicio]]
+        # Iterações fora de laço (todas, ou as n % fator iniciais)
+        for _ in range(repeticoes):
+            proxima = rotulo(f"L{self.proximo_rotulo}")
+            self.proximo_rotulo += 1
+            copia, self.proximo_rotulo = self._copiar(cabeca + corpo, cabecalho, proxima, self.proximo_rotulo,
+                                                      rotulos_internos)
+            novo.extend(copia)
+            novo.append(Instrucao(OP_ROTULO, a=proxima))
+        if not fator:
+            # O cabeçalho executa uma última vez, quando o teste falharia
+            novo.extend(cabeca)
+            saida = codigo[teste].b
+            if fim >= len(codigo) or codigo[fim].op != OP_ROTULO or codigo[fim].a.valor != saida.valor:
+                novo.append(Instrucao(OP_GOTO, a=saida))
+            self.completos += 1
+            return novo
+
+        volta = rotulo(f"L{self.proximo_rotulo}")
+        self.proximo_rotulo += 1
+        novo.append(Instrucao(OP_ROTULO, a=volta))
+        novo.extend(cabeca)
+        novo.append(codigo[teste])
+        for k in range(fator):
+            if k == fator - 1:
+                proxima = volta
+            else:
+                proxima = rotulo(f"L{self.proximo_rotulo}")
+                self.proximo_rotulo += 1
+            copia, self.proximo_rotulo = self._copiar(corpo if k == 0 else cabeca + corpo, cabecalho, proxima,
+                                                      self.proximo_rotulo, rotulos_internos)
+            novo.extend(copia)
+            if k < fator - 1:
+                novo.append(Instrucao(OP_ROTULO, a=proxima))
+        novo.append(Instrucao(OP_GOTO, a=volta))
+        self.parciais += 1
+        return novo
+
+    def _rodada(self, codigo):
+        # Laços mais internos são disjuntos: todos são tratados na mesma rodada. Um laço externo que passa a
+        # ser o mais interno (o de dentro foi desenrolado por completo) fica para a rodada seguinte
+        forma = FormaSSA(codigo)
+        grafo = forma.grafo
+        lacos = grafo.lacos_naturais(forma.idom)
+        trechos = []
+        for cabecalho, blocos in sorted(lacos.items()):
+            if codigo[grafo.inicios[cabecalho]].op != OP_ROTULO:
+                continue
+            analise = self._analisar(forma, cabecalho, blocos, lacos)
+            if analise is None:
+                continue
+            fim, teste, n = analise
+            inicio = grafo.inicios[cabecalho]
+            novo = self._desenrolar(codigo, inicio, teste, fim, n)
+            if novo is not None:
+                trechos.append((inicio, fim, novo))
+        if not trechos:
+            return codigo, 0
+        codigo_novo = []
+        anterior = 0
+        for inicio, fim, novo in trechos:
+            codigo_novo.extend(codigo[anterior:inicio])
+            codigo_novo.extend(novo)
+            anterior = fim
+        codigo_novo.extend(codigo[anterior:])
+        return codigo_novo, len(trechos)
@@ -0,0 +1,252 @@
+import re
+import time
+from codigo_intermediario import (
+    ler_3ac, OPERACOES, CONSTANTE, VARIAVEL,
+    OP_DECLARE, OP_FUNCAO, OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_IF_FALSE, OP_PARAM,
+    OP_FORMAL, OP_CALL, OP_RETURN, OP_RET, OP_PRINT, OP_HALT, OP_COPIA, OP_BINARIA, OP_UNARIA
+)
+
+CONST, LOCAL, GLOBAL = 0, 1, 2
+
+(VM_BINARIA, VM_COPIA, VM_NEGACAO, VM_IF_FALSE, VM_GOTO, VM_PARAM, VM_CALL,
+ VM_RETURN, VM_RET, VM_PRINT, VM_DECLARE, VM_NOP, VM_HALT) = range(13)
+
+
+def formatar_valor(valor):
+    if isinstance(valor, bool):
+        return '1' if valor else '0'
+    return str(valor)
+
+
+class MaquinaVirtual:
+    def __init__(self, codigo_3ac):
+        self.instrucoes = []
+        self.rotulos = {}
+        self.globais = {}
+        self.funcoes = {}
+        self.saida = []
+        self.instrucoes_executadas = 0
+        self.tempo_execucao = 0.0
+        if codigo_3ac and isinstance(codigo_3ac[0], str):
+            codigo_3ac = ler_3ac(codigo_3ac)
+        self._carregar(codigo_3ac)
+
+    def _operando(self, operando, locais):
+        if operando.classe == CONSTANTE:
+            return (CONST, operando.valor)
+        if operando.classe == VARIAVEL and operando.valor not in locais:
+            # Variável que não é formal nem foi declarada na função: é global, mesmo que o
+            # otimizador tenha removido o seu 'declare'
+            self.globais.setdefault(operando.valor, 0)
+            return (GLOBAL, operando.valor)
+        return (LOCAL, operando.valor)
+
+    def _carregar(self, codigo_3ac):
+        # 1ª passada: rótulos viram índices e as declarações antes da primeira função são globais
+        indice = 0
+        dentro_de_funcao = False
+        for instrucao in codigo_3ac:
+            if instrucao.op == OP_FUNCAO or instrucao.op == OP_ROTULO:
+                self.rotulos[instrucao.a.valor] = indice
+                dentro_de_funcao = dentro_de_funcao or instrucao.op == OP_FUNCAO
+                continue
+            if instrucao.op == OP_DECLARE and not dentro_de_funcao:
+                self.globais[instrucao.dest.valor] = 0
+            indice += 1
+
+        # 2ª passada: decodifica cada instrução com os operandos já resolvidos
+        locais = set()
+        formais = []
+        funcao = None
+        for instrucao in codigo_3ac:
+            op = instrucao.op
+            if op == OP_FUNCAO:
+                funcao = instrucao.a.valor
+                locais = set()
+                formais = []
+                self.funcoes[funcao] = (self.rotulos[funcao], formais)
+                continue
+            if op == OP_ROTULO:
+                continue
+
+            if op == OP_BINARIA:
+                self.instrucoes.append((VM_BINARIA, self._operando(instrucao.dest, locais), OPERACOES[instrucao.oper],
+                                        self._operando(instrucao.a, locais), self._operando(instrucao.b, locais)))
+            elif op == OP_COPIA:
+                self.instrucoes.append((VM_COPIA, self._operando(instrucao.dest, locais), self._operando(instrucao.a, locais)))
+            elif op == OP_UNARIA:
+                self.instrucoes.append((VM_NEGACAO, self._operando(instrucao.dest, locais), self._operando(instrucao.a, locais)))
+            elif op == OP_IF_FALSE:
+                self.instrucoes.append((VM_IF_FALSE, self._operando(instrucao.a, locais), self._rotulo(instrucao.b.valor)))
+            elif op == OP_GOTO:
+                self.instrucoes.append((VM_GOTO, self._rotulo(instrucao.a.valor)))
+            elif op == OP_PARAM:
+                self.instrucoes.append((VM_PARAM, self._operando(instrucao.a, locais)))
+            elif op == OP_CALL:
+                destino = self._operando(instrucao.dest, locais) if instrucao.dest is not None else None
+                self.instrucoes.append((VM_CALL, destino, instrucao.a.valor, instrucao.b.valor))
+            elif op == OP_RETURN:
+                self.instrucoes.append((VM_RETURN, self._operando(instrucao.a, locais)))
+            elif op == OP_RET:
+                self.instrucoes.append((VM_RET,))
+            elif op == OP_PRINT:
+                self.instrucoes.append((VM_PRINT, self._operando(instrucao.a, locais)))
+            elif op == OP_FORMAL:
+                # Parâmetros formais: já são associados no momento do 'call'
+                locais.add(instrucao.dest.valor)
+                formais.append(instrucao.dest.valor)
+                self.instrucoes.append((VM_NOP,))
+            elif op == OP_DECLARE:
+                if funcao is not None:
+                    locais.add(instrucao.dest.valor)
+                self.instrucoes.append((VM_DECLARE, self._operando(instrucao.dest, locais)))
+            elif op == OP_PUSH_STACK or op == OP_POP_STACK:
+                # O quadro é criado pelo 'call' e descartado pelo 'return'/'ret', que podem ocorrer antes do pop_stack
+                self.instrucoes.append((VM_NOP,))
+            elif op == OP_HALT:
+                self.instrucoes.append((VM_HALT,))
+            else:
+                raise Exception(f"Erro de carga: instrução 3AC inválida '{instrucao}'.")
+
+        # Chamadas apontam direto para o índice de entrada e para os formais da função
+        for i, instrucao in enumerate(self.instrucoes):
+            if instrucao[0] == VM_CALL:
+                _, destino, nome, n = instrucao
+                if nome not in self.funcoes:
+                    raise Exception(f"Erro de carga: função '{nome}' não encontrada no código 3AC.")
+                entrada, formais = self.funcoes[nome]
+                self.instrucoes[i] = (VM_CALL, destino, entrada, tuple(formais), n)
+
+    def _rotulo(self, nome):
+        if nome not in self.rotulos:
+            raise Exception(f"Erro de carga: rótulo '{nome}' não encontrado.")
+        return self.rotulos[nome]
+
+    def executar(self, limite_instrucoes=None):
+        codigo = self.instrucoes
+        globais = dict(self.globais)
+        locais = {}
+        argumentos = []
+        pilha_chamadas = []
+        saida = []
+        limite = limite_instrucoes if limite_instrucoes is not None else -1
+        executadas = 0
+        pc = 0
+        inicio = time.perf_counter()
+        try:
+            while pc < len(codigo):
+                if executadas == limite:
+                    raise Exception(f"Erro de execução: limite de {limite} instruções atingido.")
+                instrucao = codigo[pc]
+                pc += 1
+                executadas += 1
+                op = instrucao[0]
+
+                if op == VM_BINARIA:
+                    tipo, v = instrucao[3]
+                    a = v if tipo == CONST else locais[v] if tipo == LOCAL else globais[v]
+                    tipo, v = instrucao[4]
+                    b = v if tipo == CONST else locais[v] if tipo == LOCAL else globais[v]
+                    resultado = instrucao[2](a, b)
+                    tipo, v = instrucao[1]
+                    if tipo == LOCAL:
+                        locais[v] = resultado
+                    else:
+                        globais[v] = resultado
+                elif op == VM_COPIA:
+                    tipo, v = instrucao[2]
+                    resultado = v if tipo == CONST else locais[v] if tipo == LOCAL else globais[v]
+                    tipo, v = instrucao[1]
+                    if tipo == LOCAL:
+                        locais[v] = resultado
+                    else:
+                        globais[v] = resultado
+                elif op == VM_IF_FALSE:
+                    tipo, v = instrucao[1]
+                    if not (v if tipo == CONST else locais[v] if tipo == LOCAL else globais[v]):
+                        pc = instrucao[2]
+                elif op == VM_GOTO:
+                    pc = instrucao[1]
+                elif op == VM_NOP:
+                    pass
+                elif op == VM_PARAM:
+                    tipo, v = instrucao[1]
+                    argumentos.append(v if tipo == CONST else locais[v] if tipo == LOCAL else globais[v])
+                elif op == VM_CALL:
+                    _, destino, entrada, formais, n = instrucao
+                    valores = argumentos[len(argumentos) - n:]
+                    del argumentos[len(argumentos) - n:]
+                    pilha_chamadas.append((pc, destino, locais))
+                    locais = dict(zip(formais, valores))
+                    pc = entrada
+                elif op == VM_RETURN or op == VM_RET:
+                    if op == VM_RETURN:
+                        tipo, v = instrucao[1]
+                        resultado = v if tipo == CONST else locais[v] if tipo == LOCAL else globais[v]
+                    else:
+                        resultado = None
+                    if not pilha_chamadas:
+                        break
+                    pc, destino, locais = pilha_chamadas.pop()
+                    if destino is not None:
+                        tipo, v = destino
+                        if tipo == LOCAL:
+                            locais[v] = resultado
+                        else:
+                            globais[v] = resultado
+                elif op == VM_PRINT:
+                    tipo, v = instrucao[1]
+                    saida.append(formatar_valor(v if tipo == CONST else locais[v] if tipo == LOCAL else globais[v]))
+                elif op == VM_NEGACAO:
+                    tipo, v = instrucao[2]
+                    resultado = not (v if tipo == CONST else locais[v] if tipo == LOCAL else globais[v])
+                    tipo, v = instrucao[1]
+                    if tipo == LOCAL:
+                        locais[v] = resultado
+                    else:
+                        globais[v] = resultado
+                elif op == VM_DECLARE:
+                    tipo, v = instrucao[1]
+                    if tipo == LOCAL:
+                        locais[v] = 0
+                    else:
+                        globais[v] = 0
+                elif op == VM_HALT:
+                    break
+        except KeyError as e:
+            raise Exception(f"Erro de execução: variável {e} usada antes de receber valor.")
+        finally:
+            self.tempo_execucao = time.perf_counter() - inicio
+            self.instrucoes_executadas = executadas
+            self.saida = saida
+        return saida
+
+    @property
+    def instrucoes_por_segundo(self):
+        if self.tempo_execucao <= 0:
+            return 0.0
+        return self.instrucoes_executadas / self.tempo_execucao
+
+
+if __name__ == '__main__':
+    from compilador import compilar
+    from entradas_de_exemplo import entradas_de_exemplo
+
+    # Executa os exemplos válidos (3AC original e otimizado) e confere as saídas com os comentários
+    # '// Deve imprimir N'; o relatório de cada passagem do otimizador fica em benchmark.py --otimizador
+    for nome, codigo in entradas_de_exemplo.items():
+        if nome.startswith('Erro'):
+            continue
+        esperado = re.findall(r'//\s*Deve imprimir\s+(\S+)', codigo)
+        compilacao = compilar(codigo)
+        print(nome)
+        for rotulo, codigo_3ac in (('3AC', compilacao.codigo_3ac), ('Otimizado', compilacao.codigo_otimizado)):
+            vm = MaquinaVirtual(codigo_3ac)
+            try:
+                saida = vm.executar(limite_instrucoes=1_000_000)
+            except Exception as e:
+                print(f"  {rotulo:<10} {e}")
+                continue
+            situacao = 'OK' if not esperado or saida == esperado else f'DIVERGE (esperado {esperado})'
+            print(f"  {rotulo:<10} saída={saida} {situacao} | {vm.instrucoes_executadas} instruções, "
+                  f"{vm.instrucoes_por_segundo:,.0f} instr/s")
@@ -0,0 +1,131 @@
+from collections import Counter
+from codigo_intermediario import (
+    Instrucao, constante, CONSTANTE, OP_CALL, OP_COPIA, OP_BINARIA, OP_UNARIA
+)
+from ssa import VALOR_INSTRUCAO
+
+# a op b == b op a; a > b == b < a
+COMUTATIVOS = frozenset({'+', '*', '==', '!=', '&&', '||'})
+ESPELHADOS = {'>': '<', '>=': '<='}
+
+
+class NumeracaoValores:
+    # Numeração de valores sobre uma FormaSSA, percorrendo a árvore de dominância: uma operação pura cujos
+    # operandos têm os mesmos valores de uma operação anterior que a domina vira cópia do resultado dela,
+    # e usos de valores já conhecidos passam a ler direto o nome que os guarda.
+    # Um resultado só é reaproveitado se o nome que o guarda tem uma única definição na função (a que
+    # domina o ponto de uso). Globais ficam fora do SSA: entram nas chaves com uma época que muda a cada
+    # bloco, chamada ou escrita em global, então para elas a numeração é só local ao bloco.
+    def __init__(self, forma):
+        self.forma = forma
+        definicoes = Counter(i.dest.valor for i in forma.codigo if forma._renomeavel(i.dest))
+        self.unicas = {nome for nome, n in definicoes.items() if n == 1}
+        self.chave_valor = {}
+        self.lideres = {}
+        self.reaproveitadas = 0
+
+    def _chave_operando(self, operando, uso, epoca):
+        if operando.classe == CONSTANTE:
+            return ('c', type(operando.valor).__name__, operando.valor)
+        if uso < 0:
+            return ('g', operando.valor, epoca)
+        return self.chave_valor.get(uso, ('s', uso))
+
+    def _substituir(self, operando, uso):
+        # O valor lido já está em outro nome (ou é constante): lê direto de lá
+        if operando is None or uso < 0:
+            return operando
+        chave = self.chave_valor.get(uso)
+        if chave is None:
+            return operando
+        if chave[0] == 'c':
+            return constante(chave[2])
+        if chave[0] == 's' and chave[1] != uso:
+            return self.lideres.get(chave[1], operando)
+        return operando
+
+    def _chave_expressao(self, oper, chave_a, chave_b):
+        if oper in ESPELHADOS:
+            return (ESPELHADOS[oper], chave_b, chave_a)
+        if oper in COMUTATIVOS and repr(chave_b) < repr(chave_a):
+            return (oper, chave_b, chave_a)
+        return (oper, chave_a, chave_b)
+
+    def _chave_phi(self, phi):
+        # Todos os argumentos com o mesmo valor (já numerado): a phi é esse valor
+        chaves = {self.chave_valor.get(argumento) for argumento in phi[3]}
+        if len(chaves) == 1 and None not in chaves:
+            return chaves.pop()
+        return ('s', phi[2])
+
+    def aplicar(self):
+        forma = self.forma
+        grafo = forma.grafo
+        codigo = list(forma.codigo)
+        if not len(grafo):
+            return codigo
+        filhos = grafo.filhos_dominancia(forma.idom)
+        tabela = {}
+        desfazer = {}
+        epoca = 0
+        trabalho = [(0, True)]
+        while trabalho:
+            b, entrando = trabalho.pop()
+            if not entrando:
+                for chave, anterior in reversed(desfazer.pop(b)):
+                    if anterior is None:
+                        del tabela[chave]
+                    else:
+                        tabela[chave] = anterior
+                continue
+            registro = []
+            epoca += 1
+            for indice in forma.phis[b]:
+                phi = forma.lista_phis[indice]
+                self.chave_valor[phi[2]] = self._chave_phi(phi)
+
+            for pos in range(grafo.inicios[b], grafo.fins[b]):
+                instrucao = codigo[pos]
+                op = instrucao.op
+                a = self._substituir(instrucao.a, forma.uso_a[pos])
+                b_ = self._substituir(instrucao.b, forma.uso_b[pos])
+                if a is not instrucao.a or b_ is not instrucao.b:
+                    instrucao = codigo[pos] = Instrucao(op, dest=instrucao.dest, a=a, b=b_, oper=instrucao.oper)
+                if op == OP_CALL:
+                    epoca += 1
+
+                dest = instrucao.dest
+                valor = forma.definicao[pos]
+                if valor < 0:
+                    if dest is not None:
+                        # Escrita em global
+                        epoca += 1
+                    continue
+
+                chave = None
+                if op == OP_COPIA:
+                    self.chave_valor[valor] = self._chave_operando(a, forma.uso_a[pos], epoca)
+                    continue
+                if op == OP_BINARIA:
+                    chave = self._chave_expressao(instrucao.oper, self._chave_operando(a, forma.uso_a[pos], epoca),
+                                                  self._chave_operando(b_, forma.uso_b[pos], epoca))
+                elif op == OP_UNARIA:
+                    chave = (instrucao.oper, self._chave_operando(a, forma.uso_a[pos], epoca))
+
+                existente = tabela.get(chave) if chave is not None else None
+                if existente is not None:
+                    codigo[pos] = Instrucao(OP_COPIA, dest=dest, a=self.lideres[existente])
+                    self.chave_valor[valor] = ('s', existente)
+                    self.reaproveitadas += 1
+                    continue
+                self.chave_valor[valor] = ('s', valor)
+                if dest.valor in self.unicas and forma.origem_valores[valor] == VALOR_INSTRUCAO:
+                    self.lideres[valor] = dest
+                    if chave is not None:
+                        registro.append((chave, tabela.get(chave)))
+                        tabela[chave] = valor
+
+            desfazer[b] = registro
+            trabalho.append((b, False))
+            trabalho.extend((f, True) for f in filhos[b])
+        return codigo
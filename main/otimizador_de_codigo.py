@@ -1,173 +1,314 @@
-import re
+from collections import defaultdict, Counter
+from codigo_intermediario import (
+    Instrucao, constante, CONSTANTE, TEMPORARIO, VARIAVEL, OPERACOES,
+    OP_FUNCAO, OP_ROTULO, OP_GOTO, OP_CALL, OP_DECLARE,
+    OP_COPIA, OP_BINARIA, OP_UNARIA
+)
+from grafo_fluxo import GrafoFluxo, dividir_funcoes, construir_grafos, globais_da_funcao
+from vivacidade import Vivacidade, SAIDAS
+from ssa import FormaSSA, PropagacaoConstantes
+from inlining import Inlining
+from numeracao_valores import NumeracaoValores
+from lacos import MovimentacaoInvariantes, ReducaoForca, Desenrolamento, maior_rotulo
+from peephole import Peephole
+from gerenciador_passagens import GerenciadorPassagens, MAX_ITERACOES_PADRAO
+from alocacao_registradores import AlocacaoRegistradores
 
 
 class Otimizador:
-    def __init__(self, codigo_3ac):
+    # dependencias_funcao: grafo de chamadas do AnalisadorSemantico (se ausente, é obtido do próprio 3AC);
+    # tamanho_inlining e tamanho_maximo_chamador são os limites da expansão de chamadas (ver Inlining);
+    # fator_desenrolamento e orcamento_desenrolamento controlam o desenrolamento de laços (ver Desenrolamento);
+    # nivel escolhe as passagens (0, 1 ou 2) e max_iteracoes limita as voltas até o ponto fixo;
+    # registradores é o k da alocação dos temporários (None a desliga, ver AlocacaoRegistradores)
+    def __init__(self, codigo_3ac, instrumentacao=None, dependencias_funcao=None, tamanho_inlining=40,
+                 tamanho_maximo_chamador=2000, fator_desenrolamento=4, orcamento_desenrolamento=200, nivel=2,
+                 max_iteracoes=MAX_ITERACOES_PADRAO, registradores=8):
         self.codigo = codigo_3ac
-        self.funcoes = self._analisar_funcoes()
+        self.instrumentacao = instrumentacao
+        self.nivel = nivel
+        self.dependencias_funcao = dependencias_funcao
+        self.tamanho_inlining = tamanho_inlining
+        self.tamanho_maximo_chamador = tamanho_maximo_chamador
+        self.fator_desenrolamento = fator_desenrolamento
+        self.orcamento_desenrolamento = orcamento_desenrolamento
+        self.registradores = registradores
+        self.chamadas_expandidas = 0
+        self.expressoes_reaproveitadas = 0
+        self.invariantes_movidas = 0
+        self.multiplicacoes_reduzidas = 0
+        self.lacos_desenrolados = 0
+        self.estatisticas_peephole = Counter()
+        self.temporarios_alocados = 0
+        self.temporarios_derramados = 0
+        self.alocacao = {}
+        self.gerenciador = GerenciadorPassagens(instrumentacao, max_iteracoes)
+        self._registrar_passagens()
 
-    def _obter_valor(self, operando, tabela_simbolos):
-        try:
-            return int(operando)
-        except ValueError:
-            try:
-                return float(operando)
-            except ValueError:
-                return tabela_simbolos.get(operando, operando)
+    def _registrar_passagens(self):
+        # A expansão de chamadas roda uma vez; as demais se repetem até o ponto fixo, já que cada uma pode
+        # abrir trabalho para as outras (dobrar uma condição mata código, desenrolar um laço gera constantes...)
+        registrar = self.gerenciador.registrar
+        registrar('inlining', self._passagem_inlining, 10, niveis=(2,), ponto_fixo=False)
+        registrar('dobramento', self._passagem_dobramento, 20)
+        registrar('propagacao_constantes', self._passagem_propagacao_constantes, 30, niveis=(2,))
+        registrar('numeracao_valores', self._passagem_numeracao_valores, 40, niveis=(2,))
+        registrar('invariantes_laco', self._passagem_invariantes_laco, 50, niveis=(2,))
+        registrar('reducao_forca', self._passagem_reducao_forca, 60, niveis=(2,))
+        registrar('desenrolamento', self._passagem_desenrolamento, 70, niveis=(2,))
+        registrar('codigo_morto', self._passagem_eliminacao_codigo_morto, 80)
+        registrar('peephole', self._passagem_peephole, 90)
+        if self.registradores:
+            # Por último: reaproveitar nomes atrapalharia as passagens anteriores
+            registrar('alocacao_registradores', self._passagem_alocacao_registradores, 100, ponto_fixo=False)
+
+    def _eh_numero(self, valor):
+        return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+    def _obter_valor(self, operando, tabela_constantes):
+        if operando.classe == CONSTANTE:
+            return operando.valor
+        return tabela_constantes.get(operando.valor)
 
     def _avaliar_expressao(self, v1, op, v2):
-        if op == '+':
-            return v1 + v2
-        if op == '-':
-            return v1 - v2
-        if op == '*':
-            return v1 * v2
+        if op in ('+', '-', '*'):
+            return OPERACOES[op](v1, v2)
         if op == '/':
             if v2 != 0:
-                return v1 / v2
+                return OPERACOES[op](v1, v2)
             return None
         return None
 
-    def _analisar_funcoes(self):
-        funcoes = {}
-        nome_funcao = None
-        conteudo_funcao = []
-        for linha in self.codigo:
-            linha_limpa = linha.strip()
-            if linha_limpa.endswith(':'):
-                if nome_funcao:
-                    funcoes[nome_funcao] = conteudo_funcao
-                    conteudo_funcao = []
-                nome_funcao = linha_limpa.replace(':', '')
-            elif nome_funcao:
-                conteudo_funcao.append(linha)
-        if nome_funcao:
-            funcoes[nome_funcao] = conteudo_funcao
-        return funcoes
-
-    def _passagem_inlining_e_dobramento(self, codigo):
+    def _invalidar(self, nome, tabela_constantes, tabela_copias, dependentes):
+        tabela_constantes.pop(nome, None)
+        fonte = tabela_copias.pop(nome, None)
+        if fonte is not None:
+            dependentes[fonte.valor].discard(nome)
+        for copia in dependentes.pop(nome, ()):
+            tabela_copias.pop(copia, None)
+
+    def _passagem_inlining(self, codigo):
+        inlining = Inlining(codigo, self.dependencias_funcao, self.tamanho_inlining, self.tamanho_maximo_chamador)
+        codigo_novo = inlining.aplicar()
+        self.chamadas_expandidas += inlining.expandidas
+        return codigo_novo
+
+    def _passagem_dobramento(self, codigo):
+        codigo_novo = []
+        for nome, grafo in construir_grafos(codigo):
+            # Uma chamada pode alterar as globais usadas na função
+            globais = globais_da_funcao(codigo, grafo.inicios[0], grafo.fins[-1]) if nome is not None else set()
+            # Constantes e cópias só valem dentro do bloco básico: um rótulo pode ser alcançado por outro caminho
+            for bloco in range(len(grafo)):
+                codigo_novo.extend(self._dobrar_bloco(grafo.instrucoes(bloco), globais))
+        return codigo_novo
+
+    def _dobrar_bloco(self, codigo, globais):
         codigo_novo = []
         tabela_constantes = {}
         tabela_copias = {}
+        dependentes = defaultdict(set)
 
-        for linha in codigo:
-            linha_limpa = linha.strip()
-            partes = re.split(r'[\s,]+', linha_limpa)
-            if not partes or not partes[0] or linha_limpa.endswith(':'):
-                codigo_novo.append(linha)
+        for instrucao in codigo:
+            op = instrucao.op
+            if op == OP_FUNCAO or op == OP_ROTULO:
+                codigo_novo.append(instrucao)
                 continue
 
-            instrucao = partes[0]
-
-            novas_partes = [tabela_copias.get(p, p) for p in partes]
-            partes = novas_partes
-
-            if len(partes) >= 3 and partes[1] == '=' and partes[2] == 'call':
-                dest = partes[0]
-                nome_funcao = partes[3]
-                if nome_funcao in self.funcoes:
-                    func_code = self.funcoes[nome_funcao]
-                    for func_line in func_code:
-                        func_parts = func_line.strip().split()
-                        if func_parts and func_parts[0] == 'return':
-                            valor_retorno = self._obter_valor(func_parts[1], {})
-                            if isinstance(valor_retorno, (int, float)):
-                                tabela_constantes[dest] = valor_retorno
-                                codigo_novo.append(f"{dest} = {valor_retorno}")
-                                break
-                    else:
-                        codigo_novo.append(" ".join(partes))
+            a, b, dest = instrucao.a, instrucao.b, instrucao.dest
+            if a is not None and a.classe in (TEMPORARIO, VARIAVEL):
+                a = tabela_copias.get(a.valor, a)
+            if b is not None and b.classe in (TEMPORARIO, VARIAVEL):
+                b = tabela_copias.get(b.valor, b)
+            if dest is not None:
+                self._invalidar(dest.valor, tabela_constantes, tabela_copias, dependentes)
+
+            if op == OP_CALL:
+                for nome in [n for n in globais if n in tabela_constantes or n in tabela_copias or n in dependentes]:
+                    self._invalidar(nome, tabela_constantes, tabela_copias, dependentes)
+                codigo_novo.append(instrucao)
+
+            elif op == OP_COPIA:
+                valor_fonte = self._obter_valor(a, tabela_constantes)
+                if self._eh_numero(valor_fonte):
+                    tabela_constantes[dest.valor] = valor_fonte
+                    codigo_novo.append(Instrucao(OP_COPIA, dest=dest, a=constante(valor_fonte)))
                 else:
-                    codigo_novo.append(" ".join(partes))
-
-            elif instrucao == 'call':
-                codigo_novo.append(" ".join(partes))
-
-            elif len(partes) >= 3 and partes[1] == '=':
-                dest = partes[0]
-                if len(partes) == 3:
-                    fonte = partes[2]
-                    valor_fonte = self._obter_valor(fonte, tabela_constantes)
-                    if isinstance(valor_fonte, (int, float)):
-                        tabela_constantes[dest] = valor_fonte
-                        codigo_novo.append(f"{dest} = {valor_fonte}")
-                    else:
-                        tabela_copias[dest] = fonte
-                        codigo_novo.append(" ".join(partes))
-                elif len(partes) == 5:
-                    op1_str, op, op2_str = partes[2], partes[3], partes[4]
-                    v1 = self._obter_valor(op1_str, tabela_constantes)
-                    v2 = self._obter_valor(op2_str, tabela_constantes)
-
-                    if isinstance(v1, (int, float)) and isinstance(v2, (int, float)):
-                        resultado = self._avaliar_expressao(v1, op, v2)
-                        if resultado is not None:
-                            tabela_constantes[dest] = resultado
-                            codigo_novo.append(f"{dest} = {resultado}")
-                        else:
-                            codigo_novo.append(" ".join(partes))
-                    else:
-                        codigo_novo.append(" ".join(partes))
+                    if a.classe != CONSTANTE and a.valor != dest.valor:
+                        tabela_copias[dest.valor] = a
+                        dependentes[a.valor].add(dest.valor)
+                    codigo_novo.append(Instrucao(OP_COPIA, dest=dest, a=a))
+
+            elif op == OP_BINARIA:
+                v1 = self._obter_valor(a, tabela_constantes)
+                v2 = self._obter_valor(b, tabela_constantes)
+                resultado = None
+                if self._eh_numero(v1) and self._eh_numero(v2):
+                    resultado = self._avaliar_expressao(v1, instrucao.oper, v2)
+                if resultado is not None:
+                    tabela_constantes[dest.valor] = resultado
+                    codigo_novo.append(Instrucao(OP_COPIA, dest=dest, a=constante(resultado)))
+                else:
+                    codigo_novo.append(Instrucao(OP_BINARIA, dest=dest, a=a, b=b, oper=instrucao.oper))
+
+            elif op == OP_UNARIA:
+                codigo_novo.append(Instrucao(OP_UNARIA, dest=dest, a=a, oper=instrucao.oper))
+
             else:
-                for i, parte in enumerate(partes):
-                    valor = tabela_constantes.get(parte, parte)
-                    if isinstance(valor, (int, float)):
-                        partes[i] = str(valor)
-                codigo_novo.append(" ".join(partes))
+                if a is not None and a.classe in (TEMPORARIO, VARIAVEL) and self._eh_numero(tabela_constantes.get(a.valor)):
+                    a = constante(tabela_constantes[a.valor])
+                codigo_novo.append(Instrucao(op, dest=dest, a=a, b=b, oper=instrucao.oper))
         return codigo_novo
 
-    def _passagem_eliminacao_codigo_morto(self, codigo):
-        variaveis_vivas = set()
-        codigo_final = []
+    def _passagem_propagacao_constantes(self, codigo):
+        # Propagação de constantes condicional e esparsa sobre a forma SSA de cada função: remove os blocos
+        # que nunca executam e decide os if_false de condição constante
+        codigo_novo = []
+        for nome, inicio, fim in dividir_funcoes(codigo):
+            trecho = codigo[inicio:fim]
+            if nome is not None:
+                trecho = PropagacaoConstantes(FormaSSA(trecho)).aplicar()
+            codigo_novo.extend(trecho)
+        return codigo_novo
 
-        for linha in reversed(codigo):
-            linha_limpa = linha.strip()
-            partes = re.split(r'[\s,]+', linha_limpa)
-            if not partes or not partes[0] or partes[0].endswith(':'):
-                codigo_final.insert(0, linha_limpa)
-                continue
+    def _passagem_numeracao_valores(self, codigo):
+        # Eliminação de subexpressões comuns: local ao bloco e, pela árvore de dominância, entre blocos
+        codigo_novo = []
+        for nome, inicio, fim in dividir_funcoes(codigo):
+            trecho = codigo[inicio:fim]
+            if nome is not None:
+                numeracao = NumeracaoValores(FormaSSA(trecho))
+                trecho = numeracao.aplicar()
+                self.expressoes_reaproveitadas += numeracao.reaproveitadas
+            codigo_novo.extend(trecho)
+        return codigo_novo
 
-            instrucao = partes[0]
-            dest = None
-            usadas_nesta_linha = set()
-
-            if instrucao == 'declare':
-                if len(partes) > 1:
-                    dest = partes[1]
-                if dest not in variaveis_vivas:
-                    continue
-
-            elif len(partes) >= 3 and partes[1] == '=':
-                dest = partes[0]
-                usadas_nesta_linha.update(
-                    p for p in partes[2:] if p and not p.isdigit() and not (p.startswith('L') and p[1:].isdigit())
-                )
-                if dest not in variaveis_vivas:
-                    continue
-
-            elif instrucao in ['print', 'param', 'return', 'if_false', 'goto']:
-                usadas_nesta_linha.update(
-                    p for p in partes[1:] if p and not p.isdigit() and not (p.startswith('L') and p[1:].isdigit())
-                )
-            elif instrucao == 'call':
-                usadas_nesta_linha.update(
-                    p for p in partes[1:] if
-                    p and not p.isdigit() and not (p.startswith('L') and p[1:].isdigit()) and not p.isdigit()
-                )
+    def _passagem_invariantes_laco(self, codigo):
+        codigo_novo = []
+        proximo_rotulo = maior_rotulo(codigo) + 1
+        for nome, inicio, fim in dividir_funcoes(codigo):
+            trecho = codigo[inicio:fim]
+            if nome is not None:
+                movimentacao = MovimentacaoInvariantes(trecho, proximo_rotulo)
+                trecho = movimentacao.aplicar()
+                proximo_rotulo = movimentacao.proximo_rotulo
+                self.invariantes_movidas += movimentacao.movidas
+            codigo_novo.extend(trecho)
+        return codigo_novo
 
-            if dest is not None:
-                variaveis_vivas.discard(dest)
+    def _passagem_reducao_forca(self, codigo):
+        codigo_novo = []
+        proximo_rotulo = maior_rotulo(codigo) + 1
+        for nome, inicio, fim in dividir_funcoes(codigo):
+            trecho = codigo[inicio:fim]
+            if nome is not None:
+                reducao = ReducaoForca(trecho, proximo_rotulo=proximo_rotulo)
+                trecho = reducao.aplicar()
+                proximo_rotulo = reducao.proximo_rotulo
+                self.multiplicacoes_reduzidas += reducao.reduzidas
+            codigo_novo.extend(trecho)
+        return codigo_novo
+
+    def _passagem_desenrolamento(self, codigo):
+        codigo_novo = []
+        proximo_rotulo = maior_rotulo(codigo) + 1
+        for nome, inicio, fim in dividir_funcoes(codigo):
+            trecho = codigo[inicio:fim]
+            if nome is not None:
+                desenrolamento = Desenrolamento(trecho, self.fator_desenrolamento, self.orcamento_desenrolamento,
+                                                proximo_rotulo)
+                trecho = desenrolamento.aplicar()
+                proximo_rotulo = desenrolamento.proximo_rotulo
+                self.lacos_desenrolados += desenrolamento.completos + desenrolamento.parciais
+            codigo_novo.extend(trecho)
+        return codigo_novo
 
-            codigo_final.insert(0, linha_limpa)
-            variaveis_vivas.update(usadas_nesta_linha)
+    def _removivel(self, instrucao):
+        # Instruções sem efeito além de escrever no destino; divisão por valor não constante pode falhar
+        op = instrucao.op
+        if op == OP_COPIA or op == OP_UNARIA:
+            return True
+        if op == OP_BINARIA:
+            if instrucao.oper in ('/', '%'):
+                return instrucao.b.classe == CONSTANTE and instrucao.b.valor != 0
+            return True
+        return False
 
-        codigo_final = [linha for linha in codigo_final if linha.strip()]
-        if codigo_final and codigo_final[0].strip() == 'goto main' and codigo_final[1].strip() == 'main:':
+    def _eliminar_atribuicoes_mortas(self, grafo, vivacidade):
+        codigo_novo = []
+        removidas = 0
+        for bloco in range(len(grafo)):
+            # Nomes com número na análise ficam em 'vivas' (bits); os demais só vivem dentro do bloco
+            vivas = vivacidade.saida[bloco]
+            vivas_no_bloco = set()
+            instrucoes = []
+            for instrucao in reversed(grafo.instrucoes(bloco)):
+                dest = instrucao.dest
+                if dest is not None and (dest.classe == TEMPORARIO or dest.classe == VARIAVEL):
+                    bit = vivacidade.bit(dest.valor)
+                    viva = vivas & bit if bit else dest.valor in vivas_no_bloco
+                    if not viva:
+                        if self._removivel(instrucao):
+                            removidas += 1
+                            continue
+                        if instrucao.op == OP_CALL:
+                            # O resultado não é usado: a chamada fica, sem destino
+                            instrucao = Instrucao(OP_CALL, a=instrucao.a, b=instrucao.b)
+                    if bit:
+                        vivas &= ~bit
+                    else:
+                        vivas_no_bloco.discard(dest.valor)
+                for operando in instrucao.usos():
+                    bit = vivacidade.bit(operando.valor)
+                    if bit:
+                        vivas |= bit
+                    else:
+                        vivas_no_bloco.add(operando.valor)
+                if instrucao.op == OP_CALL or instrucao.op in SAIDAS:
+                    vivas |= vivacidade.mascara_globais
+                instrucoes.append(instrucao)
+            instrucoes.reverse()
+            codigo_novo.extend(instrucoes)
+        return codigo_novo, removidas
+
+    def _passagem_eliminacao_codigo_morto(self, codigo):
+        # Vivacidade por blocos básicos (correta em laços); remover uma atribuição pode tornar outras
+        # mortas em blocos anteriores, então a análise é refeita até nada mais ser removido.
+        # Declarações ficam: é por elas que a máquina virtual sabe quais variáveis são locais. Só sai a
+        # declaração de uma variável que não aparece em mais nenhuma instrução da função.
+        codigo_final = []
+        for nome, inicio, fim in dividir_funcoes(codigo):
+            trecho = codigo[inicio:fim]
+            if nome is not None:
+                globais = globais_da_funcao(trecho, 0, len(trecho))
+                removidas = 1
+                while removidas:
+                    grafo = GrafoFluxo(trecho)
+                    trecho, removidas = self._eliminar_atribuicoes_mortas(grafo, Vivacidade(grafo, globais))
+                usadas = {o.valor for i in trecho if i.op != OP_DECLARE for o in (i.dest, i.a, i.b)
+                          if o is not None and o.classe == VARIAVEL}
+                trecho = [i for i in trecho if i.op != OP_DECLARE or i.dest.valor in usadas]
+            codigo_final.extend(trecho)
+
+        if (len(codigo_final) > 1 and codigo_final[0].op == OP_GOTO and codigo_final[0].a.valor == 'main'
+                and codigo_final[1].op == OP_FUNCAO and codigo_final[1].a.valor == 'main'):
             codigo_final.pop(0)
 
         return codigo_final
 
+    def _passagem_peephole(self, codigo):
+        peephole = Peephole(codigo)
+        codigo_novo = peephole.aplicar()
+        self.estatisticas_peephole.update(peephole.estatisticas)
+        return codigo_novo
+
+    def _passagem_alocacao_registradores(self, codigo):
+        alocacao = AlocacaoRegistradores(codigo, self.registradores)
+        codigo_novo = alocacao.aplicar()
+        self.temporarios_alocados += alocacao.temporarios
+        self.temporarios_derramados += alocacao.derramados
+        self.alocacao = alocacao.funcoes
+        return codigo_novo
+
     def otimizar(self):
-        codigo_fase1 = self._passagem_inlining_e_dobramento(self.codigo)
-        codigo_fase2 = self._passagem_eliminacao_codigo_morto(codigo_fase1)
-        return codigo_fase2
\ No newline at end of file
+        return self.gerenciador.executar(list(self.codigo), self.nivel)
@@ -0,0 +1,179 @@
+from collections import Counter
+from codigo_intermediario import (
+    Instrucao, TEMPORARIO, CONSTANTE, ROTULO_INTERNO,
+    OP_DECLARE, OP_FUNCAO, OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_IF_FALSE, OP_FORMAL, OP_CALL,
+    OP_RETURN, OP_RET, OP_HALT, OP_COPIA, OP_BINARIA, OP_UNARIA
+)
+
+# Depois delas a execução não segue para a próxima instrução
+INCONDICIONAIS = (OP_GOTO, OP_RETURN, OP_RET, OP_HALT)
+# Mesmo inalcançáveis ficam: declarações e formais dizem à máquina virtual quais nomes são locais, e os
+# marcadores de quadro e o halt delimitam as funções para as outras passagens
+ESTRUTURAIS = (OP_DECLARE, OP_FORMAL, OP_PUSH_STACK, OP_POP_STACK, OP_HALT)
+# Instruções cujo destino pode ser trocado pelo da cópia seguinte
+ENCAMINHAVEIS = (OP_COPIA, OP_BINARIA, OP_UNARIA, OP_CALL)
+
+
+def _fim_de_bloco(instrucao):
+    op = instrucao.op
+    return op == OP_ROTULO or op == OP_FUNCAO or op == OP_IF_FALSE or op in INCONDICIONAIS
+
+
+class Peephole:
+    # Otimizações de janela sobre o programa inteiro (rótulos são globais). O código é percorrido uma vez
+    # por rodada; cada instrução entra no fim da saída e as regras olham as últimas instruções dela, então
+    # uma troca pode abrir outra logo atrás (a janela desliza para trás sem custo). As rodadas se repetem
+    # até nenhuma regra se aplicar. Regras (as contagens ficam em 'estatisticas'):
+    #   desvio_para_proxima    goto L / if_false t goto L seguido do próprio L:
+    #   desvio_encadeado       desvio para um rótulo cuja primeira instrução é outro goto
+    #   desvio_constante       if_false sobre constante (ou temporário que acabou de recebê-la)
+    #   codigo_inalcancavel    instruções depois de goto, return, ret ou halt, até o próximo rótulo
+    #   copia_encaminhada      t = e; a = t  vira  a = e, se t não é lido depois
+    #   copia_redundante       a = a
+    #   rotulo_sem_referencia  rótulo interno para o qual ninguém desvia
+    def __init__(self, codigo, rodadas=20):
+        self.codigo = codigo
+        self.rodadas = rodadas
+        self.estatisticas = Counter()
+
+    def aplicar(self):
+        codigo = self.codigo
+        for _ in range(self.rodadas):
+            codigo, alteracoes = self._rodada(codigo)
+            if not alteracoes:
+                break
+        return codigo
+
+    def _destinos(self, codigo):
+        # Rótulo -> destino final, seguindo rótulos cuja primeira instrução é 'goto'
+        posicoes = {}
+        for pos, instrucao in enumerate(codigo):
+            if instrucao.op == OP_ROTULO:
+                posicoes[instrucao.a.valor] = pos
+        salto = {}
+        for nome, pos in posicoes.items():
+            while pos < len(codigo) and codigo[pos].op == OP_ROTULO:
+                pos += 1
+            if pos < len(codigo) and codigo[pos].op == OP_GOTO:
+                salto[nome] = codigo[pos].a
+        destinos = {}
+        for nome in salto:
+            vistos = {nome}
+            alvo = salto[nome]
+            while alvo.valor in salto and alvo.valor not in vistos:
+                vistos.add(alvo.valor)
+                alvo = salto[alvo.valor]
+            if alvo.valor != nome:
+                destinos[nome] = alvo
+        return destinos
+
+    def _temporarios_locais(self, codigo):
+        # Temporários lidos só depois de uma definição no mesmo bloco: não estão vivos entre blocos
+        definidos = set()
+        nao_locais = set()
+        for instrucao in codigo:
+            for operando in instrucao.usos():
+                if operando.classe == TEMPORARIO and operando.valor not in definidos:
+                    nao_locais.add(operando.valor)
+            if instrucao.dest is not None and instrucao.dest.classe == TEMPORARIO:
+                definidos.add(instrucao.dest.valor)
+            if _fim_de_bloco(instrucao):
+                definidos = set()
+        return nao_locais
+
+    def _lido_depois(self, codigo, pos, nome):
+        # O temporário é lido no resto do bloco antes de ser redefinido?
+        for pos in range(pos, len(codigo)):
+            instrucao = codigo[pos]
+            if instrucao.op == OP_ROTULO or instrucao.op == OP_FUNCAO:
+                return False
+            if any(o.valor == nome for o in instrucao.usos()):
+                return True
+            if instrucao.dest is not None and instrucao.dest.valor == nome:
+                return False
+            if _fim_de_bloco(instrucao):
+                return False
+        return False
+
+    def _rodada(self, codigo):
+        estatisticas = self.estatisticas
+        antes = sum(estatisticas.values())
+        destinos = self._destinos(codigo)
+        nao_locais = self._temporarios_locais(codigo)
+        referenciados = {i.a.valor for i in codigo if i.op == OP_GOTO} | {i.b.valor for i in codigo if i.op == OP_IF_FALSE}
+        saida = []
+        inalcancavel = False
+
+        for pos, instrucao in enumerate(codigo):
+            op = instrucao.op
+            if op == OP_FUNCAO:
+                inalcancavel = False
+                saida.append(instrucao)
+                continue
+
+            if op == OP_ROTULO:
+                nome = instrucao.a.valor
+                if nome not in referenciados and ROTULO_INTERNO.match(nome):
+                    estatisticas['rotulo_sem_referencia'] += 1
+                    continue
+                inalcancavel = False
+                # Desvios logo antes deste rótulo (passando por outros rótulos) caem nele de qualquer forma
+                k = len(saida) - 1
+                while k >= 0 and saida[k].op == OP_ROTULO:
+                    k -= 1
+                while k >= 0 and ((saida[k].op == OP_GOTO and saida[k].a.valor == nome)
+                                  or (saida[k].op == OP_IF_FALSE and saida[k].b.valor == nome)):
+                    del saida[k]
+                    estatisticas['desvio_para_proxima'] += 1
+                    k -= 1
+                    while k >= 0 and saida[k].op == OP_ROTULO:
+                        k -= 1
+                saida.append(instrucao)
+                continue
+
+            if inalcancavel and op not in ESTRUTURAIS:
+                estatisticas['codigo_inalcancavel'] += 1
+                continue
+
+            if op == OP_GOTO and instrucao.a.valor in destinos:
+                instrucao = Instrucao(OP_GOTO, a=destinos[instrucao.a.valor])
+                estatisticas['desvio_encadeado'] += 1
+
+            elif op == OP_IF_FALSE:
+                condicao = instrucao.a
+                anterior = saida[-1] if saida else None
+                if (condicao.classe == TEMPORARIO and condicao.valor not in nao_locais and anterior is not None
+                        and anterior.op == OP_COPIA and anterior.dest.valor == condicao.valor
+                        and anterior.a.classe == CONSTANTE):
+                    # t = c; if_false t goto L: o if_false fecha o bloco, então t não é lido depois
+                    saida.pop()
+                    condicao = anterior.a
+                if condicao.classe == CONSTANTE:
+                    estatisticas['desvio_constante'] += 1
+                    if condicao.valor:
+                        continue
+                    instrucao = Instrucao(OP_GOTO, a=destinos.get(instrucao.b.valor, instrucao.b))
+                    op = OP_GOTO
+                elif instrucao.b.valor in destinos:
+                    instrucao = Instrucao(OP_IF_FALSE, a=condicao, b=destinos[instrucao.b.valor])
+                    estatisticas['desvio_encadeado'] += 1
+
+            elif op == OP_COPIA:
+                fonte = instrucao.a
+                if fonte.classe != CONSTANTE and fonte.valor == instrucao.dest.valor:
+                    estatisticas['copia_redundante'] += 1
+                    continue
+                anterior = saida[-1] if saida else None
+                if (fonte.classe == TEMPORARIO and fonte.valor not in nao_locais and anterior is not None
+                        and anterior.op in ENCAMINHAVEIS and anterior.dest is not None
+                        and anterior.dest.valor == fonte.valor and not self._lido_depois(codigo, pos + 1, fonte.valor)):
+                    saida[-1] = Instrucao(anterior.op, dest=instrucao.dest, a=anterior.a, b=anterior.b,
+                                          oper=anterior.oper)
+                    estatisticas['copia_encaminhada'] += 1
+                    continue
+
+            saida.append(instrucao)
+            if op in INCONDICIONAIS:
+                inalcancavel = True
+
+        return saida, sum(estatisticas.values()) - antes
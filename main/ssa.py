@@ -0,0 +1,295 @@
+from collections import defaultdict
+from codigo_intermediario import (
+    Instrucao, constante, CONSTANTE, TEMPORARIO, VARIAVEL, OPERACOES,
+    OP_GOTO, OP_IF_FALSE, OP_DECLARE, OP_COPIA, OP_BINARIA, OP_UNARIA, OP_ROTULO, OP_FUNCAO
+)
+from grafo_fluxo import GrafoFluxo, globais_da_funcao
+from vivacidade import Vivacidade
+
+# Origem de cada valor SSA
+VALOR_INSTRUCAO, VALOR_PHI, VALOR_INDEFINIDO = range(3)
+
+# Reticulado da propagação de constantes
+TOPO, CONSTANTE_SCCP, FUNDO = range(3)
+
+
+class FormaSSA:
+    # Forma SSA de uma função mantida ao lado do código, que não é alterado: cada definição de variável local
+    # ou temporário cria um valor SSA (um número), cada uso aponta para o valor que o alcança e os pontos
+    # de junção recebem funções phi. As phi só são criadas onde a variável está viva (SSA podada).
+    # Globais ficam fora: chamadas podem alterá-las.
+    def __init__(self, codigo, globais=None):
+        self.codigo = codigo
+        self.grafo = grafo = GrafoFluxo(codigo)
+        self.globais = globais_da_funcao(codigo, 0, len(codigo)) if globais is None else set(globais)
+        self.idom = grafo.dominadores()
+        n = len(grafo)
+
+        self.bloco_da_posicao = [0] * len(codigo)
+        definicoes = defaultdict(set)
+        for b in range(n):
+            for pos in range(grafo.inicios[b], grafo.fins[b]):
+                self.bloco_da_posicao[pos] = b
+                dest = codigo[pos].dest
+                if self._renomeavel(dest):
+                    definicoes[dest.valor].add(b)
+
+        # Valores SSA: nome da variável, origem e (para instruções e phi) onde são definidos
+        self.nomes_valores = []
+        self.origem_valores = []
+        self.local_valores = []
+        self.usuarios = []
+
+        # Phi: lista global; phis[b] tem os índices das phi do bloco b. Cada phi é [bloco, nome, valor, argumentos],
+        # com um argumento por predecessor, na ordem de grafo.predecessores[b]
+        self.lista_phis = []
+        self.phis = [[] for _ in range(n)]
+        fronteiras = grafo.fronteiras_dominancia(self.idom)
+        self.vivacidade = vivacidade = Vivacidade(grafo, self.globais)
+        for nome in sorted(definicoes):
+            bit = vivacidade.bit(nome)
+            if not bit:
+                continue
+            com_phi = set()
+            visitados = set(definicoes[nome])
+            pendentes = list(visitados)
+            while pendentes:
+                for f in fronteiras[pendentes.pop()]:
+                    if f not in com_phi and vivacidade.entrada[f] & bit:
+                        com_phi.add(f)
+                        self.phis[f].append(len(self.lista_phis))
+                        self.lista_phis.append([f, nome, -1, [-1] * len(grafo.predecessores[f])])
+                    if f not in visitados:
+                        visitados.add(f)
+                        pendentes.append(f)
+
+        self.uso_a = [-1] * len(codigo)
+        self.uso_b = [-1] * len(codigo)
+        self.definicao = [-1] * len(codigo)
+        self._renomear()
+
+    def _renomeavel(self, operando):
+        return (operando is not None and (operando.classe == TEMPORARIO or operando.classe == VARIAVEL)
+                and operando.valor not in self.globais)
+
+    def _novo_valor(self, nome, origem, local):
+        self.nomes_valores.append(nome)
+        self.origem_valores.append(origem)
+        self.local_valores.append(local)
+        self.usuarios.append([])
+        return len(self.nomes_valores) - 1
+
+    def _renomear(self):
+        # Percorre a árvore de dominância com uma pilha de versões por variável (sem recursão)
+        grafo = self.grafo
+        codigo = self.codigo
+        pilhas = defaultdict(list)
+        indefinidos = {}
+
+        def atual(nome):
+            pilha = pilhas[nome]
+            if pilha:
+                return pilha[-1]
+            # Uso sem definição em algum caminho: valor de origem desconhecida
+            if nome not in indefinidos:
+                indefinidos[nome] = self._novo_valor(nome, VALOR_INDEFINIDO, -1)
+            return indefinidos[nome]
+
+        if not len(grafo):
+            return
+        filhos = grafo.filhos_dominancia(self.idom)
+        empilhados_por_bloco = {}
+        trabalho = [(0, True)]
+        while trabalho:
+            b, entrando = trabalho.pop()
+            if not entrando:
+                for nome in empilhados_por_bloco.pop(b):
+                    pilhas[nome].pop()
+                continue
+            empilhados = []
+            for indice in self.phis[b]:
+                phi = self.lista_phis[indice]
+                phi[2] = self._novo_valor(phi[1], VALOR_PHI, indice)
+                pilhas[phi[1]].append(phi[2])
+                empilhados.append(phi[1])
+            for pos in range(grafo.inicios[b], grafo.fins[b]):
+                instrucao = codigo[pos]
+                if self._renomeavel(instrucao.a):
+                    self.uso_a[pos] = atual(instrucao.a.valor)
+                    self.usuarios[self.uso_a[pos]].append(pos)
+                if self._renomeavel(instrucao.b):
+                    self.uso_b[pos] = atual(instrucao.b.valor)
+                    self.usuarios[self.uso_b[pos]].append(pos)
+                if self._renomeavel(instrucao.dest):
+                    valor = self._novo_valor(instrucao.dest.valor, VALOR_INSTRUCAO, pos)
+                    self.definicao[pos] = valor
+                    pilhas[instrucao.dest.valor].append(valor)
+                    empilhados.append(instrucao.dest.valor)
+            for s in grafo.sucessores[b]:
+                k = grafo.predecessores[s].index(b)
+                for indice in self.phis[s]:
+                    phi = self.lista_phis[indice]
+                    phi[3][k] = atual(phi[1])
+                    self.usuarios[phi[3][k]].append(~indice)
+            empilhados_por_bloco[b] = empilhados
+            trabalho.append((b, False))
+            trabalho.extend((f, True) for f in filhos[b])
+
+
+def _mesma_constante(a, b):
+    return type(a) is type(b) and a == b
+
+
+class PropagacaoConstantes:
+    # Propagação de constantes condicional e esparsa (Wegman e Zadeck) sobre uma FormaSSA: só segue arestas
+    # que podem ser executadas, então constantes atravessam desvios cujo resultado já é conhecido.
+    def __init__(self, forma):
+        self.forma = forma
+        grafo = forma.grafo
+        self.nivel = bytearray(len(forma.nomes_valores))
+        self.valor = [None] * len(forma.nomes_valores)
+        for v, origem in enumerate(forma.origem_valores):
+            if origem == VALOR_INDEFINIDO:
+                self.nivel[v] = FUNDO
+        self.bloco_executado = bytearray(len(grafo))
+        self.arestas_executadas = set()
+        self._arestas = [(-1, 0)] if len(grafo) else []
+        self._valores = []
+        self._resolver()
+
+    def _resolver(self):
+        forma = self.forma
+        grafo = forma.grafo
+        while self._arestas or self._valores:
+            while self._arestas:
+                aresta = self._arestas.pop()
+                if aresta in self.arestas_executadas:
+                    continue
+                self.arestas_executadas.add(aresta)
+                b = aresta[1]
+                for indice in forma.phis[b]:
+                    self._avaliar_phi(indice)
+                if not self.bloco_executado[b]:
+                    self.bloco_executado[b] = 1
+                    for pos in range(grafo.inicios[b], grafo.fins[b]):
+                        self._avaliar_instrucao(pos)
+                    if forma.codigo[grafo.fins[b] - 1].op != OP_IF_FALSE:
+                        self._arestas.extend((b, s) for s in grafo.sucessores[b])
+            while self._valores:
+                for usuario in forma.usuarios[self._valores.pop()]:
+                    if usuario < 0:
+                        if self.bloco_executado[forma.lista_phis[~usuario][0]]:
+                            self._avaliar_phi(~usuario)
+                    elif self.bloco_executado[forma.bloco_da_posicao[usuario]]:
+                        self._avaliar_instrucao(usuario)
+
+    def _atualizar(self, v, nivel, valor=None):
+        atual = self.nivel[v]
+        if atual == FUNDO or (atual == nivel and (nivel != CONSTANTE_SCCP or _mesma_constante(self.valor[v], valor))):
+            return
+        if atual == CONSTANTE_SCCP and nivel == CONSTANTE_SCCP:
+            nivel = FUNDO
+        if nivel < atual:
+            return
+        self.nivel[v] = nivel
+        self.valor[v] = valor
+        self._valores.append(v)
+
+    def operando(self, pos, operando, uso):
+        # (nível, valor) de um operando lido na posição pos
+        if operando.classe == CONSTANTE:
+            return CONSTANTE_SCCP, operando.valor
+        if uso == -1:
+            return FUNDO, None
+        return self.nivel[uso], self.valor[uso]
+
+    def _avaliar_phi(self, indice):
+        bloco, _, v, argumentos = self.forma.lista_phis[indice]
+        nivel, valor = TOPO, None
+        for p, argumento in zip(self.forma.grafo.predecessores[bloco], argumentos):
+            if (p, bloco) not in self.arestas_executadas:
+                continue
+            nivel_arg = self.nivel[argumento]
+            if nivel_arg == TOPO:
+                continue
+            if nivel_arg == FUNDO or (nivel == CONSTANTE_SCCP and not _mesma_constante(valor, self.valor[argumento])):
+                nivel = FUNDO
+                break
+            nivel, valor = CONSTANTE_SCCP, self.valor[argumento]
+        if nivel != TOPO:
+            self._atualizar(v, nivel, valor)
+
+    def _avaliar_instrucao(self, pos):
+        forma = self.forma
+        instrucao = forma.codigo[pos]
+        op = instrucao.op
+        if op == OP_IF_FALSE:
+            nivel, valor = self.operando(pos, instrucao.a, forma.uso_a[pos])
+            b = forma.bloco_da_posicao[pos]
+            grafo = forma.grafo
+            if nivel == FUNDO:
+                self._arestas.extend((b, s) for s in grafo.sucessores[b])
+            elif nivel == CONSTANTE_SCCP:
+                alvo = grafo.bloco_do_rotulo[instrucao.b.valor] if not valor else b + 1
+                self._arestas.append((b, alvo))
+            return
+        v = forma.definicao[pos]
+        if v == -1:
+            return
+        if op == OP_COPIA:
+            self._atualizar(v, *self.operando(pos, instrucao.a, forma.uso_a[pos]))
+        elif op == OP_BINARIA:
+            nivel_a, a = self.operando(pos, instrucao.a, forma.uso_a[pos])
+            nivel_b, b = self.operando(pos, instrucao.b, forma.uso_b[pos])
+            if nivel_a == FUNDO or nivel_b == FUNDO:
+                self._atualizar(v, FUNDO)
+            elif nivel_a == CONSTANTE_SCCP and nivel_b == CONSTANTE_SCCP:
+                try:
+                    self._atualizar(v, CONSTANTE_SCCP, OPERACOES[instrucao.oper](a, b))
+                except Exception:
+                    # Divisão por zero e afins ficam para a execução
+                    self._atualizar(v, FUNDO)
+        elif op == OP_UNARIA:
+            nivel, a = self.operando(pos, instrucao.a, forma.uso_a[pos])
+            if nivel == CONSTANTE_SCCP:
+                self._atualizar(v, CONSTANTE_SCCP, not a)
+            elif nivel == FUNDO:
+                self._atualizar(v, FUNDO)
+        elif op == OP_DECLARE:
+            # A máquina virtual inicia variáveis declaradas com 0
+            self._atualizar(v, CONSTANTE_SCCP, 0)
+        else:
+            self._atualizar(v, FUNDO)
+
+    def aplicar(self):
+        # Código da função sem os blocos inalcançáveis, com desvios decididos e constantes nos usos
+        forma = self.forma
+        grafo = forma.grafo
+        codigo = forma.codigo
+        codigo_novo = []
+        for b in range(len(grafo)):
+            if not self.bloco_executado[b]:
+                continue
+            for pos in range(grafo.inicios[b], grafo.fins[b]):
+                instrucao = codigo[pos]
+                op = instrucao.op
+                if op == OP_FUNCAO or op == OP_ROTULO:
+                    codigo_novo.append(instrucao)
+                    continue
+                v = forma.definicao[pos]
+                if v != -1 and self.nivel[v] == CONSTANTE_SCCP and op in (OP_COPIA, OP_BINARIA, OP_UNARIA):
+                    codigo_novo.append(Instrucao(OP_COPIA, dest=instrucao.dest, a=constante(self.valor[v])))
+                    continue
+                a, b_ = instrucao.a, instrucao.b
+                if forma.uso_a[pos] != -1 and self.nivel[forma.uso_a[pos]] == CONSTANTE_SCCP:
+                    a = constante(self.valor[forma.uso_a[pos]])
+                if forma.uso_b[pos] != -1 and self.nivel[forma.uso_b[pos]] == CONSTANTE_SCCP:
+                    b_ = constante(self.valor[forma.uso_b[pos]])
+                if op == OP_IF_FALSE and a.classe == CONSTANTE:
+                    if not a.valor:
+                        codigo_novo.append(Instrucao(OP_GOTO, a=instrucao.b))
+                    continue
+                if a is not instrucao.a or b_ is not instrucao.b:
+                    instrucao = Instrucao(op, dest=instrucao.dest, a=a, b=b_, oper=instrucao.oper)
+                codigo_novo.append(instrucao)
+        return codigo_novo
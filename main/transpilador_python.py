@@ -0,0 +1,531 @@
+import re
+import sys
+import time
+from functools import lru_cache
+from codigo_intermediario import (
+    ler_3ac, _divisao, _resto, CONSTANTE, TEMPORARIO, VARIAVEL,
+    OP_DECLARE, OP_FUNCAO, OP_ROTULO, OP_PUSH_STACK, OP_POP_STACK, OP_GOTO, OP_IF_FALSE, OP_PARAM,
+    OP_FORMAL, OP_CALL, OP_RETURN, OP_RET, OP_PRINT, OP_HALT, OP_COPIA, OP_BINARIA, OP_UNARIA
+)
+from grafo_fluxo import GrafoFluxo, dividir_funcoes
+from maquina_virtual import formatar_valor
+
+# Operações que viram o próprio operador do Python; '/' e '%' chamam as funções da máquina virtual (divisão
+# truncada do C e erro de divisão por zero) e '&&'/'||' precisam devolver bool como o 3AC
+INFIXOS = ('+', '-', '*', '==', '!=', '<', '<=', '>', '>=')
+AUXILIARES = {'/': '_divisao', '%': '_resto'}
+LOGICOS = {'&&': 'and', '||': 'or'}
+# Linhas que não deixam a execução seguir para a linha de baixo
+TRANSFERENCIAS = ('continue', 'break', 'return', 'raise')
+# O Python recusa mais de 20 blocos de laço aninhados e 100 níveis de indentação: acima destes limites a
+# função é gerada com o laço de despacho
+MAX_LACOS_ANINHADOS = 18
+MAX_INDENTACAO = 90
+LIMITE_RECURSAO = 20_000
+PADRAO_NOME = re.compile(r"'(\w+)'")
+
+
+class _Parada(Exception):
+    # Lançada pelo 'halt': atravessa todas as chamadas até o ponto de entrada
+    pass
+
+
+class _NaoEstruturavel(Exception):
+    pass
+
+
+@lru_cache(maxsize=64)
+def compilar_fonte(fonte):
+    return compile(fonte, '<3ac>', 'exec')
+
+
+def _termina(linhas, nivel):
+    # A última linha no nível do trecho desvia ou sai (o trecho não continua na linha de baixo)
+    ultima = next((texto for n, texto in reversed(linhas) if n == nivel), None)
+    return ultima is not None and ultima.startswith(TRANSFERENCIAS)
+
+
+def _nome_original(nome):
+    if nome.startswith(('v_', 'g_')):
+        return nome[2:]
+    return nome
+
+
+class _Funcao:
+    # Tradução de uma função do 3AC para uma função Python. Os operandos de cada posição são traduzidos na
+    # ordem do texto, como a máquina virtual carrega o código: uma variável só é local depois do seu
+    # 'declare' ou 'formal' (locais viram v_nome, globais g_nome, temporários mantêm o nome).
+    def __init__(self, transpilador, nome, trecho):
+        self.transpilador = transpilador
+        self.nome = nome
+        self.trecho = trecho
+        self.formais = []
+        self.globais_escritas = set()
+        self.textos = []
+        locais = set()
+        for instrucao in trecho:
+            op = instrucao.op
+            if op == OP_FORMAL:
+                locais.add(instrucao.dest.valor)
+                self.formais.append('v_' + instrucao.dest.valor)
+            elif op == OP_DECLARE and nome is not None:
+                locais.add(instrucao.dest.valor)
+            self.textos.append(tuple(self._operando(o, locais, o is instrucao.dest)
+                                     for o in (instrucao.dest, instrucao.a, instrucao.b)))
+        self.grafo = GrafoFluxo(trecho)
+        self.saltos = {}
+
+    def _operando(self, operando, locais, escrito):
+        if operando is None or operando.classe not in (CONSTANTE, TEMPORARIO, VARIAVEL):
+            return None
+        if operando.classe == CONSTANTE:
+            return repr(operando.valor)
+        if operando.classe == TEMPORARIO:
+            return operando.valor
+        if operando.valor in locais:
+            return 'v_' + operando.valor
+        self.transpilador.globais.add(operando.valor)
+        if escrito:
+            self.globais_escritas.add('g_' + operando.valor)
+        return 'g_' + operando.valor
+
+    # Instruções de um bloco (sem o desvio final)
+
+    def _instrucoes(self, inicio, fim):
+        # 'param' seguido só de outros 'param' até o 'call' vira argumento direto da chamada; os demais são
+        # copiados para _aN na hora (o valor pode mudar até o 'call') e os que sobram no fim do bloco vão
+        # para a pilha _args, de onde um 'call' em outro bloco os tira, como na máquina virtual
+        linhas = []
+        pendentes = []
+        for pos in range(inicio, fim):
+            instrucao = self.trecho[pos]
+            op = instrucao.op
+            dest, a, b = self.textos[pos]
+            if op == OP_COPIA:
+                linhas.append(f"{dest} = {a}")
+            elif op == OP_BINARIA:
+                oper = instrucao.oper
+                if oper in INFIXOS:
+                    linhas.append(f"{dest} = {a} {oper} {b}")
+                elif oper in AUXILIARES:
+                    linhas.append(f"{dest} = {AUXILIARES[oper]}({a}, {b})")
+                elif oper in LOGICOS:
+                    linhas.append(f"{dest} = True if {a} {LOGICOS[oper]} {b} else False")
+                else:
+                    raise Exception(f"Erro do transpilador: operador '{oper}' desconhecido.")
+            elif op == OP_UNARIA:
+                linhas.append(f"{dest} = not {a}")
+            elif op == OP_PRINT:
+                if instrucao.a.classe == CONSTANTE:
+                    linhas.append(f"_saida({formatar_valor(instrucao.a.valor)!r})")
+                else:
+                    linhas.append(f"_saida(_formatar({a}))")
+            elif op == OP_DECLARE:
+                linhas.append(f"{dest} = 0")
+            elif op == OP_PARAM:
+                seguinte = pos + 1
+                while seguinte < fim and self.trecho[seguinte].op == OP_PARAM:
+                    seguinte += 1
+                if seguinte < fim and self.trecho[seguinte].op == OP_CALL:
+                    pendentes.append(a)
+                else:
+                    copia = f"_a{pos}"
+                    linhas.append(f"{copia} = {a}")
+                    pendentes.append(copia)
+            elif op == OP_CALL:
+                linhas.extend(self._chamada(instrucao, dest, pendentes))
+            elif op in (OP_FUNCAO, OP_ROTULO, OP_FORMAL, OP_PUSH_STACK, OP_POP_STACK):
+                pass
+            else:
+                raise Exception(f"Erro do transpilador: instrução '{instrucao}' fora do fim do bloco.")
+        if pendentes:
+            linhas.append(f"_args.extend(({', '.join(pendentes)},))")
+        return linhas
+
+    def _chamada(self, instrucao, dest, pendentes):
+        nome, n = instrucao.a.valor, instrucao.b.valor
+        formais = self.transpilador.formais.get(nome)
+        if formais is None:
+            raise Exception(f"Erro de carga: função '{nome}' não encontrada no código 3AC.")
+        if n < formais:
+            raise Exception(f"Erro do transpilador: '{nome}' chamada com {n} argumentos, espera {formais}.")
+        linhas = []
+        diretos = pendentes[max(len(pendentes) - n, 0):]
+        del pendentes[max(len(pendentes) - n, 0):]
+        faltam = n - len(diretos)
+        argumentos = ', '.join(diretos)
+        if faltam:
+            linhas.append(f"_r = _args[-{faltam}:]")
+            linhas.append(f"del _args[-{faltam}:]")
+            argumentos = f"*_r, {argumentos}" if diretos else "*_r"
+        if n > formais:
+            # A máquina virtual associa os formais aos primeiros valores e ignora o resto
+            argumentos = f"*({argumentos},)[:{formais}]"
+        chamada = f"f_{nome}({argumentos})"
+        linhas.append(f"{dest} = {chamada}" if dest is not None else chamada)
+        return linhas
+
+    def _final(self, b):
+        # Última instrução do bloco, se ela é um desvio ou uma saída
+        ultima = self.trecho[self.grafo.fins[b] - 1]
+        if ultima.op in (OP_GOTO, OP_IF_FALSE, OP_RETURN, OP_RET, OP_HALT):
+            return ultima, self.grafo.fins[b] - 1
+        return None, self.grafo.fins[b]
+
+    def _alvo(self, nome):
+        alvo = self.grafo.bloco_do_rotulo.get(nome)
+        if alvo is None:
+            raise Exception(f"Erro do transpilador: desvio para '{nome}', fora da função '{self.nome}'.")
+        return alvo
+
+    def _saida_do_bloco(self, b, final, pos):
+        # ('retorno', linha) | ('desvio', alvo) | ('condicional', condição, alvo se verdadeira, alvo se falsa)
+        if final is None or final.op == OP_GOTO:
+            if final is not None:
+                return ('desvio', self._alvo(final.a.valor))
+            if b + 1 >= len(self.grafo):
+                raise Exception(f"Erro do transpilador: a função '{self.nome}' termina sem 'return'.")
+            return ('desvio', b + 1)
+        if final.op == OP_IF_FALSE:
+            falso = self._alvo(final.b.valor)
+            verdadeiro = b + 1
+            if verdadeiro >= len(self.grafo) or verdadeiro == falso:
+                return ('desvio', falso)
+            return ('condicional', self.textos[pos][1], verdadeiro, falso)
+        if final.op == OP_RETURN:
+            return ('retorno', f"return {self.textos[pos][1]}")
+        if final.op == OP_RET:
+            return ('retorno', "return")
+        return ('retorno', "raise _Parada")
+
+    # Estruturação (Ramsey, "Beyond Relooper"): a árvore de dominadores dá o aninhamento. Um bloco com mais
+    # de uma aresta de avanço chegando (junção), ou fora de um laço que contém o seu dominador, vira o fim
+    # de um 'bloco' que envolve o código do seu dominador (ou do laço); desvios para ele são 'sair', arestas de
+    # retorno são 'continuar' e os demais alvos são escritos no lugar do desvio. Um grafo irredutível
+    # (aresta de retorno para quem não domina a origem) cai no laço de despacho.
+
+    def _preparar(self):
+        grafo = self.grafo
+        ordem = grafo.ordem_reversa_pos()
+        numero = [-1] * len(grafo)
+        for i, b in enumerate(ordem):
+            numero[b] = i
+        idom = grafo.dominadores()
+        entradas = [0] * len(grafo)
+        for b in ordem:
+            for s in grafo.sucessores[b]:
+                if numero[s] > numero[b]:
+                    entradas[s] += 1
+                elif not grafo.domina(idom, s, b):
+                    raise _NaoEstruturavel()
+        self.numero = numero
+        self.lacos = grafo.lacos_naturais(idom)
+        # Um bloco fora de laços que contêm o seu dominador imediato fica depois do mais externo deles
+        # (o cabeçalho também o domina), em vez de dentro do corpo do laço
+        self.seguidor = [entradas[b] >= 2 for b in range(len(grafo))]
+        pai = list(idom)
+        do_maior = sorted(self.lacos.items(), key=lambda item: -len(item[1]))
+        for b in ordem[1:]:
+            for cabecalho, corpo in do_maior:
+                if idom[b] in corpo and b not in corpo:
+                    pai[b] = cabecalho
+                    self.seguidor[b] = True
+                    break
+        self.filhos = [[] for _ in range(len(grafo))]
+        for b in ordem[1:]:
+            self.filhos[pai[b]].append(b)
+
+    def _arvore(self, x):
+        resultado = []
+        while True:
+            seguidores = [c for c in self.filhos[x] if self.seguidor[c]]
+            if x in self.lacos:
+                corpo = self.lacos[x]
+                interno = self._envolver(self._codigo(x), [c for c in seguidores if c in corpo])
+                interno = [['laco', x, interno, None]]
+                seguidores = [c for c in seguidores if c not in corpo]
+            else:
+                interno = self._codigo(x)
+            if not seguidores:
+                resultado.extend(interno)
+                break
+            # O último seguidor continua na mesma lista (sem recursão: cadeias longas de junções são comuns)
+            resultado.append(['bloco', seguidores[-1], self._envolver(interno, seguidores[:-1]), False])
+            x = seguidores[-1]
+        return resultado
+
+    def _envolver(self, interno, seguidores):
+        for y in seguidores:
+            interno = [['bloco', y, interno, False]] + self._arvore(y)
+        return interno
+
+    def _codigo(self, b):
+        final, pos = self._final(b)
+        codigo = [['linhas', self._instrucoes(self.grafo.inicios[b], pos)]]
+        saida = self._saida_do_bloco(b, final, pos)
+        if saida[0] == 'retorno':
+            codigo.append(['linhas', [saida[1]]])
+        elif saida[0] == 'desvio':
+            codigo.extend(self._ramo(b, saida[1]))
+        else:
+            codigo.append(['se', saida[1], self._ramo(b, saida[2]), self._ramo(b, saida[3])])
+        return codigo
+
+    def _ramo(self, origem, alvo):
+        if self.numero[alvo] <= self.numero[origem]:
+            return [['salto', 'continuar', alvo]]
+        if self.seguidor[alvo]:
+            return [['salto', 'sair', alvo]]
+        return self._arvore(alvo)
+
+    def _analisar(self, comandos):
+        # Devolve (ruins, cauda): alvos de 'sair' que aparecem fora da última posição ou dentro de um laço
+        # Python, e alvos que aparecem na última posição. Um 'bloco' cujo alvo é ruim precisa virar
+        # 'while True: ... break' para o 'sair' ser um 'break'; os outros não geram código algum.
+        ruins = set()
+        cauda = set()
+        for i, comando in enumerate(comandos):
+            ultimo = i == len(comandos) - 1
+            tipo = comando[0]
+            if tipo == 'salto' and comando[1] == 'sair':
+                (cauda if ultimo else ruins).add(comando[2])
+            elif tipo == 'se':
+                ruins_entao, cauda_entao = self._analisar(comando[2])
+                ruins_senao, cauda_senao = self._analisar(comando[3])
+                ruins |= ruins_entao | ruins_senao
+                (cauda if ultimo else ruins).update(cauda_entao | cauda_senao)
+            elif tipo == 'laco':
+                ruins_corpo, cauda_corpo = self._analisar(comando[2])
+                ruins |= ruins_corpo | cauda_corpo
+            elif tipo == 'bloco':
+                y, corpo = comando[1], comando[2]
+                ruins_corpo, cauda_corpo = self._analisar(corpo)
+                if y in ruins_corpo and corpo[-1][0] == 'laco' and y not in set().union(*self._analisar(corpo[:-1])):
+                    # O bloco termina no laço: um 'break' do laço já chega em y
+                    corpo[-1][3] = y
+                else:
+                    comando[3] = y in ruins_corpo
+                ruins |= (ruins_corpo | cauda_corpo) - {y}
+        return ruins, cauda
+
+    def _resolver(self, tipo, alvo, contexto):
+        # Traduz um 'continuar'/'sair' no contexto de laços e blocos que o envolvem. Atravessar um laço
+        # Python que não é o do alvo exige um código em _salto, tratado logo depois daquele laço.
+        atravessados = []
+        for quadro in reversed(contexto):
+            if quadro['tipo'] == tipo and quadro['alvo'] == alvo:
+                direto = 'continue' if tipo == 'continuar' else 'break' if quadro['laco'] else None
+                break
+            if tipo == 'sair' and quadro.get('saida') == alvo:
+                direto = 'break'
+                break
+            if quadro['laco']:
+                atravessados.append(quadro)
+        else:
+            raise Exception(f"Erro do transpilador: desvio para o bloco {alvo} sem estrutura em '{self.nome}'.")
+        if not atravessados:
+            return [direto] if direto else []
+        codigo = self.saltos.setdefault((tipo, alvo), len(self.saltos) + 1)
+        atravessados[0]['escapes'][codigo] = (tipo, alvo)
+        return [f"_salto = {codigo}", 'break']
+
+    def _baixar(self, comandos, contexto, nivel, linhas):
+        if nivel > MAX_INDENTACAO or sum(q['laco'] for q in contexto) > MAX_LACOS_ANINHADOS:
+            raise _NaoEstruturavel()
+        for comando in comandos:
+            tipo = comando[0]
+            if tipo == 'linhas':
+                linhas.extend((nivel, linha) for linha in comando[1])
+            elif tipo == 'salto':
+                linhas.extend((nivel, linha) for linha in self._resolver(comando[1], comando[2], contexto))
+            elif tipo == 'se':
+                entao = self._baixar(comando[2], contexto, nivel + 1, [])
+                senao = self._baixar(comando[3], contexto, nivel + 1, [])
+                if entao:
+                    linhas.append((nivel, f"if {comando[1]}:"))
+                    linhas.extend(entao)
+                    if senao and _termina(entao, nivel + 1):
+                        # O 'então' nunca chega ao fim: o 'senão' fica no nível de fora, sem 'else'
+                        linhas.extend((n - 1, texto) for n, texto in senao)
+                    elif senao:
+                        linhas.append((nivel, "else:"))
+                        linhas.extend(senao)
+                elif senao:
+                    linhas.append((nivel, f"if not {comando[1]}:"))
+                    linhas.extend(senao)
+            elif tipo == 'laco':
+                self._laco({'tipo': 'continuar', 'alvo': comando[1], 'laco': True, 'escapes': {}, 'saida': comando[3]},
+                           comando[2], contexto, nivel, linhas)
+            elif comando[3]:
+                self._laco({'tipo': 'sair', 'alvo': comando[1], 'laco': True, 'escapes': {}},
+                           comando[2], contexto, nivel, linhas)
+            else:
+                contexto.append({'tipo': 'sair', 'alvo': comando[1], 'laco': False})
+                self._baixar(comando[2], contexto, nivel, linhas)
+                contexto.pop()
+        return linhas
+
+    def _laco(self, quadro, corpo, contexto, nivel, linhas):
+        linhas.append((nivel, "while True:"))
+        contexto.append(quadro)
+        inicio = len(linhas)
+        self._baixar(corpo, contexto, nivel + 1, linhas)
+        contexto.pop()
+        if not _termina(linhas[inicio:], nivel + 1):
+            linhas.append((nivel + 1, "break"))
+        if quadro['escapes']:
+            linhas.append((nivel, "if _salto:"))
+            for i, (codigo, (tipo, alvo)) in enumerate(sorted(quadro['escapes'].items())):
+                linhas.append((nivel + 1, f"{'if' if i == 0 else 'elif'} _salto == {codigo}:"))
+                desvio = self._resolver(tipo, alvo, contexto)
+                if desvio[0].startswith('_salto'):
+                    # Segue para um laço de fora com o mesmo código
+                    desvio = desvio[1:]
+                else:
+                    linhas.append((nivel + 2, "_salto = 0"))
+                linhas.extend((nivel + 2, linha) for linha in desvio)
+
+    def _estruturado(self):
+        self._preparar()
+        arvore = self._arvore(0)
+        self._analisar(arvore)
+        linhas = self._baixar(arvore, [], 1, [])
+        if self.saltos:
+            linhas.insert(0, (1, "_salto = 0"))
+        return linhas
+
+    def _despacho(self):
+        # Um bloco por ramo; _b guarda o próximo bloco
+        linhas = [(1, "_b = 0"), (1, "while True:")]
+        primeiro = True
+        for b in self.grafo.ordem_reversa_pos():
+            final, pos = self._final(b)
+            linhas.append((2, f"{'if' if primeiro else 'elif'} _b == {b}:"))
+            primeiro = False
+            linhas.extend((3, linha) for linha in self._instrucoes(self.grafo.inicios[b], pos))
+            saida = self._saida_do_bloco(b, final, pos)
+            if saida[0] == 'retorno':
+                linhas.append((3, saida[1]))
+            elif saida[0] == 'desvio':
+                linhas.append((3, f"_b = {saida[1]}"))
+            else:
+                linhas.append((3, f"_b = {saida[2]} if {saida[1]} else {saida[3]}"))
+        return linhas
+
+    def gerar(self):
+        try:
+            linhas = self._estruturado()
+            despacho = False
+        except _NaoEstruturavel:
+            self.saltos = {}
+            linhas = self._despacho()
+            despacho = True
+        cabecalho = [f"def f_{self.nome}({', '.join(self.formais)}):"]
+        if self.globais_escritas:
+            cabecalho.append(f"    global {', '.join(sorted(self.globais_escritas))}")
+        if not linhas:
+            linhas = [(1, "pass")]
+        return cabecalho + ['    ' * nivel + texto for nivel, texto in linhas], despacho
+
+
+class TranspiladorPython:
+    # Gera um módulo Python equivalente ao programa 3AC: uma função f_<nome> por função (formais viram
+    # parâmetros, locais e temporários viram variáveis locais do Python), globais do 3AC são globais do
+    # módulo e _programa() executa o trecho antes da primeira função ('declare' das globais e 'goto main').
+    # O laço while/if é recuperado do grafo de fluxo; 'funcoes_despacho' lista as funções que ficaram
+    # com o laço de despacho por blocos.
+    def __init__(self, codigo_3ac):
+        if codigo_3ac and isinstance(codigo_3ac[0], str):
+            codigo_3ac = ler_3ac(codigo_3ac)
+        self.codigo = codigo_3ac
+        self.globais = set()
+        self.formais = {}
+        self.funcoes_despacho = []
+
+    def _inicio(self, trecho, primeira):
+        linhas = []
+        escritas = set()
+        for instrucao in trecho:
+            op = instrucao.op
+            if op == OP_DECLARE:
+                self.globais.add(instrucao.dest.valor)
+                escritas.add('g_' + instrucao.dest.valor)
+                linhas.append(f"    g_{instrucao.dest.valor} = 0")
+            elif op == OP_GOTO:
+                nome = instrucao.a.valor
+                if nome not in self.formais:
+                    raise Exception(f"Erro do transpilador: desvio inicial para '{nome}', que não é uma função.")
+                linhas.append(f"    f_{nome}()")
+                break
+            elif op == OP_HALT:
+                break
+            else:
+                raise Exception(f"Erro do transpilador: instrução '{instrucao}' antes da primeira função.")
+        else:
+            if primeira is not None:
+                linhas.append(f"    f_{primeira}()")
+        cabecalho = ["def _programa():"]
+        if escritas:
+            cabecalho.append(f"    global {', '.join(sorted(escritas))}")
+        return cabecalho + (linhas or ["    pass"])
+
+    def gerar(self):
+        intervalos = dividir_funcoes(self.codigo)
+        for nome, inicio, fim in intervalos:
+            if nome is not None:
+                self.formais[nome] = sum(1 for i in self.codigo[inicio:fim] if i.op == OP_FORMAL)
+        partes = []
+        for nome, inicio, fim in intervalos:
+            if nome is not None:
+                linhas, despacho = _Funcao(self, nome, self.codigo[inicio:fim]).gerar()
+                if despacho:
+                    self.funcoes_despacho.append(nome)
+                partes.append('\n'.join(linhas))
+        inicial = next(((inicio, fim) for nome, inicio, fim in intervalos if nome is None), (0, 0))
+        primeira = next((nome for nome, _, _ in intervalos if nome is not None), None)
+        partes.append('\n'.join(self._inicio(self.codigo[inicial[0]:inicial[1]], primeira)))
+        modulo = ["_args = []"]
+        if self.globais:
+            modulo.append(' = '.join(f"g_{nome}" for nome in sorted(self.globais)) + " = 0")
+        return '\n'.join(modulo) + '\n\n\n' + '\n\n\n'.join(partes) + '\n'
+
+
+class ProgramaPython:
+    # Programa 3AC transpilado e compilado com compile(); executar() tem a mesma interface da máquina
+    # virtual (saida, tempo_execucao), mas sem limite nem contagem de instruções. O objeto de código é
+    # guardado por texto-fonte: o mesmo programa não é compilado de novo.
+    def __init__(self, codigo_3ac):
+        inicio = time.perf_counter()
+        transpilador = TranspiladorPython(codigo_3ac)
+        self.fonte = transpilador.gerar()
+        self.funcoes_despacho = transpilador.funcoes_despacho
+        meio = time.perf_counter()
+        self.codigo_objeto = compilar_fonte(self.fonte)
+        self.tempo_transpilacao = meio - inicio
+        self.tempo_compilacao = time.perf_counter() - meio
+        self.saida = []
+        self.tempo_execucao = 0.0
+
+    def executar(self):
+        saida = []
+        ambiente = {'_saida': saida.append, '_formatar': formatar_valor, '_divisao': _divisao, '_resto': _resto,
+                    '_Parada': _Parada}
+        exec(self.codigo_objeto, ambiente)
+        limite = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limite, LIMITE_RECURSAO))
+        inicio = time.perf_counter()
+        try:
+            ambiente['_programa']()
+        except _Parada:
+            pass
+        except NameError as e:
+            nome = PADRAO_NOME.search(str(e))
+            nome = _nome_original(nome.group(1)) if nome else '?'
+            raise Exception(f"Erro de execução: variável '{nome}' usada antes de receber valor.")
+        except RecursionError:
+            raise Exception("Erro de execução: recursão mais profunda que o limite do Python.")
+        finally:
+            self.tempo_execucao = time.perf_counter() - inicio
+            sys.setrecursionlimit(limite)
+            self.saida = saida
+        return saida
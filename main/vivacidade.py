@@ -0,0 +1,90 @@
+from codigo_intermediario import TEMPORARIO, VARIAVEL, OP_CALL, OP_RET, OP_RETURN, OP_HALT
+
+SAIDAS = (OP_RET, OP_RETURN, OP_HALT)
+
+
+class Vivacidade:
+    # Análise de vivacidade sobre os blocos de um GrafoFluxo, com conjuntos de variáveis representados por
+    # inteiros: a variável de número i é o bit (1 << i). Só recebem número as globais e os nomes lidos em
+    # algum bloco antes de serem escritos nele; os demais (a maioria dos temporários) nunca estão vivos na
+    # fronteira de um bloco, e deixá-los fora mantém os inteiros pequenos.
+    # Globais são consideradas lidas por toda chamada (a função chamada pode lê-las) e por toda saída
+    # da função (quem chamou pode lê-las).
+    def __init__(self, grafo, globais=()):
+        self.grafo = grafo
+        self.globais = frozenset(globais)
+        n = len(grafo)
+
+        expostas_por_bloco = []
+        definidas_por_bloco = []
+        todas_expostas = set()
+        for b in range(n):
+            expostas = set()
+            definidas = set()
+            for instrucao in reversed(grafo.instrucoes(b)):
+                dest = instrucao.dest
+                if dest is not None and (dest.classe == TEMPORARIO or dest.classe == VARIAVEL):
+                    expostas.discard(dest.valor)
+                    definidas.add(dest.valor)
+                expostas.update(o.valor for o in instrucao.usos())
+                if instrucao.op == OP_CALL or instrucao.op in SAIDAS:
+                    expostas |= self.globais
+            expostas_por_bloco.append(expostas)
+            definidas_por_bloco.append(definidas)
+            todas_expostas |= expostas
+
+        self.numeros = {}
+        for nome in sorted(self.globais) + sorted(todas_expostas - self.globais):
+            self.numeros[nome] = len(self.numeros)
+        self.mascara_globais = (1 << len(self.globais)) - 1
+
+        self.geradas = [self.bits(expostas) for expostas in expostas_por_bloco]
+        self.mortas = [self.bits(definidas) for definidas in definidas_por_bloco]
+        self.entrada = [0] * n
+        self.saida = [0] * n
+        self._resolver()
+
+    def bits(self, nomes):
+        numeros = self.numeros
+        bits = 0
+        for nome in nomes:
+            numero = numeros.get(nome)
+            if numero is not None:
+                bits |= 1 << numero
+        return bits
+
+    def bit(self, nome):
+        # 0 para nomes sem número: nunca vivos fora do bloco em que aparecem
+        numero = self.numeros.get(nome)
+        return 0 if numero is None else 1 << numero
+
+    def _resolver(self):
+        # Problema para trás: percorrer os blocos em pós-ordem faz quase tudo convergir na primeira volta;
+        # blocos inalcançáveis também entram, para que o código deles continue consistente
+        grafo = self.grafo
+        ordem = grafo.ordem_reversa_pos()
+        alcancaveis = set(ordem)
+        ordem.reverse()
+        ordem.extend(b for b in range(len(grafo)) if b not in alcancaveis)
+        pendentes = list(reversed(ordem))
+        na_fila = bytearray([1]) * len(grafo)
+        entrada, saida = self.entrada, self.saida
+        geradas, mortas = self.geradas, self.mortas
+        sucessores, predecessores = grafo.sucessores, grafo.predecessores
+        while pendentes:
+            b = pendentes.pop()
+            na_fila[b] = 0
+            vivas = 0
+            for s in sucessores[b]:
+                vivas |= entrada[s]
+            saida[b] = vivas
+            nova_entrada = geradas[b] | (vivas & ~mortas[b])
+            if nova_entrada != entrada[b]:
+                entrada[b] = nova_entrada
+                for p in predecessores[b]:
+                    if not na_fila[p]:
+                        na_fila[p] = 1
+                        pendentes.append(p)
+
+    def nomes(self, bits):
+        return {nome for nome, numero in self.numeros.items() if bits >> numero & 1}